@@ -15,6 +15,7 @@ from webservices import flow, partition
 from webservices.env import env
 from webservices.rest import app, db
 from webservices.config import SQL_CONFIG, check_config
+from webservices.common import cache
 from webservices.common.util import get_full_path
 import webservices.legal_docs as legal_docs
 
@@ -273,6 +274,7 @@ def update_aggregates():
     partition.SchedBGroup.refresh_children()
     logger.info('Finished updating Schedule B.')
 
+    cache.bump_generation()
     logger.info('Finished updating incremental aggregates.')
 
 @manager.command
@@ -297,6 +299,20 @@ def add_itemized_partition_cycle(cycle=None, amount=1):
     partition.SchedBGroup.add_cycles(cycle, amount)
     logger.info('Finished adding Schedule B cycles.')
 
+@manager.command
+def build_itemized_counts():
+    """Builds the tables of itemized row counts by committee and two-year
+    period, which the API uses for exact counts. They are built by
+    partitioning and kept current by the incremental updates; run this to
+    rebuild them without repartitioning.
+    """
+    logger.info('Building Schedule A counts...')
+    partition.SchedAGroup.create_counts()
+    logger.info('Building Schedule B counts...')
+    partition.SchedBGroup.create_counts()
+    cache.bump_generation()
+    logger.info('Finished building itemized counts.')
+
 @manager.command
 def update_all(processes=1):
     """Update all derived data. Warning: Extremely slow on production data.
@@ -325,6 +341,7 @@ def refresh_materialized():
     """
     logger.info('Refreshing materialized views...')
     execute_sql_file('data/refresh_materialized_views.sql')
+    cache.bump_generation()
     logger.info('Finished refreshing materialized views.')
 
 @manager.command
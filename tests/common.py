@@ -10,6 +10,11 @@ from nplusone.ext.flask_sqlalchemy import NPlusOne
 import manage
 from webservices import rest
 from webservices import __API_VERSION__
+from webservices.common import cache
+from webservices.common import counts
+from webservices.common import fanout
+from webservices.common import committee_types
+from webservices.common import typeahead
 
 
 TEST_CONN = os.getenv('SQLA_TEST_CONN', 'postgresql:///cfdm_unit_test')
@@ -17,6 +22,17 @@ TEST_CONN = os.getenv('SQLA_TEST_CONN', 'postgresql:///cfdm_unit_test')
 rest.app.config['NPLUSONE_RAISE'] = True
 NPlusOne(rest.app)
 
+# Fanned-out work runs in separate sessions, which can't see the uncommitted
+# data that tests create
+fanout.max_workers = 1
+# Counts tables are created empty and aren't maintained by factories
+counts.use_tallies = False
+# In-memory indexes are otherwise loaded in separate sessions, which can't see
+# the uncommitted data that tests create
+cache.reload_in_background = False
+# Tests refresh data in the same process that serves it
+cache.generation = cache.Generation(poll=0, single_process=True)
+
 
 def _reset_schema():
     rest.db.engine.execute('drop schema if exists public cascade;')
@@ -53,6 +69,9 @@ class BaseTestCase(unittest.TestCase):
     def setUp(self):
         self.connection = rest.db.engine.connect()
         self.transaction = self.connection.begin()
+        counts.clear_cache()
+        committee_types.clear()
+        typeahead.clear()
 
     def tearDown(self):
         self.transaction.rollback()
@@ -0,0 +1,81 @@
+import mock
+
+from tests import factories
+from tests.common import ApiBaseTest
+
+from webservices.rest import api, db
+from webservices.common import fanout
+from webservices.resources import batch
+from webservices.resources.filings import FilingsList
+from webservices.resources.sched_a import ScheduleAView
+
+
+class TestBatch(ApiBaseTest):
+
+    def test_batch(self):
+        factories.FilingsFactory(committee_id='C001')
+        factories.FilingsFactory(committee_id='C002')
+        paths = [
+            api.url_for(FilingsList, committee_id='C001'),
+            api.url_for(FilingsList, committee_id='C002', per_page=1000),
+            '/v1/not-found/',
+        ]
+        response = self.client.post_json(api.url_for(batch.BatchView), {'requests': paths})
+        results = response.json['results']
+        self.assertEqual([each['path'] for each in results], paths)
+        self.assertEqual([each['status'] for each in results], [200, 422, 404])
+        self.assertEqual(results[0]['body']['results'][0]['committee_id'], 'C001')
+        self.assertEqual(results[0]['body'], self.client.get(paths[0]).json)
+
+    def test_multiple_committees(self):
+        # Each sub-request fans out again, from a pool thread, once for each
+        # batch of committees
+        paths = [
+            api.url_for(
+                ScheduleAView,
+                committee_id=['C00{0}'.format(index), 'C009'],
+                two_year_transaction_period=2016,
+            )
+            for index in range(1, 6)
+        ]
+        with mock.patch.object(fanout, 'max_workers', 2), mock.patch.object(fanout, '_executor', None):
+            response = self.client.post_json(api.url_for(batch.BatchView), {'requests': paths})
+        self.assertEqual([each['status'] for each in response.json['results']], [200] * 5)
+
+    def test_session_reset(self):
+        # A sub-request cancelled by its statement timeout doesn't abort the
+        # transaction, or leave its timeout, for later sub-requests
+        get_page = FilingsList.get_page
+
+        def sleep_page(self, *args, **kwargs):
+            if kwargs.get('committee_id') == ['C001']:
+                db.session.execute('select pg_sleep(1)')
+            return get_page(self, *args, **kwargs)
+
+        default = db.session.execute('show statement_timeout').scalar()
+        paths = [
+            api.url_for(FilingsList, committee_id='C001'),
+            api.url_for(FilingsList, committee_id='C002'),
+        ]
+        with mock.patch.object(FilingsList, 'get_page', sleep_page), \
+                mock.patch.object(FilingsList, 'statement_timeout', 50):
+            response = self.client.post_json(api.url_for(batch.BatchView), {'requests': paths})
+        self.assertEqual([each['status'] for each in response.json['results']], [503, 200])
+        self.assertEqual(db.session.execute('show statement_timeout').scalar(), default)
+
+    def test_invalid_path(self):
+        response = self.client.post_json(
+            api.url_for(batch.BatchView),
+            {'requests': ['/v1/batch/']},
+            expect_errors=True,
+        )
+        self.assertEqual(response.status_code, 422)
+
+    @mock.patch.object(batch, 'MAX_REQUESTS', 1)
+    def test_too_many(self):
+        response = self.client.post_json(
+            api.url_for(batch.BatchView),
+            {'requests': ['/v1/filings/', '/v1/filings/']},
+            expect_errors=True,
+        )
+        self.assertEqual(response.status_code, 422)
@@ -0,0 +1,365 @@
+import gzip
+import json
+import time
+import codecs
+import datetime
+import unittest
+import threading
+
+import mock
+import redis
+from werkzeug.datastructures import MultiDict
+
+from tests import factories
+from tests.common import ApiBaseTest
+
+from webservices import rest
+from webservices.rest import api
+from webservices.common import cache
+from webservices.resources.filings import FilingsList, EFilingsView
+
+
+class Timer(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_get_set(self):
+        lru = cache.LRUCache(maxsize=2)
+        lru.set('a', 1)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('b', 2), 2)
+
+    def test_evicts_least_recently_used(self):
+        lru = cache.LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIn('a', lru)
+        self.assertNotIn('b', lru)
+        self.assertIn('c', lru)
+
+    def test_expires(self):
+        timer = Timer()
+        lru = cache.LRUCache(maxsize=2, ttl=10, timer=timer)
+        lru.set('a', 1)
+        timer.now = 9
+        self.assertEqual(lru.get('a'), 1)
+        timer.now = 10
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(len(lru), 0)
+
+    def test_zero_ttl(self):
+        lru = cache.LRUCache(maxsize=2, ttl=0, timer=Timer())
+        lru.set('a', 1)
+        self.assertIsNone(lru.get('a'))
+
+    def test_disabled(self):
+        lru = cache.LRUCache(maxsize=0)
+        lru.set('a', 1)
+        self.assertNotIn('a', lru)
+
+
+class FakeRedis(object):
+    """Just enough of a Redis client to share a `Generation`.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, nx=False):
+        if not nx or key not in self.data:
+            self.data[key] = str(value).encode('utf-8')
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode('utf-8')
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+
+class TestGeneration(unittest.TestCase):
+
+    def test_local(self):
+        generation = cache.Generation(poll=0, timer=lambda: 100)
+        self.assertEqual(generation.get(), 0)
+        self.assertIsNone(generation.timestamp())
+        self.assertFalse(generation.is_shared())
+        generation.bump()
+        self.assertEqual(generation.get(), 1)
+        self.assertEqual(generation.timestamp(), 100)
+
+    def test_shared_across_instances(self):
+        client = FakeRedis()
+        worker = cache.Generation(client, poll=0, timer=lambda: 100)
+        refresh = cache.Generation(client, poll=0, timer=lambda: 200)
+        self.assertTrue(worker.is_shared())
+        self.assertEqual(worker.timestamp(), 100)
+        args = MultiDict([('committee_id', 'C001')])
+        with mock.patch.object(cache, 'generation', worker):
+            etag = cache.make_etag('/v1/filings/', args)
+            refresh.bump()
+            self.assertEqual(worker.get(), 1)
+            self.assertEqual(worker.timestamp(), 200)
+            self.assertNotEqual(cache.make_etag('/v1/filings/', args), etag)
+
+    def test_redis(self):
+        client = mock.Mock()
+        client.mget.return_value = [b'3', b'100.5']
+        generation = cache.Generation(client, poll=60)
+        self.assertEqual(generation.get(), 3)
+        self.assertEqual(generation.timestamp(), 100.5)
+        generation.bump()
+        client.pipeline.return_value.incr.assert_called_once_with(cache.Generation.key)
+        client.mget.return_value = [b'4', b'200']
+        self.assertEqual(generation.get(), 4)
+
+    def test_redis_unavailable(self):
+        client = mock.Mock()
+        client.mget.side_effect = redis.ConnectionError
+        timer = Timer()
+        generation = cache.Generation(client, poll=0, timer=timer)
+        with mock.patch.object(cache.logger, 'warn') as warn:
+            self.assertEqual(generation.get(), 0)
+            self.assertFalse(generation.is_shared())
+            timer.now = 59
+            generation.get()
+            self.assertEqual(warn.call_count, 1)
+            timer.now = 60
+            generation.get()
+            self.assertEqual(warn.call_count, 2)
+
+
+class TestResponseKey(unittest.TestCase):
+
+    def test_canonical_order(self):
+        first = cache.response_key('v1.filingslist', (), {'a': 1, 'b': [2, 3]})
+        second = cache.response_key('v1.filingslist', (), {'b': [2, 3], 'a': 1})
+        self.assertEqual(first, second)
+
+    def test_ignores_api_key(self):
+        first = cache.response_key('v1.filingslist', (), {'a': 1, 'api_key': 'one'})
+        second = cache.response_key('v1.filingslist', (), {'a': 1, 'api_key': 'two'})
+        self.assertEqual(first, second)
+
+    def test_generation(self):
+        first = cache.response_key('v1.filingslist', (), {'a': 1})
+        with mock.patch.object(cache.generation, 'get', return_value=-1):
+            second = cache.response_key('v1.filingslist', (), {'a': 1})
+        self.assertNotEqual(first, second)
+
+
+class TestReloadable(unittest.TestCase):
+
+    def setUp(self):
+        self.timer = Timer()
+        self.generation = cache.Generation(FakeRedis(), poll=0)
+        patchers = [
+            mock.patch.object(cache, 'generation', self.generation),
+            mock.patch.object(cache, 'reload_in_background', True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def wait(self, value):
+        for _ in range(500):
+            if not value.loading:
+                return
+            time.sleep(0.01)
+        self.fail('Value not loaded')
+
+    def test_background(self):
+        ready = threading.Event()
+        loader = mock.Mock(side_effect=lambda: ready.wait(5) and loader.call_count)
+        value = cache.Reloadable(loader)
+        with rest.app.app_context():
+            # Requests don't wait for loads
+            self.assertIsNone(value.get())
+            ready.set()
+            self.wait(value)
+            self.assertEqual(value.get(), 1)
+            ready.clear()
+            self.generation.bump()
+            self.assertEqual(value.get(), 1)
+            ready.set()
+            self.wait(value)
+            self.assertEqual(value.get(), 2)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_clear(self):
+        ready = threading.Event()
+        value = cache.Reloadable(lambda: ready.wait(5))
+        with rest.app.app_context():
+            value.get()
+            value.clear()
+            ready.set()
+            time.sleep(0.1)
+            # Loads started before clearing are discarded
+            self.assertIsNone(value.value)
+
+    def test_ttl_unshared(self):
+        loader = mock.Mock(side_effect=lambda: loader.call_count)
+        value = cache.Reloadable(loader, ttl=60, timer=self.timer)
+        generation = cache.Generation(poll=0)
+        with mock.patch.object(cache, 'reload_in_background', False), \
+                mock.patch.object(cache, 'generation', generation):
+            self.assertEqual(value.get(), 1)
+            self.timer.now = 30
+            self.assertEqual(value.get(), 1)
+            self.timer.now = 61
+            self.assertEqual(value.get(), 2)
+
+
+class TestResponseCache(ApiBaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.patcher = mock.patch.object(cache, 'response_cache', cache.MemoryBackend())
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        super().tearDown()
+
+    def _get(self, url):
+        response = self.app.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'application/json')
+        return json.loads(codecs.decode(response.data))
+
+    def test_cached(self):
+        factories.FilingsFactory(committee_id='C001')
+        url = api.url_for(FilingsList, committee_id='C001')
+        first = self._get(url)
+        with mock.patch.object(FilingsList, 'get_page') as get_page:
+            second = self._get(url)
+            self.assertFalse(get_page.called)
+        self.assertEqual(first, second)
+        self.assertEqual(len(first['results']), 1)
+
+    def test_cached_compressed(self):
+        factories.FilingsFactory(committee_id='C001')
+        url = api.url_for(FilingsList, committee_id='C001')
+        headers = {'Accept-Encoding': 'gzip'}
+        with mock.patch('webservices.common.compression.brotli', None), \
+                mock.patch('webservices.common.compression.min_size', 0):
+            first = self.app.get(url, headers=headers)
+            with mock.patch.object(FilingsList, 'get_page') as get_page:
+                second = self.app.get(url, headers=headers)
+                self.assertFalse(get_page.called)
+        self.assertEqual(second.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(
+            json.loads(codecs.decode(gzip.decompress(second.data))),
+            self._get(url),
+        )
+
+    def test_cached_small(self):
+        # Bodies below the compression threshold are cached uncompressed
+        url = api.url_for(FilingsList, committee_id='C001')
+        headers = {'Accept-Encoding': 'gzip'}
+        with mock.patch('webservices.common.compression.min_size', 1024 * 1024):
+            first = self.app.get(url, headers=headers)
+            second = self.app.get(url, headers=headers)
+        self.assertNotIn('Content-Encoding', first.headers)
+        self.assertNotIn('Content-Encoding', second.headers)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(json.loads(codecs.decode(second.data))['results'], [])
+
+    def test_seek_pages(self):
+        filings = [
+            factories.FilingsFactory(receipt_date=datetime.date(2012, 1, day))
+            for day in range(1, 5)
+        ]
+        url = api.url_for(FilingsList, sort='receipt_date', per_page=2, seek=True)
+        self._get(url)
+        for filing in filings[:2]:
+            results = self._get(api.url_for(
+                FilingsList, sort='receipt_date', per_page=2,
+                last_index=filings[1].sub_id, last_receipt_date=filing.receipt_date.isoformat(),
+            ))['results']
+            self.assertEqual(
+                [each['receipt_date'] for each in results],
+                [each.receipt_date.isoformat() for each in filings if each.receipt_date > filing.receipt_date][:2],
+            )
+
+    def test_generation_invalidates(self):
+        url = api.url_for(FilingsList, committee_id='C001')
+        self.assertEqual(len(self._get(url)['results']), 0)
+        factories.FilingsFactory(committee_id='C001')
+        self.assertEqual(len(self._get(url)['results']), 0)
+        cache.bump_generation()
+        self.assertEqual(len(self._get(url)['results']), 1)
+
+
+class TestConditionalRequests(ApiBaseTest):
+
+    def test_etag(self):
+        url = api.url_for(FilingsList, committee_id='C001')
+        response = self.app.get(url)
+        etag = response.headers['ETag']
+        self.assertEqual(self.app.get(url).headers['ETag'], etag)
+        other = self.app.get(api.url_for(FilingsList, committee_id='C002'))
+        self.assertNotEqual(other.headers['ETag'], etag)
+
+    def test_etag_weak(self):
+        # Compressed and uncompressed bodies share the generation tag, and so
+        # are only weakly equivalent
+        url = api.url_for(FilingsList, committee_id='C001')
+        etag = self.app.get(url, headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        response = self.app.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_not_modified(self):
+        url = api.url_for(FilingsList, committee_id='C001')
+        etag = self.app.get(url).headers['ETag']
+        with mock.patch.object(FilingsList, 'get_page') as get_page:
+            response = self.app.get(url, headers={'If-None-Match': etag})
+            self.assertFalse(get_page.called)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+    def test_generation_modified(self):
+        url = api.url_for(FilingsList, committee_id='C001')
+        etag = self.app.get(url).headers['ETag']
+        cache.bump_generation()
+        response = self.app.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response.headers)
+
+    def test_unshared_generation(self):
+        # Without a shared generation, responses are tagged by content
+        url = api.url_for(FilingsList, committee_id='C001')
+        with mock.patch.object(cache, 'generation', cache.Generation(poll=0)):
+            first = self.app.get(url)
+            response = self.app.get(url, headers={'If-None-Match': first.headers['ETag']})
+            self.assertEqual(response.status_code, 304)
+            factories.FilingsFactory(committee_id='C001')
+            response = self.app.get(url, headers={'If-None-Match': first.headers['ETag']})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('Last-Modified', response.headers)
+
+    def test_realtime_etag(self):
+        url = api.url_for(EFilingsView)
+        first = self.app.get(url)
+        response = self.app.get(url, headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+        factories.EFilingsFactory(committee_id='C001')
+        response = self.app.get(url, headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(response.status_code, 200)
@@ -40,7 +40,9 @@ class CandidateFormatTest(ApiBaseTest):
         response = self._response(
             api.url_for(CandidateView, candidate_id=candidate.candidate_id)
         )
-        assert response['pagination'] == {'count': 1, 'page': 1, 'pages': 1, 'per_page': 20}
+        assert response['pagination'] == {
+            'count': 1, 'page': 1, 'pages': 1, 'per_page': 20, 'count_is_estimate': False,
+        }
         # we are showing the full history rather than one result
         assert len(response['results']) == 1
 
@@ -101,6 +103,23 @@ class CandidateFormatTest(ApiBaseTest):
         assert response[0].keys() == schemas.CandidateDetailSchema().fields.keys()
         response = response[0]
 
+    def test_candidate_detail_many(self):
+        candidates = [factories.CandidateDetailFactory() for _ in range(3)]
+        results = self._results(
+            '/v1/candidate/?candidate_id={0}&candidate_id={1}'.format(
+                candidates[0].candidate_id,
+                candidates[2].candidate_id,
+            )
+        )
+        self.assertEqual(
+            {each['candidate_id'] for each in results},
+            {candidates[0].candidate_id, candidates[2].candidate_id},
+        )
+
+    def test_candidate_detail_many_required(self):
+        response = self.app.get('/v1/candidate/')
+        self.assertEqual(response.status_code, 422)
+
     def test_extra_fields(self):
         candidate = factories.CandidateDetailFactory(
             address_street_1='PO Box 8102',
@@ -0,0 +1,65 @@
+import unittest
+
+import mock
+
+from webservices.common import committee_types
+
+
+ROWS = [
+    ('C001', 2016, 'H'),
+    ('C001', 2012, 'S'),
+    ('C002', 2014, None),
+    ('C003', 2016, 'P'),
+]
+
+
+class TestCommitteeTypeMap(unittest.TestCase):
+
+    def setUp(self):
+        self.type_map = committee_types.CommitteeTypeMap(ROWS)
+
+    def test_latest(self):
+        self.assertEqual(len(self.type_map), 3)
+        self.assertEqual(self.type_map.get('C001'), 'H')
+        self.assertEqual(self.type_map.get('C003'), 'P')
+        self.assertIsNone(self.type_map.get('C002'))
+
+    def test_cycles(self):
+        self.assertEqual(self.type_map.get('C001', {2012, 2014}), 'S')
+        with self.assertRaises(KeyError):
+            self.type_map.get('C003', {2012})
+
+    def test_missing(self):
+        for committee_id in ['C000', 'C0015', 'C004']:
+            with self.assertRaises(KeyError):
+                self.type_map.get(committee_id)
+
+
+class TestCommitteeTypes(unittest.TestCase):
+
+    def test_load_unordered(self):
+        # Rows come back in whatever order, such as that of a locale-aware
+        # collation, and are sorted as `bisect` compares ids
+        rows = [
+            ('C00_1', 2016, 'H'),
+            ('C001', 2012, 'S'),
+            ('c002', 2016, 'P'),
+            ('C001', 2016, 'N'),
+        ]
+        with mock.patch.object(committee_types, 'db') as db:
+            db.session.query.return_value.yield_per.return_value = iter(rows)
+            type_map = committee_types.load_map()
+        self.assertEqual(type_map.get('C00_1'), 'H')
+        self.assertEqual(type_map.get('C001'), 'N')
+        self.assertEqual(type_map.get('c002'), 'P')
+
+    @mock.patch.object(committee_types.cache, 'reload_in_background', False)
+    def test_reload_on_generation(self):
+        loader = mock.Mock(side_effect=lambda: committee_types.CommitteeTypeMap(ROWS))
+        types = committee_types.CommitteeTypes(loader=loader)
+        with mock.patch.object(committee_types.cache.generation, 'get', return_value=1):
+            first = types.get_map()
+            self.assertIs(types.get_map(), first)
+        with mock.patch.object(committee_types.cache.generation, 'get', return_value=2):
+            self.assertIsNot(types.get_map(), first)
+        self.assertEqual(loader.call_count, 2)
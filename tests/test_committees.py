@@ -73,6 +73,23 @@ class CommitteeFormatTest(ApiBaseTest):
             len(candidate1_committees) + len(candidate2_committees)
         )
 
+    def test_committee_detail_many(self):
+        committees = [factories.CommitteeDetailFactory() for _ in range(3)]
+        results = self._results(
+            '/v1/committee/?committee_id={0}&committee_id={1}'.format(
+                committees[0].committee_id,
+                committees[2].committee_id,
+            )
+        )
+        self.assertEqual(
+            {each['committee_id'] for each in results},
+            {committees[0].committee_id, committees[2].committee_id},
+        )
+
+    def test_committee_detail_many_required(self):
+        response = self.app.get('/v1/committee/')
+        self.assertEqual(response.status_code, 422)
+
     def test_committee_detail_fields(self):
         committee = factories.CommitteeDetailFactory(
             first_file_date=datetime.date(1982, 12, 31),
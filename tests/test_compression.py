@@ -0,0 +1,60 @@
+import gzip
+import unittest
+
+import mock
+from werkzeug.http import parse_accept_header
+from werkzeug.wrappers import Response
+from werkzeug.datastructures import Accept
+
+from webservices.common import compression
+
+
+def make_request(accept_encoding):
+    return mock.Mock(accept_encodings=parse_accept_header(accept_encoding, Accept))
+
+
+def make_response(data, mimetype='application/json'):
+    return Response(data, mimetype=mimetype)
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(compression, 'brotli', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_negotiate(self):
+        self.assertEqual(compression.negotiate(make_request('gzip, deflate')), 'gzip')
+        self.assertIsNone(compression.negotiate(make_request('deflate')))
+        self.assertIsNone(compression.negotiate(make_request('gzip;q=0')))
+
+    def test_compress_response(self):
+        data = b'{"results": []}' * 100
+        response = compression.compress_response(make_response(data), make_request('gzip'))
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.get_data()), data)
+
+    def test_skip_small(self):
+        response = compression.compress_response(make_response(b'{}'), make_request('gzip'))
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_data(), b'{}')
+
+    def test_compress_body(self):
+        data = b'{"results": []}' * 100
+        encoding, compressed = compression.compress_body(data, 'gzip')
+        self.assertEqual((encoding, gzip.decompress(compressed)), ('gzip', data))
+        self.assertEqual(compression.compress_body(b'{}', 'gzip'), (None, b'{}'))
+        self.assertEqual(compression.compress_body(data, None), (None, data))
+
+    def test_skip_binary(self):
+        data = b'\x00' * 2048
+        response = make_response(data, mimetype='application/octet-stream')
+        response = compression.compress_response(response, make_request('gzip'))
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_compress_stream(self):
+        chunks = ['{"results": [', '1, 2, 3', ']}']
+        data = b''.join(compression.compress_stream(iter(chunks)))
+        self.assertEqual(gzip.decompress(data), ''.join(chunks).encode('utf-8'))
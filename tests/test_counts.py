@@ -0,0 +1,154 @@
+import mock
+
+from tests import factories
+from tests.common import ApiBaseTest
+from tests.test_cache import FakeRedis
+
+from webservices.rest import api
+from webservices.common import cache
+from webservices.common import counts
+from webservices.common import models
+from webservices.resources.filings import FilingsList, EFilingsView
+
+
+class TestCountCache(ApiBaseTest):
+
+    def test_fingerprint_params(self):
+        query = models.Filings.query
+        first = query.filter(models.Filings.committee_id == 'C001')
+        second = query.filter(models.Filings.committee_id == 'C002')
+        self.assertEqual(counts.fingerprint(first), counts.fingerprint(first))
+        self.assertNotEqual(counts.fingerprint(first), counts.fingerprint(second))
+
+    def test_count_cached(self):
+        [factories.FilingsFactory(committee_id='C001') for _ in range(3)]
+        query = models.Filings.query.filter(models.Filings.committee_id == 'C001')
+        self.assertEqual(counts.count_estimate(query, models.db.session, threshold=5000), 3)
+        with mock.patch.object(counts, '_count_estimate') as count_estimate:
+            self.assertEqual(counts.count_estimate(query, models.db.session, threshold=5000), 3)
+            self.assertFalse(count_estimate.called)
+
+    def test_clear_cache(self):
+        query = models.Filings.query.filter(models.Filings.committee_id == 'C001')
+        self.assertEqual(counts.count_estimate(query, models.db.session, threshold=5000), 0)
+        factories.FilingsFactory(committee_id='C001')
+        counts.clear_cache()
+        self.assertEqual(counts.count_estimate(query, models.db.session, threshold=5000), 1)
+
+    def test_generation(self):
+        # A refresh in another process invalidates the counts of this one
+        client = FakeRedis()
+        worker = cache.Generation(client, poll=0)
+        query = models.Filings.query.filter(models.Filings.committee_id == 'C001')
+        with mock.patch.object(cache, 'generation', worker):
+            self.assertEqual(counts.count_estimate(query, models.db.session, threshold=5000), 0)
+            factories.FilingsFactory(committee_id='C001')
+            self.assertEqual(counts.count_estimate(query, models.db.session, threshold=5000), 0)
+            cache.Generation(client, poll=0).bump()
+            self.assertEqual(counts.count_estimate(query, models.db.session, threshold=5000), 1)
+
+    def test_realtime_not_cached(self):
+        url = api.url_for(EFilingsView, committee_id='C001')
+        self.assertEqual(self._response(url)['pagination']['count'], 0)
+        factories.EFilingsFactory(committee_id='C001')
+        self.assertEqual(self._response(url)['pagination']['count'], 1)
+
+    def test_deferred(self):
+        [factories.FilingsFactory(committee_id='C001') for _ in range(3)]
+        query = models.Filings.query.filter(models.Filings.committee_id == 'C001')
+        with mock.patch.object(counts, 'defer_count') as defer_count:
+            count = counts.count_estimate(query, models.db.session, threshold=5000, defer=True)
+            self.assertTrue(counts.is_estimate(count))
+            self.assertTrue(defer_count.called)
+            # Later pages are served the exact count once it's ready
+            _, key = defer_count.call_args[0]
+            counts.count_cache.set(key, 3)
+            count = counts.count_estimate(query, models.db.session, threshold=5000, defer=True)
+            self.assertEqual(count, 3)
+            self.assertFalse(counts.is_estimate(count))
+            self.assertEqual(defer_count.call_count, 1)
+
+    def test_count_is_estimate(self):
+        factories.FilingsFactory(committee_id='C001')
+        url = api.url_for(FilingsList, committee_id='C001')
+        self.assertFalse(self._response(url)['pagination']['count_is_estimate'])
+        counts.clear_cache()
+        with mock.patch.object(counts, 'deferred', True):
+            with mock.patch.object(counts, 'defer_count'):
+                self.assertTrue(self._response(url)['pagination']['count_is_estimate'])
+
+    def test_estimate_not_cached(self):
+        url = api.url_for(FilingsList, committee_id='C001')
+        backend = mock.Mock(get=mock.Mock(return_value=None))
+        with mock.patch.object(cache, 'response_cache', backend):
+            self._response(url)
+            self.assertTrue(backend.set.called)
+            backend.set.reset_mock()
+            counts.clear_cache()
+            with mock.patch.object(counts, 'deferred', True), mock.patch.object(counts, 'defer_count'):
+                self.assertTrue(self._response(url)['pagination']['count_is_estimate'])
+            self.assertFalse(backend.set.called)
+
+    def test_deferred_errors_logged(self):
+        query = mock.Mock()
+        query.with_session.side_effect = ValueError
+        executor = mock.Mock(submit=lambda func: func())
+        with mock.patch.object(counts, 'get_executor', return_value=executor), \
+                mock.patch.object(counts.logger, 'exception') as exception:
+            counts.defer_count(query, 'key')
+            self.assertTrue(exception.called)
+        self.assertIsNone(counts.count_cache.get('key'))
+
+
+class TestTally(ApiBaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.patcher = mock.patch.object(counts, 'use_tallies', True)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        super().tearDown()
+
+    def test_match(self):
+        kwargs = {'committee_id': ['C001'], 'two_year_transaction_period': 2016, 'per_page': 20, 'sort': '-date'}
+        tally = counts.Tally.match(models.ScheduleACount, kwargs)
+        self.assertEqual((tally.committee_ids, tally.period), (['C001'], 2016))
+        self.assertIsNone(counts.Tally.match(None, kwargs))
+        self.assertIsNone(counts.Tally.match(
+            models.ScheduleACount,
+            dict(kwargs, contributor_state=['VA']),
+        ))
+        self.assertIsNotNone(counts.Tally.match(
+            models.ScheduleACount,
+            dict(kwargs, contributor_state=[], is_individual=None, last_index=5),
+        ))
+        # Counts tables leave out records without a committee
+        self.assertIsNone(counts.Tally.match(
+            models.ScheduleACount,
+            dict(kwargs, committee_id=[]),
+        ))
+
+    def test_count(self):
+        models.db.session.add_all([
+            models.ScheduleACount(committee_id='C001', two_year_transaction_period=2016, count=10),
+            models.ScheduleACount(committee_id='C002', two_year_transaction_period=2016, count=5),
+            models.ScheduleACount(committee_id='C001', two_year_transaction_period=2014, count=1),
+        ])
+        models.db.session.flush()
+        query = models.ScheduleA.query.filter(models.ScheduleA.committee_id == 'C001')
+        tally = counts.Tally(models.ScheduleACount, ['C001'], 2016)
+        self.assertEqual(counts.count_estimate(query, models.db.session, threshold=5000, tally=tally), 10)
+        tally = counts.Tally(models.ScheduleACount, ['C001', 'C002'], 2016)
+        self.assertEqual(tally.count(models.db.session), 15)
+
+    def test_has_table_generation(self):
+        counts.has_table.cache_clear()
+        with mock.patch.object(models.db.engine, 'has_table', side_effect=[False, True]) as has_table:
+            self.assertFalse(counts.has_table('fec_sched_a_count', 1))
+            self.assertFalse(counts.has_table('fec_sched_a_count', 1))
+            # A counts table built by a refresh is found in the next generation
+            self.assertTrue(counts.has_table('fec_sched_a_count', 2))
+            self.assertEqual(has_table.call_count, 2)
+        counts.has_table.cache_clear()
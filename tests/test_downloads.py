@@ -6,6 +6,8 @@ import pytest
 from botocore.exceptions import ClientError
 
 from webservices.rest import db, api
+from webservices import schemas
+from webservices.common import models
 from webservices.tasks import download as tasks
 from webservices.resources import download as resource
 
@@ -48,6 +50,17 @@ class TestDownloadTask(ApiBaseTest):
             ExpiresIn=resource.URL_EXPIRY,
         )
 
+    def test_query_with_labels_only(self):
+        query = tasks.query_with_labels(
+            models.ScheduleA.query,
+            schemas.ScheduleASchema,
+            only=('sub_id', 'committee_name'),
+        )
+        self.assertEqual(
+            [each['name'] for each in query.column_descriptions],
+            ['sub_id', 'committee_name'],
+        )
+
     @mock.patch('webservices.tasks.download.upload_s3')
     def test_views(self, upload_s3):
         committee = factories.CommitteeFactory(committee_type='H')
@@ -1,13 +1,23 @@
 import datetime
+import unittest
 import functools
 
 from tests import factories
 from tests.common import ApiBaseTest, assert_dicts_subset
 
 from webservices.rest import db, api
+from webservices.common import districts
 from webservices.resources.elections import ElectionList, ElectionView, ElectionSummary
 
 
+class TestDistricts(unittest.TestCase):
+
+    def test_get_districts(self):
+        self.assertEqual(districts.get_districts(['22902']), {('VA', 5)})
+        self.assertEqual(districts.get_districts([1001]), {('MA', 1)})
+        self.assertEqual(districts.get_districts([99999]), set())
+
+
 class TestElectionSearch(ApiBaseTest):
 
     def setUp(self):
@@ -44,6 +54,10 @@ class TestElectionSearch(ApiBaseTest):
         self.assertEqual(len(results), 2)
         self.assertTrue(all([each['office'] == 'S' for each in results]))
 
+    def test_search_zip_unknown(self):
+        response = self._response(api.url_for(ElectionList, zip='99999'))
+        self.assertEqual(response['results'], [])
+
     def test_search_zip(self):
         results = self._results(api.url_for(ElectionList, zip='22902'))
         assert len(results) == 3
@@ -121,6 +121,36 @@ class TestFilings(ApiBaseTest):
 
         self.assertEqual(results[0]['document_description'], 'RFAI: report 2004')
 
+    def test_seek_pagination(self):
+        filings = [
+            factories.FilingsFactory(receipt_date=datetime.date(2012, 1, day))
+            for day in range(1, 6)
+        ]
+        response = self._response(
+            api.url_for(FilingsList, seek=True, sort='receipt_date', per_page=3)
+        )
+        self.assertEqual(len(response['results']), 3)
+        last_indexes = response['pagination']['last_indexes']
+        self.assertEqual(
+            last_indexes,
+            {
+                'last_index': filings[2].sub_id,
+                'last_receipt_date': filings[2].receipt_date.isoformat(),
+            }
+        )
+        page2 = self._results(
+            api.url_for(FilingsList, sort='receipt_date', per_page=3, **last_indexes)
+        )
+        self.assertEqual(
+            [each['receipt_date'] for each in page2],
+            [each.receipt_date.isoformat() for each in filings[3:]],
+        )
+
+    def test_offset_pagination_default(self):
+        factories.FilingsFactory()
+        response = self._response(api.url_for(FilingsList))
+        self.assertNotIn('last_indexes', response['pagination'])
+
 
 class TestEfileFiles(ApiBaseTest):
 
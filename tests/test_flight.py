@@ -0,0 +1,74 @@
+import threading
+import unittest
+
+import mock
+
+from webservices.common import flight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_coalesce_concurrent(self):
+        flights = flight.SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return b'page'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flights.do('key', compute)))
+        leader.start()
+        started.wait()
+        waiters = [
+            threading.Thread(target=lambda: results.append(flights.do('key', compute)))
+            for _ in range(3)
+        ]
+        for waiter in waiters:
+            waiter.start()
+        release.set()
+        for thread in [leader] + waiters:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [b'page'] * 4)
+        self.assertEqual(flights.calls, {})
+
+    def test_sequential_calls_not_shared(self):
+        flights = flight.SingleFlight()
+        self.assertEqual(flights.do('key', lambda: 1), 1)
+        self.assertEqual(flights.do('key', lambda: 2), 2)
+
+    def test_error_released(self):
+        flights = flight.SingleFlight()
+        with self.assertRaises(ValueError):
+            flights.do('key', mock.Mock(side_effect=ValueError))
+        self.assertEqual(flights.do('key', lambda: 1), 1)
+
+    def test_redis_leader(self):
+        client = mock.Mock()
+        client.set.return_value = True
+        flights = flight.SingleFlight(client, result_ttl=5)
+        self.assertEqual(flights.do('key', lambda: b'page'), b'page')
+        client.set.assert_any_call(flights.prefix + 'result:key', b'page', px=5000)
+        self.assertTrue(client.get.called)
+
+    def test_redis_waiter(self):
+        client = mock.Mock()
+        client.set.return_value = False
+        client.get.side_effect = [None, b'page']
+        client.exists.return_value = True
+        flights = flight.SingleFlight(client, poll=0)
+        compute = mock.Mock()
+        self.assertEqual(flights.do('key', compute), b'page')
+        self.assertFalse(compute.called)
+
+    def test_redis_leader_failed(self):
+        client = mock.Mock()
+        client.set.return_value = False
+        client.get.return_value = None
+        client.exists.return_value = False
+        flights = flight.SingleFlight(client, poll=0)
+        self.assertEqual(flights.do('key', lambda: b'page'), b'page')
@@ -0,0 +1,112 @@
+import unittest
+
+import mock
+import sqlalchemy as sa
+
+from webservices import rest
+from webservices.common import followers
+from webservices.common.models import db
+
+
+class Timer(object):
+
+    def __init__(self, steps):
+        self.steps = iter(steps)
+
+    def __call__(self):
+        return next(self.steps)
+
+
+def make_engine(lag=None, error=None):
+    engine = mock.MagicMock()
+    connection = engine.connect.return_value.__enter__.return_value
+    if error is not None:
+        connection.execute.side_effect = error
+    else:
+        connection.execute.return_value.scalar.return_value = lag
+    return engine
+
+
+class TestFollowerPool(unittest.TestCase):
+
+    def setUp(self):
+        mock.patch.object(followers.sa.event, 'listen').start()
+        mock.patch.object(followers.FollowerPool, 'start').start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_probe_healthy(self):
+        pool = followers.FollowerPool([make_engine(lag=1.5)], timer=Timer([0, 0.1]))
+        pool.probe_all()
+        follower = pool.followers[0]
+        self.assertTrue(follower.healthy)
+        self.assertEqual(follower.lag, 1.5)
+        self.assertEqual(follower.latency, 0.1)
+
+    def test_eject_lagging(self):
+        pool = followers.FollowerPool([make_engine(lag=600)], max_lag=300)
+        pool.probe_all()
+        self.assertFalse(pool.followers[0].healthy)
+        self.assertIsNone(pool.choose())
+
+    def test_eject_slow(self):
+        pool = followers.FollowerPool([make_engine(lag=0)], max_latency=1, timer=Timer([0, 2]))
+        pool.probe_all()
+        self.assertFalse(pool.followers[0].healthy)
+
+    def test_eject_and_readmit(self):
+        engine = make_engine(error=sa.exc.OperationalError('select', {}, Exception()))
+        pool = followers.FollowerPool([engine])
+        pool.probe_all()
+        self.assertFalse(pool.followers[0].healthy)
+        connection = engine.connect.return_value.__enter__.return_value
+        connection.execute.side_effect = None
+        connection.execute.return_value.scalar.return_value = 0
+        pool.probe_all()
+        self.assertTrue(pool.followers[0].healthy)
+
+    def test_make_engine(self):
+        with mock.patch.object(followers.sa, 'create_engine') as create_engine:
+            followers.make_engine('postgresql://follower/cfdm')
+        create_engine.assert_called_once_with(
+            'postgresql://follower/cfdm',
+            connect_args={'connect_timeout': 5},
+        )
+
+    def test_choose_least_in_flight(self):
+        pool = followers.FollowerPool([make_engine(), make_engine(), make_engine()])
+        pool.followers[0].in_flight = 3
+        pool.followers[1].in_flight = 1
+        pool.followers[2].healthy = False
+        self.assertIs(pool.choose(), pool.followers[1])
+
+
+class TestRoutingSession(unittest.TestCase):
+
+    def setUp(self):
+        self.app_context = rest.app.app_context()
+        self.app_context.push()
+        self.follower = mock.Mock()
+        self.pool = mock.Mock()
+        self.pool.choose.return_value = self.follower
+        config = {
+            'SQLALCHEMY_FOLLOWERS': [self.follower.engine],
+            'SQLALCHEMY_FOLLOWER_POOL': self.pool,
+        }
+        patcher = mock.patch.dict(rest.app.config, config)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def test_pinned(self):
+        session = db.session()
+        self.assertIs(session.get_bind(), self.follower.engine)
+        self.assertIs(session.get_bind(), self.follower.engine)
+        self.assertEqual(self.pool.choose.call_count, 1)
+
+    def test_fallback_to_leader(self):
+        self.pool.choose.return_value = None
+        session = db.session()
+        self.assertIs(session.get_bind(), db.engine)
@@ -1,11 +1,16 @@
+import os
 import datetime
 
+import mock
 import sqlalchemy as sa
 
 from tests import factories
 from tests.common import ApiBaseTest
 
-from webservices.rest import api
+from webservices import utils
+from webservices.rest import api, db
+from webservices.common import rows
+from webservices.common import cursors
 from webservices.common.models import ScheduleA, ScheduleB, ScheduleE, ScheduleEEfile
 from webservices.schemas import ScheduleASchema
 from webservices.schemas import ScheduleBSchema
@@ -47,13 +52,89 @@ class TestItemized(ApiBaseTest):
             [each['report_year'] for each in response['results']],
             [2015, 2016]
         )
+        last_indexes = {
+            'last_index': receipts[0].sub_id,
+            'last_contribution_receipt_date': receipts[0].contribution_receipt_date.isoformat(),
+        }
         self.assertEqual(
             response['pagination']['last_indexes'],
-            {
-                'last_index': receipts[0].sub_id,
-                'last_contribution_receipt_date': receipts[0].contribution_receipt_date.isoformat(),
-            }
+            utils.extend(
+                last_indexes,
+                {'cursor': cursors.encode(last_indexes, (ScheduleA.contribution_receipt_date, sa.asc))},
+            )
+        )
+    def test_rows_match_objects(self):
+        factories.CommitteeHistoryFactory(committee_id='C001', name='Recipient')
+        factories.CommitteeHistoryFactory(committee_id='C002', name='Donor')
+        factories.ScheduleAFactory(
+            committee_id='C001',
+            contributor_id='C002',
+            contribution_receipt_amount=12.345,
+            contribution_receipt_date=datetime.date(2016, 1, 1),
+            memo_code='X',
+        )
+        factories.ScheduleAFactory(committee_id='C003', contribution_receipt_date=None)
+        url = api.url_for(ScheduleAView, sort='contribution_receipt_date', **self.kwargs)
+        with mock.patch.object(ScheduleAView, 'use_rows', False):
+            expected = self._response(url)
+        self.assertEqual(self._response(url), expected)
+        self.assertEqual(expected['results'][0]['committee']['name'], 'Recipient')
+        self.assertEqual(expected['results'][0]['contributor']['name'], 'Donor')
+        self.assertIsNone(expected['results'][1]['committee'])
+
+    def test_row_plan(self):
+        plan = rows.get_plan(ScheduleA, ScheduleASchema)
+        self.assertIsNotNone(plan)
+        self.assertIs(rows.get_plan(ScheduleA, ScheduleASchema), plan)
+        query = ScheduleA.query.options(sa.orm.joinedload(ScheduleA.committee))
+        self.assertFalse(rows.can_select(query, ScheduleA))
+        self.assertTrue(rows.can_select(ScheduleA.query, ScheduleA))
+
+    def test_row_plan_schedule_b(self):
+        # Loader options are left to the ORM path, so that rows can be selected
+        resource = ScheduleBView()
+        query = resource.build_query(_apply_options=False, **self.kwargs)
+        self.assertTrue(rows.can_select(query, ScheduleB))
+        self.assertFalse(rows.can_select(resource.build_query(**self.kwargs), ScheduleB))
+
+    def test_sparse_fields_schedule_b_joins(self):
+        resource = ScheduleBView()
+        self.assertEqual(len(resource.query_options), 2)
+        resource.only = ('disbursement_amount', 'sub_id')
+        self.assertEqual(resource.query_options, [])
+        resource.only = ('recipient_committee', 'sub_id')
+        self.assertEqual(len(resource.query_options), 1)
+
+    def test_sparse_fields(self):
+        factories.CommitteeHistoryFactory(committee_id='C001', name='Recipient')
+        factories.ScheduleAFactory(committee_id='C001', contribution_receipt_amount=50)
+        url = api.url_for(
+            ScheduleAView,
+            fields=['sub_id,contribution_receipt_amount', 'committee'],
+            sort='contribution_receipt_amount',
+            **self.kwargs
+        )
+        results = self._results(url)
+        self.assertEqual(
+            set(results[0].keys()),
+            {'sub_id', 'contribution_receipt_amount', 'committee'},
         )
+        self.assertEqual(results[0]['committee']['name'], 'Recipient')
+        with mock.patch.object(ScheduleAView, 'use_rows', False):
+            self.assertEqual(self._results(url), results)
+
+    def test_sparse_fields_plan(self):
+        plan = rows.get_plan(ScheduleA, ScheduleASchema, ('contributor_name', 'sub_id'))
+        self.assertEqual(
+            {column.key for column in plan.columns},
+            {'contributor_name', 'sub_id'},
+        )
+        self.assertEqual(plan.joins, [])
+
+    def test_sparse_fields_invalid(self):
+        response = self.app.get(api.url_for(ScheduleAView, fields=['sub_id', 'nope'], **self.kwargs))
+        self.assertEqual(response.status_code, 422)
+
     #This is the only test that the years will have to be bumped when in a new cycle
     #maybe refactor to use some logic based on current year?
     def test_two_year_transaction_period_default_supplied_automatically(self):
@@ -163,6 +244,86 @@ class TestItemized(ApiBaseTest):
             [each.sub_id for each in filings[20:]],
         )
 
+    def test_date_range_cycles(self):
+        receipts = [
+            factories.ScheduleAFactory(
+                contribution_receipt_date=datetime.date(2014, 12, 15),
+                two_year_transaction_period=2014,
+            ),
+            factories.ScheduleAFactory(
+                contribution_receipt_date=datetime.date(2015, 1, 15),
+                two_year_transaction_period=2016,
+            ),
+            factories.ScheduleAFactory(
+                contribution_receipt_date=datetime.date(2015, 6, 1),
+                two_year_transaction_period=2016,
+            ),
+        ]
+        min_date, max_date = datetime.date(2014, 12, 1), datetime.date(2015, 2, 1)
+        results = self._results(api.url_for(ScheduleAView, min_date=min_date, max_date=max_date, **self.kwargs))
+        self.assertEqual([int(each['sub_id']) for each in results], [receipts[1].sub_id])
+        query = ScheduleAView().build_query(min_date=min_date, max_date=max_date)
+        params = query.statement.compile().params
+        self.assertIn(2014, params.values())
+        self.assertIn(2016, params.values())
+
+    def test_pagination_cursor(self):
+        filings = [
+            factories.ScheduleAFactory(contribution_receipt_date=datetime.date(2016, 1, day))
+            for day in range(1, 26)
+        ]
+        response = self._response(api.url_for(
+            ScheduleAView,
+            sort='-contribution_receipt_date',
+            **self.kwargs
+        ))
+        cursor = response['pagination']['last_indexes']['cursor']
+        page2 = self._results(api.url_for(
+            ScheduleAView,
+            cursor=cursor,
+            sort='-contribution_receipt_date',
+            **self.kwargs
+        ))
+        self.assertEqual(
+            [int(each['sub_id']) for each in page2],
+            [each.sub_id for each in reversed(filings[:5])],
+        )
+
+    def test_pagination_cursor_invalid(self):
+        factories.ScheduleAFactory()
+        response = self.app.get(api.url_for(ScheduleAView, cursor='tampered', **self.kwargs))
+        self.assertEqual(response.status_code, 422)
+
+    def test_pagination_cursor_secret(self):
+        # Without a configured secret, every process derives the same key
+        credentials = {'SQLA_CONN': 'postgresql://leader/cfdm'}
+        with mock.patch.object(cursors.env, 'get_credential', side_effect=credentials.get), \
+                mock.patch.object(cursors.logger, 'warn') as warn:
+            secret = cursors.get_secret()
+            self.assertEqual(cursors.get_secret(), secret)
+            self.assertTrue(warn.called)
+            credentials['SQLA_CONN'] = 'postgresql://other/cfdm'
+            self.assertNotEqual(cursors.get_secret(), secret)
+            with mock.patch.dict(os.environ, {'PRODUCTION': '1'}):
+                with self.assertRaises(RuntimeError):
+                    cursors.get_secret()
+
+    def test_pagination_cursor_wrong_sort(self):
+        factories.ScheduleAFactory(contribution_receipt_date=datetime.date(2016, 1, 1))
+        response = self._response(api.url_for(
+            ScheduleAView,
+            sort='contribution_receipt_date',
+            **self.kwargs
+        ))
+        cursor = response['pagination']['last_indexes']['cursor']
+        response = self.app.get(api.url_for(
+            ScheduleAView,
+            cursor=cursor,
+            sort='-contribution_receipt_date',
+            **self.kwargs
+        ))
+        self.assertEqual(response.status_code, 422)
+
     def test_pagination_with_null_sort_column_values(self):
         filings = [
             factories.ScheduleAFactory(contribution_receipt_date=None)
@@ -307,6 +468,94 @@ class TestItemized(ApiBaseTest):
              filings[5:10:]]
         )
 
+    def test_null_pagination_descending_into_non_null_values(self):
+        filings = [
+            factories.ScheduleAFactory(contribution_receipt_date=None)
+            for _ in range(10)
+        ]
+        filings = filings + [
+            factories.ScheduleAFactory(
+                contribution_receipt_date=datetime.date(2016, 1, 1)
+            )
+            for _ in range(15)
+        ]
+        response = self._response(api.url_for(
+            ScheduleAView,
+            sort='-contribution_receipt_date',
+            per_page=5,
+            **self.kwargs
+        ))
+        last_indexes = response['pagination']['last_indexes']
+        self.assertTrue(last_indexes['sort_null_only'])
+        page2 = self._results(api.url_for(
+            ScheduleAView,
+            last_index=last_indexes['last_index'],
+            sort_null_only=True,
+            sort='-contribution_receipt_date',
+            per_page=10,
+            **self.kwargs
+        ))
+        self.assertEqual(
+            [int(each['sub_id']) for each in page2],
+            [each.sub_id for each in filings[4::-1] + filings[:19:-1]],
+        )
+
+    def test_multiple_committees(self):
+        filings = [
+            factories.ScheduleAFactory(
+                committee_id=committee_id,
+                contribution_receipt_date=datetime.date(2016, 1, day),
+            )
+            for day, committee_id in zip(range(1, 10), ['C001', 'C002', 'C003'] * 3)
+        ]
+        factories.ScheduleAFactory(committee_id='C004')
+        response = self._response(api.url_for(
+            ScheduleAView,
+            committee_id=['C001', 'C002', 'C003'],
+            sort='-contribution_receipt_date',
+            per_page=5,
+            **self.kwargs
+        ))
+        self.assertEqual(response['pagination']['count'], 9)
+        self.assertEqual(
+            [int(each['sub_id']) for each in response['results']],
+            [each.sub_id for each in filings[:3:-1]],
+        )
+        page2 = self._results(api.url_for(
+            ScheduleAView,
+            committee_id=['C001', 'C002', 'C003'],
+            sort='-contribution_receipt_date',
+            per_page=5,
+            cursor=response['pagination']['last_indexes']['cursor'],
+            **self.kwargs
+        ))
+        self.assertEqual(
+            [int(each['sub_id']) for each in page2],
+            [each.sub_id for each in filings[3::-1]],
+        )
+
+    def test_many_committees(self):
+        committee_ids = ['C{0:03d}'.format(each) for each in range(50)]
+        filings = [
+            factories.ScheduleAFactory(committee_id=committee_id)
+            for committee_id in committee_ids
+        ]
+        results = self._results(api.url_for(
+            ScheduleAView,
+            committee_id=committee_ids,
+            per_page=30,
+            **self.kwargs
+        ))
+        self.assertEqual(
+            [int(each['sub_id']) for each in results],
+            [each.sub_id for each in filings[:30]],
+        )
+
+    def test_committee_cap(self):
+        committee_ids = ['C{0:03d}'.format(each) for each in range(ScheduleAView.committee_cap + 1)]
+        response = self.app.get(api.url_for(ScheduleAView, committee_id=committee_ids, **self.kwargs))
+        self.assertEqual(response.status_code, 422)
+
     def test_pagination_with_null_sort_column_parameter(self):
         response = self.app.get(
             api.url_for(
@@ -451,3 +700,68 @@ class TestItemized(ApiBaseTest):
             results = self._results(api.url_for(ScheduleEEfileView, **{label: values[0]}))
             assert len(results) == 1
             assert results[0][column.key] == values[0]
+
+
+class TestSeekPlans(ApiBaseTest):
+    """Benchmark the query plans of seek pagination on a synthetic partition of
+    Schedule A, checking that each phase of a seek uses the composite
+    `(sort_column, sub_id)` indexes rather than filtering a full scan.
+    """
+
+    def setUp(self):
+        super(TestSeekPlans, self).setUp()
+        for statement in [
+            'create table ofec_sched_a_bench () inherits (ofec_sched_a_master)',
+            'create index on ofec_sched_a_bench (contb_receipt_dt, sub_id)',
+            'create index on ofec_sched_a_bench (contb_receipt_amt, sub_id)',
+            """
+            insert into ofec_sched_a_bench
+                (sub_id, contb_receipt_dt, contb_receipt_amt, two_year_transaction_period)
+            select
+                id,
+                case when id % 20 = 0 then null else date '2015-01-01' + id % 730 end,
+                case when id % 20 = 0 then null else id % 5000 end,
+                2016
+            from generate_series(1, 100000) id
+            """,
+            'analyze ofec_sched_a_bench',
+        ]:
+            db.session.execute(statement)
+
+    def _explain(self, query):
+        compiled = query.statement.compile(dialect=db.engine.dialect)
+        cursor = db.session.connection().connection.cursor()
+        cursor.execute('explain ' + str(compiled), compiled.params)
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def _seek_plans(self, sort, **kwargs):
+        kwargs = utils.extend(
+            {'per_page': 20, 'sort': sort, 'sort_hide_null': False, 'last_index': None},
+            kwargs,
+        )
+        paginator = utils.fetch_seek_paginator(ScheduleA.query, kwargs, ScheduleA.sub_id)
+        sort_index = kwargs.get('last_{0}'.format(paginator.sort_column[0].key))
+        paginator.null_phase = sort_index is None and kwargs.get('sort_null_only', False)
+        return [
+            self._explain(query.order_by(paginator.sort_column[1](ScheduleA.sub_id)).limit(20))
+            for query in paginator._get_phases(kwargs['last_index'], sort_index)
+        ]
+
+    def assert_index_seek(self, plan, column):
+        self.assertIn('ofec_sched_a_bench', plan)
+        self.assertRegex(plan, r'Index (Only )?Scan')
+        self.assertRegex(plan, r'Index Cond: .*{0}'.format(column))
+        self.assertNotIn('Seq Scan on ofec_sched_a_bench', plan)
+
+    def test_seek_plans(self):
+        for sort, column, value in [
+            ('contribution_receipt_date', 'contb_receipt_dt', datetime.date(2016, 1, 1)),
+            ('-contribution_receipt_date', 'contb_receipt_dt', datetime.date(2016, 1, 1)),
+            ('contribution_receipt_amount', 'contb_receipt_amt', 2500),
+            ('-contribution_receipt_amount', 'contb_receipt_amt', 2500),
+        ]:
+            key = 'last_{0}'.format(sort.lstrip('-'))
+            plans = self._seek_plans(sort, last_index=50000, **{key: value})
+            self.assert_index_seek(plans[0], column)
+            for plan in self._seek_plans(sort, last_index=50000, sort_null_only=True):
+                self.assert_index_seek(plan, column)
@@ -367,6 +367,13 @@ class TestEFileReports(ApiBaseTest):
 
         self.assertEqual(results[0]['committee_id'], 'C8675311')
 
+    def test_efile_reports_page(self):
+        # The page schema is only chosen once the committee type is known
+        factories.EfileReportsHouseSenateFactory(committee_id='C8675312')
+        response = self._response(api.url_for(EFilingSummaryView, committee_type='house-senate'))
+        self.assertEqual(response['pagination']['count'], 1)
+        self.assertEqual(response['results'][0]['committee_id'], 'C8675312')
+
     def test_filter_date_efile_reports(self):
         [
             factories.EfileReportsPacPartyFactory(receipt_date=datetime.date(2012, 1, 1)),
@@ -0,0 +1,102 @@
+import time
+import decimal
+import logging
+import datetime
+import unittest
+
+import marshmallow as ma
+
+from webservices import schemas
+from webservices.common import models
+from webservices.common import serializers
+
+
+logger = logging.getLogger(__name__)
+
+
+def make_receipt(index):
+    return models.ScheduleA(
+        sub_id=index,
+        committee_id='C{0:08d}'.format(index % 50),
+        contributor_name='Contributor {0}'.format(index),
+        contribution_receipt_amount=decimal.Decimal('{0}.505'.format(index)),
+        contribution_receipt_date=datetime.date(2016, 1, 1 + index % 28),
+        report_year=2016,
+        memo_code='X' if index % 3 == 0 else None,
+        committee=models.CommitteeHistory(
+            committee_id='C{0:08d}'.format(index % 50),
+            name='Committee',
+            cycle=2016,
+        ),
+        contributor=None,
+    )
+
+
+class TestSerializers(unittest.TestCase):
+
+    def test_matches_marshmallow(self):
+        receipts = [make_receipt(index) for index in range(10)]
+        schema = schemas.ScheduleASchema()
+        serialize = serializers.compile_schema(schema)
+        self.assertEqual(
+            [serialize(each) for each in receipts],
+            [dict(each) for each in schema.dump(receipts, many=True).data],
+        )
+
+    def test_fallback_fields(self):
+        class Schema(ma.Schema):
+            id = ma.fields.Int()
+            label = ma.fields.Method('get_label')
+            missing_default = ma.fields.Str(default='default')
+
+            def get_label(self, obj):
+                return 'label-{0}'.format(obj['id'])
+
+        self.assertEqual(
+            serializers.compile_schema(Schema())({'id': 1}),
+            {'id': 1, 'label': 'label-1', 'missing_default': 'default'},
+        )
+
+    def test_dump_hooks(self):
+        class Schema(ma.Schema):
+            id = ma.fields.Int()
+
+            @ma.post_dump
+            def add_flag(self, data):
+                data['flag'] = True
+                return data
+
+        self.assertEqual(
+            serializers.compile_schema(Schema())({'id': 1}),
+            {'id': 1, 'flag': True},
+        )
+
+    def test_cached(self):
+        self.assertIs(
+            serializers.get_serializer(schemas.ScheduleASchema),
+            serializers.get_serializer(schemas.ScheduleASchema),
+        )
+
+
+class TestSerializerBenchmark(unittest.TestCase):
+    """Benchmark compiled serializers against marshmallow on 10,000 receipts.
+    Timings are logged rather than compared, since wall-clock times vary too
+    much on shared machines to assert on.
+    """
+
+    def _time(self, dump, receipts):
+        start = time.perf_counter()
+        dump(receipts)
+        return time.perf_counter() - start
+
+    def test_benchmark(self):
+        receipts = [make_receipt(index) for index in range(10000)]
+        schema = schemas.ScheduleASchema()
+        serialize = serializers.compile_schema(schema)
+        marshmallow_time = self._time(lambda receipts: schema.dump(receipts, many=True), receipts)
+        compiled_time = self._time(lambda receipts: [serialize(each) for each in receipts], receipts)
+        logger.info(
+            'Serialized {0} receipts: marshmallow {1:.3f}s, compiled {2:.3f}s'.format(
+                len(receipts), marshmallow_time, compiled_time,
+            )
+        )
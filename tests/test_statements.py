@@ -0,0 +1,57 @@
+from tests import factories
+from tests.common import ApiBaseTest
+
+from webservices.common import models
+from webservices.common import statements
+from webservices.resources.sched_b import ScheduleBView
+from webservices.resources.candidates import CandidateList
+
+
+class TestFilterCache(ApiBaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = statements.FilterCache()
+        self.resource = ScheduleBView()
+        self.disbursements = [
+            factories.ScheduleBFactory(committee_id='C001', disbursement_amount=50, recipient_name='Acme'),
+            factories.ScheduleBFactory(committee_id='C002', disbursement_amount=100, recipient_name='Acme'),
+            factories.ScheduleBFactory(committee_id='C003', disbursement_amount=150, recipient_name='Widgets'),
+        ]
+
+    def apply(self, kwargs):
+        return set(self.cache.apply(models.ScheduleB.query, self.resource, kwargs).all())
+
+    def test_matches_filters(self):
+        kwargs = {
+            'committee_id': ['C001', 'C002', 'C003'],
+            'two_year_transaction_period': 2016,
+            'min_amount': 75,
+            'recipient_name': ['acme'],
+        }
+        expected = set(statements.apply_filters(models.ScheduleB.query, self.resource, kwargs).all())
+        self.assertEqual(self.apply(kwargs), expected)
+        self.assertEqual(self.apply(kwargs), {self.disbursements[1]})
+
+    def test_reuses_template(self):
+        self.assertEqual(self.apply({'committee_id': ['C001', 'C003']}), {self.disbursements[0], self.disbursements[2]})
+        self.assertEqual(self.apply({'committee_id': ['C002', 'C004']}), {self.disbursements[1]})
+        self.assertEqual(self.cache.stats.hits, 1)
+        self.assertEqual(self.cache.stats.misses, 1)
+        self.assertGreater(self.cache.stats.build_time, 0)
+
+    def test_shapes(self):
+        self.apply({'committee_id': ['C001']})
+        self.apply({'committee_id': ['C001', 'C002']})
+        self.apply({'min_amount': 75})
+        self.apply({'max_amount': 75})
+        self.assertEqual(self.cache.stats.misses, 4)
+        self.assertEqual(len(self.cache.templates), 4)
+
+    def test_other_tables(self):
+        # Candidate search terms filter on a table joined later, and so are
+        # built on every request
+        resource = CandidateList()
+        query = self.cache.apply(models.Candidate.query, resource, {'q': ['jones']})
+        self.assertIn('fulltxt', str(query.statement))
+        self.assertEqual(self.cache.stats.misses, 0)
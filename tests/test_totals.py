@@ -177,6 +177,47 @@ class TestTotals(ApiBaseTest):
         self.assertEqual(response[0]['cycle'], 2012)
         self.assertEqual(response[1]['cycle'], 2008)
 
+    def test_totals_many(self):
+        factories.CommitteeHistoryFactory(committee_id='C001', committee_type='H', cycle=2012)
+        factories.CommitteeHistoryFactory(committee_id='C002', committee_type='P', cycle=2012)
+        factories.CommitteeHistoryFactory(committee_id='C003', committee_type='H', cycle=2012)
+        factories.TotalsHouseSenateFactory(committee_id='C001', cycle=2008)
+        factories.TotalsHouseSenateFactory(committee_id='C001', cycle=2012)
+        factories.TotalsPresidentialFactory(committee_id='C002', cycle=2012)
+        factories.TotalsHouseSenateFactory(committee_id='C003', cycle=2012)
+        results = self._results('/v1/totals/?committee_id=C003&committee_id=C001&committee_id=C002')
+        self.assertEqual(
+            [(each['committee_id'], each['cycle']) for each in results],
+            [('C003', 2012), ('C001', 2012), ('C001', 2008), ('C002', 2012)],
+        )
+
+    def test_totals_many_committee_type(self):
+        factories.CommitteeHistoryFactory(committee_id='C001', committee_type='H', cycle=2012)
+        factories.CommitteeHistoryFactory(committee_id='C002', committee_type='P', cycle=2012)
+        factories.TotalsHouseSenateFactory(committee_id='C001', cycle=2012)
+        factories.TotalsPresidentialFactory(committee_id='C002', cycle=2012)
+        results = self._results('/v1/totals/house-senate/?committee_id=C001&committee_id=C002')
+        self.assertEqual([each['committee_id'] for each in results], ['C001'])
+
+    def test_totals_conflicting_ids(self):
+        factories.CommitteeHistoryFactory(committee_id='C001', committee_type='H', cycle=2012)
+        factories.TotalsHouseSenateFactory(committee_id='C001', cycle=2012)
+        response = self.app.get('/v1/committee/C001/totals/?committee_id=C002')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(len(self._results('/v1/committee/C001/totals/?committee_id=c001')), 1)
+
+    def test_totals_many_paged(self):
+        for committee_id in ['C001', 'C002']:
+            factories.CommitteeHistoryFactory(committee_id=committee_id, committee_type='H')
+            factories.TotalsHouseSenateFactory(committee_id=committee_id, cycle=2012)
+        response = self._response('/v1/totals/?committee_id=C001&committee_id=C002&per_page=1&page=2')
+        self.assertEqual(response['pagination']['count'], 2)
+        self.assertEqual([each['committee_id'] for each in response['results']], ['C002'])
+
+    def test_totals_many_required(self):
+        response = self.app.get('/v1/totals/')
+        self.assertEqual(response.status_code, 422)
+
     def test_totals_committee_not_found(self):
         resp = self.app.get(api.url_for(TotalsView, committee_id='fake'))
         self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,42 @@
+import unittest
+
+from webservices.common import typeahead
+
+
+ROWS = [
+    ({'id': 'C003'}, 'Bartlet for America', "'america':3A 'bartlet':1A 'c003':4B"),
+    ({'id': 'C001'}, 'Friends of Josiah', "'c001':4B 'friend':1A 'jed':5A 'josiah':3A"),
+    ({'id': 'C002'}, "O'Brien Victory Fund", "'brien':2A 'c002':5B 'fund':4A 'o':1A 'victori':3A"),
+    ({'id': 'C004'}, 'Bartlet Leadership PAC', "'bartlet':1A 'c004':4B 'leadership':2A 'pac':3A"),
+]
+
+
+class TestNameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = typeahead.NameIndex(ROWS, limit=2, prefix_length=2)
+
+    def search(self, *texts, limit=10):
+        return [result['id'] for result in self.index.search(texts, limit=limit)]
+
+    def test_prefix(self):
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.search('bartlet'), ['C003', 'C004'])
+        self.assertEqual(self.search('BART'), ['C003', 'C004'])
+        self.assertEqual(self.search('c00'), ['C003', 'C001', 'C002', 'C004'])
+        self.assertEqual(self.search('zed'), [])
+        self.assertEqual(self.search('!'), [])
+
+    def test_top_prefixes(self):
+        self.assertEqual(self.search('c', limit=2), ['C003', 'C001'])
+        self.assertEqual(self.search('c', limit=3), ['C003', 'C001', 'C002'])
+
+    def test_all_words(self):
+        self.assertEqual(self.search('bartlet pac'), ['C004'])
+        self.assertEqual(self.search('friends jed'), ['C001'])
+        self.assertEqual(self.search("o'brien"), ['C002'])
+        self.assertEqual(self.search('victory fund'), ['C002'])
+
+    def test_any_text(self):
+        self.assertEqual(self.search('josiah', 'leader'), ['C001', 'C004'])
+        self.assertEqual(self.search('bartlet', 'america', limit=1), ['C003'])
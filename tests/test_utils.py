@@ -1,6 +1,12 @@
+import json
+import datetime
+import threading
 import unittest
+from collections import namedtuple
 
-from flask import request
+import mock
+import sqlalchemy as sa
+from flask import request, current_app
 from webargs import flaskparser
 
 from tests import factories
@@ -8,6 +14,8 @@ from tests.common import ApiBaseTest
 
 from webservices import args
 from webservices import rest
+from webservices import utils
+from webservices import exceptions
 from webservices import sorting
 from webservices.resources import candidate_aggregates
 from webservices.resources import elections
@@ -16,6 +24,9 @@ from webservices.rest import db
 from sqlalchemy.dialects import postgresql
 
 from webservices.common import models
+from webservices.common import views
+from webservices.common import util
+from webservices.common import fanout
 
 
 class TestSort(ApiBaseTest):
@@ -136,3 +147,115 @@ class TestArgs(unittest.TestCase):
         with rest.app.test_request_context('?dollars=$24.50'):
             parsed = flaskparser.parser.parse({'dollars': args.Currency()}, request)
             self.assertEqual(parsed, {'dollars': 24.50})
+
+
+class TestMergeSeekPaginator(unittest.TestCase):
+
+    Result = namedtuple('Result', ['sub_id', 'contribution_receipt_date'])
+
+    def _fetch(self, streams, order):
+        paginator = utils.MergeSeekPaginator(
+            streams, 4, models.ScheduleA.sub_id,
+            sort_column=(models.ScheduleA.contribution_receipt_date, order),
+            count=10,
+        )
+        return [result.sub_id for result in paginator._fetch(None, limit=4)]
+
+    def test_merge_ascending(self):
+        streams = [
+            [self.Result(1, datetime.date(2016, 1, 1)), self.Result(3, datetime.date(2016, 1, 3)), self.Result(5, None)],
+            [self.Result(2, datetime.date(2016, 1, 1)), self.Result(4, None)],
+        ]
+        self.assertEqual(self._fetch(streams, sa.asc), [1, 2, 3, 4])
+
+    def test_merge_descending(self):
+        streams = [
+            [self.Result(5, None), self.Result(3, datetime.date(2016, 1, 3)), self.Result(1, datetime.date(2016, 1, 1))],
+            [self.Result(4, None), self.Result(2, datetime.date(2016, 1, 1))],
+        ]
+        self.assertEqual(self._fetch(streams, sa.desc), [5, 4, 3, 2])
+
+
+class TestFanout(unittest.TestCase):
+
+    def test_map_concurrent(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def wait(item):
+            barrier.wait()
+            return item * 2
+
+        with rest.app.app_context(), mock.patch.object(fanout, 'max_workers', 3):
+            self.assertEqual(fanout.map(wait, [1, 2, 3]), [2, 4, 6])
+
+    def test_map_nested(self):
+        # Work fanned out from a pool thread runs serially on that thread
+        def inner(_):
+            return fanout.map(lambda _: threading.get_ident(), [1, 2])
+
+        with rest.app.app_context(), mock.patch.object(fanout, 'max_workers', 2):
+            idents = fanout.map(inner, [1, 2])
+        self.assertTrue(all(len(set(each)) == 1 for each in idents))
+
+    def test_split(self):
+        self.assertEqual(fanout.split([], 3), [])
+        self.assertEqual(fanout.split([1, 2], 3), [[1], [2]])
+        self.assertEqual(fanout.split(range(7), 3), [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_map_serial(self):
+        idents = fanout.map(lambda _: threading.get_ident(), [1, 2])
+        self.assertEqual(idents, [threading.get_ident()] * 2)
+
+
+class TestFanoutSessions(ApiBaseTest):
+
+    def test_map_app_contexts(self):
+        # Each call runs in an application context of its own, with its own
+        # session
+        caller = db.session()
+
+        def query(item):
+            self.assertIs(current_app._get_current_object(), rest.app)
+            return db.session(), db.session.execute('select {0}'.format(item)).scalar()
+
+        with mock.patch.object(fanout, 'max_workers', 3):
+            results = fanout.map(query, [1, 2, 3])
+        self.assertEqual([value for _, value in results], [1, 2, 3])
+        self.assertTrue(all(session is not caller for session, _ in results))
+
+
+class TestStatementTimeout(ApiBaseTest):
+
+    def test_timeout_applied(self):
+        with views.statement_timeout(2500):
+            timeout = db.session.execute('show statement_timeout').scalar()
+        self.assertEqual(timeout, '2500ms')
+
+    def test_timeout_error(self):
+        with self.assertRaises(exceptions.ApiError) as context:
+            with views.statement_timeout(10):
+                db.session.execute('select pg_sleep(1)')
+        self.assertEqual(context.exception.status_code, 503)
+
+    def test_other_errors_raised(self):
+        with self.assertRaises(sa.exc.ProgrammingError):
+            with views.statement_timeout(1000):
+                db.session.execute('select * from not_a_table')
+
+
+class TestStreamJson(unittest.TestCase):
+
+    def test_stream(self):
+        items = [{'id': index} for index in range(5)]
+        with rest.app.app_context():
+            chunks = list(util.stream_json({'pagination': {'count': 5}}, 'results', iter(items), chunk_size=2))
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(
+            json.loads(''.join(chunks)),
+            {'pagination': {'count': 5}, 'results': items},
+        )
+
+    def test_stream_empty(self):
+        with rest.app.app_context():
+            chunks = list(util.stream_json({}, 'results', iter([])))
+        self.assertEqual(json.loads(''.join(chunks)), {'results': []})
@@ -1,3 +1,5 @@
+import decimal
+import datetime
 import functools
 
 import sqlalchemy as sa
@@ -121,6 +123,32 @@ def make_sort_args(default=None, validator=None, default_hide_null=False, defaul
         )
     }
 
+cursor = fields.Str(
+    missing=None,
+    description=(
+        'Opaque cursor from `pagination.last_indexes.cursor` of the previous page; '
+        'replaces `last_index`, `last_<sort>` and `sort_null_only`'
+    ),
+)
+
+sparse_fields = {
+    'fields': fields.List(
+        fields.Str,
+        description=(
+            'Fields to include in each result, repeated or separated by commas; '
+            'omit to include all fields'
+        ),
+    ),
+}
+
+batch = {
+    'requests': fields.List(
+        fields.Str,
+        required=True,
+        description='Paths of `GET` requests to run, starting with "/v1/" and including query strings',
+    ),
+}
+
 def make_seek_args(field=fields.Int, description=None):
     return {
         'per_page': per_page,
@@ -128,8 +156,60 @@ def make_seek_args(field=fields.Int, description=None):
             missing=None,
             description=description or 'Index of last result from previous page',
         ),
+        'cursor': cursor,
     }
 
+column_field_types = {
+    int: fields.Int,
+    bool: fields.Bool,
+    float: fields.Float,
+    decimal.Decimal: fields.Decimal,
+    datetime.date: fields.Date,
+    datetime.datetime: fields.DateTime,
+}
+
+def make_column_field(column, **kwargs):
+    """Build an argument matching the type of a mapped column.
+
+    :param column: Column attribute on a SQLAlchemy model
+    """
+    try:
+        python_type = column.property.columns[0].type.python_type
+    except NotImplementedError:
+        python_type = None
+    field = column_field_types.get(python_type, fields.Str)
+    return field(**kwargs)
+
+def make_seek_pagination_args(index_column):
+    """Build arguments for optional seek pagination on resources that paginate
+    by offset by default.
+
+    :param index_column: Unique column used to break ties between pages
+    """
+    return {
+        'seek': fields.Bool(
+            missing=False,
+            description=(
+                'Paginate by seeking from the last result of the previous page '
+                'instead of by page number. To get the next page, pass the values '
+                'of `pagination.last_indexes` (`last_index`, plus `last_<sort>` '
+                'or `sort_null_only` when sorting).'
+            ),
+        ),
+        'last_index': make_column_field(
+            index_column,
+            missing=None,
+            description='Index of last result from previous page; implies `seek`',
+        ),
+        'cursor': cursor,
+    }
+
+def make_seek_value_args(column):
+    """Build the `last_<sort>` argument for seeking on a sorted column.
+    """
+    key = 'last_{0}'.format(column.key)
+    return {key: make_column_field(column, missing=None)}
+
 names = {
     'q': fields.List(fields.Str, required=True, description='Name (candidate or committee) to search for'),
 }
@@ -182,6 +262,25 @@ candidate_list = {
     'candidate_id': fields.List(IStr, description=docs.CANDIDATE_ID),
 }
 
+# Maximum number of ids to look up in one request to a detail endpoint
+MAX_IDS = 300
+
+candidate_ids = {
+    'candidate_id': fields.List(
+        IStr,
+        validate=validate.Length(max=MAX_IDS),
+        description=docs.CANDIDATE_ID,
+    ),
+}
+
+committee_ids = {
+    'committee_id': fields.List(
+        IStr,
+        validate=validate.Length(max=MAX_IDS),
+        description=docs.COMMITTEE_ID,
+    ),
+}
+
 candidate_history = {
     'election_full': election_full,
 }
@@ -51,22 +51,32 @@ def format_end_date(row, context=None, fmt=True):
     )
 
 def render_ical(rows, schema):
-    calendar = Calendar()
+    """Render rows as an iCalendar file, yielding one event at a time.
+    """
+    # An empty calendar renders as its opening and closing lines
+    head, tail = Calendar().to_ical().splitlines(True)
+    yield head
     for row in rows:
         event = Event()
         for key, value in row.items():
             if value:
                 event.add(key, value)
-        calendar.add_component(event)
-    return calendar.to_ical()
+        yield event.to_ical()
+    yield tail
 
-def render_csv(rows, schema):
+def render_csv(rows, schema, chunk_size=500):
+    """Render rows as CSV, yielding chunks of up to `chunk_size` rows.
+    """
     sio = io.StringIO()
     writer = csv.DictWriter(sio, fieldnames=schema.fields.keys())
     writer.writeheader()
-    for row in rows:
+    for index, row in enumerate(rows, 1):
         writer.writerow(row)
-    return sio.getvalue()
+        if index % chunk_size == 0:
+            yield sio.getvalue()
+            sio.seek(0)
+            sio.truncate()
+    yield sio.getvalue()
 
 class BaseEventSchema(Schema):
     summary = fields.String()
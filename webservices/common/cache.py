@@ -0,0 +1,378 @@
+"""Caches shared by the API layers.
+
+Cached values are namespaced by a data generation counter, which is bumped by
+the nightly refresh. Bumping the generation makes every existing entry
+unreachable at once, across all workers, so that responses are invalidated
+exactly when the underlying data changes.
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+import collections
+
+import redis
+import sqlalchemy as sa
+from flask import current_app
+
+from webservices.common.models import db
+
+
+logger = logging.getLogger(__name__)
+
+# Parsed arguments that never change the content of a response
+IGNORE_KEYS = {'api_key'}
+
+
+class LRUCache(object):
+    """Thread-safe least-recently-used cache with optional expiry.
+
+    :param int maxsize: Maximum number of entries to keep
+    :param float ttl: Optional lifetime of each entry, in seconds; `None`
+        keeps entries until evicted, and 0 expires them at once
+    :param timer: Clock used to expire entries; overridable for testing
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._data = collections.OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                return default
+            if expires is not None and expires <= self.timer():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = self.timer() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            value, _ = self._data.pop(key, (default, None))
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def __len__(self):
+        return len(self._data)
+
+
+def make_key(*parts):
+    """Hash arbitrary `repr`-able parts into a short, stable cache key.
+    """
+    raw = repr(parts).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()
+
+
+class MemoryBackend(object):
+    """Per-worker response cache backed by an `LRUCache`.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.store = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value):
+        self.store.set(key, value)
+
+    def clear(self):
+        self.store.clear()
+
+
+class RedisBackend(object):
+    """Response cache shared by all workers through Redis. Errors talking to
+    Redis are logged and treated as cache misses.
+    """
+
+    def __init__(self, client, ttl=None, prefix='openfec:response:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            return self.client.get(self.prefix + key)
+        except redis.RedisError as error:
+            logger.warn('Failed to read from response cache: {0}'.format(error))
+            return None
+
+    def set(self, key, value):
+        try:
+            self.client.set(self.prefix + key, value, ex=int(self.ttl) if self.ttl else None)
+        except redis.RedisError as error:
+            logger.warn('Failed to write to response cache: {0}'.format(error))
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class Generation(object):
+    """Counter of data refreshes, along with the time of the latest refresh.
+    The current state is read from Redis and remembered locally for `poll`
+    seconds. Without Redis, or while it can't be reached, the state is local
+    to the process, and so isn't shared with the process that bumps it; see
+    `is_shared`.
+
+    :param client: Optional Redis client
+    :param float poll: Seconds to remember the state read from Redis
+    :param bool single_process: Treat the local state as shared, when the
+        API and the refresh run in one process, as in the tests
+    """
+
+    key = 'openfec:generation'
+    timestamp_key = 'openfec:generation:timestamp'
+    # Seconds between warnings that Redis can't be reached, which would
+    # otherwise be logged on every poll
+    warn_interval = 60
+
+    def __init__(self, client=None, poll=1, timer=time.time, single_process=False):
+        self.client = client
+        self.timer = timer
+        self.single_process = single_process
+        self.local = (0, None)
+        self.cached = LRUCache(maxsize=1, ttl=poll)
+        self.warned_at = None
+
+    def get(self):
+        return self._state()[0]
+
+    def timestamp(self):
+        """Get the time of the latest refresh as a Unix timestamp, or `None`
+        if no refresh has been recorded.
+        """
+        return self._state()[1]
+
+    def is_shared(self):
+        """Whether the current state is shared by all processes, so that it
+        changes in every worker when the refresh bumps it.
+        """
+        return self._state()[2]
+
+    def _state(self):
+        state = self.cached.get(self.key)
+        if state is None:
+            state = self._fetch()
+            self.cached.set(self.key, state)
+        return state
+
+    def _fetch(self):
+        if self.client is not None:
+            try:
+                value, timestamp = self.client.mget(self.key, self.timestamp_key)
+                if timestamp is None:
+                    # Nothing has been refreshed since Redis was set up; date
+                    # the current data from now rather than not at all
+                    timestamp = self.timer()
+                    self.client.set(self.timestamp_key, timestamp, nx=True)
+                return (int(value or 0), float(timestamp), True)
+            except redis.RedisError as error:
+                self._warn('Failed to read data generation: {0}'.format(error))
+        return self.local + (self.single_process, )
+
+    def bump(self):
+        timestamp = self.timer()
+        self.local = (self.local[0] + 1, timestamp)
+        self.cached.clear()
+        if self.client is not None:
+            try:
+                pipe = self.client.pipeline()
+                pipe.incr(self.key)
+                pipe.set(self.timestamp_key, timestamp)
+                pipe.execute()
+            except redis.RedisError as error:
+                logger.warn('Failed to bump data generation: {0}'.format(error))
+
+    def _warn(self, message):
+        now = self.timer()
+        if self.warned_at is None or now - self.warned_at >= self.warn_interval:
+            self.warned_at = now
+            logger.warn(message)
+
+
+# Set to `False` to load reloadable values in the caller's thread and session
+reload_in_background = True
+# Seconds after which reloadable values are reloaded while the data generation
+# isn't shared, and so may not change after a refresh
+reload_ttl = float(os.getenv('FEC_RELOAD_TTL', 60 * 60))
+
+
+class Reloadable(object):
+    """Hold a value loaded from the database, such as an in-memory index, and
+    reload it when the data generation changes. Values are loaded on a
+    background thread, one load at a time, and swapped in once loaded, so
+    that requests never wait for a load: until the first load has finished,
+    `get` returns `None`, and during a reload it returns the previous value.
+
+    :param loader: Function that loads the value
+    :param str description: Name of the value, for logging
+    :param float ttl: Seconds after which the value is reloaded while the
+        generation isn't shared; defaults to `reload_ttl`
+    :param timer: Clock used to expire the value; overridable for testing
+    """
+
+    def __init__(self, loader, description='value', ttl=None, timer=time.time):
+        self.loader = loader
+        self.description = description
+        self.ttl = reload_ttl if ttl is None else ttl
+        self.timer = timer
+        self.value = None
+        self.generation = None
+        self.loaded_at = None
+        self.loading = False
+        # Incremented by `clear`, so that loads started before are discarded
+        self.epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Get the current value, or `None` if it hasn't been loaded, and
+        start a reload if it is out of date.
+        """
+        self.reload()
+        return self.value
+
+    def reload(self):
+        """Start loading the value, unless it is current or already loading.
+        """
+        current = generation.get()
+        with self._lock:
+            if self.loading or not self.is_stale(current):
+                return
+            self.loading = True
+            epoch = self.epoch
+        if not reload_in_background:
+            self._reload(current, epoch)
+            return
+        app = current_app._get_current_object()
+        thread = threading.Thread(target=self._run, args=(app, current, epoch))
+        thread.daemon = True
+        thread.start()
+
+    def is_stale(self, current):
+        if self.generation != current:
+            return True
+        return not generation.is_shared() and self.timer() - self.loaded_at > self.ttl
+
+    def _run(self, app, current, epoch):
+        with app.app_context():
+            self._reload(current, epoch)
+
+    def _reload(self, current, epoch):
+        # A failed load isn't retried until the value is next out of date
+        value = self.value
+        try:
+            value = self._load()
+        finally:
+            with self._lock:
+                self.loading = False
+                if epoch == self.epoch:
+                    self.value = value
+                    self.generation = current
+                    self.loaded_at = self.timer()
+
+    def _load(self):
+        try:
+            return self.loader()
+        except sa.exc.SQLAlchemyError as error:
+            logger.warn('Failed to load {0}: {1}'.format(self.description, error))
+            db.session.rollback()
+            return self.value
+
+    def clear(self):
+        with self._lock:
+            self.value = None
+            self.generation = None
+            self.loaded_at = None
+            self.loading = False
+            self.epoch += 1
+
+
+def get_redis_client():
+    from webservices.tasks import redis_url
+    return redis.StrictRedis.from_url(
+        redis_url(),
+        socket_timeout=float(os.getenv('FEC_REDIS_TIMEOUT', 0.5)),
+    )
+
+
+def make_backend(name, client=None):
+    """Build a response cache backend by name: "memory", "redis", or empty to
+    disable response caching.
+    """
+    ttl = float(os.getenv('FEC_RESPONSE_CACHE_TTL', 24 * 60 * 60))
+    if name == 'memory':
+        return MemoryBackend(
+            maxsize=int(os.getenv('FEC_RESPONSE_CACHE_SIZE', 1024)),
+            ttl=ttl,
+        )
+    if name == 'redis':
+        return RedisBackend(client or get_redis_client(), ttl=ttl)
+    if name:
+        raise ValueError('Unknown response cache backend "{0}"'.format(name))
+    return None
+
+
+def make_etag(path, args):
+    """Build an entity tag from the data generation and the canonical request,
+    so that clients can revalidate without the API running any queries.
+
+    :param str path: Request path
+    :param args: Query string arguments, as a `MultiDict`
+    """
+    args = sorted(
+        (key, values) for key, values in args.lists()
+        if key not in IGNORE_KEYS
+    )
+    return make_key('etag', generation.get(), path, args)
+
+
+def response_key(endpoint, args, kwargs, encoding=None):
+    """Build a response cache key from the endpoint name and the parsed
+    arguments of the request, in canonical order.
+
+    :param str encoding: Content encoding of the cached response, if any
+    """
+    kwargs = sorted(
+        (key, value) for key, value in kwargs.items()
+        if key not in IGNORE_KEYS
+    )
+    return make_key('response', generation.get(), endpoint, args, kwargs, encoding)
+
+
+def bump_generation():
+    """Invalidate all cached responses and counts; called after the nightly
+    refresh has updated the data.
+    """
+    generation.bump()
+
+
+# Set `FEC_RESPONSE_CACHE` to "memory" or "redis" to enable response caching.
+# Either way, the data generation is shared through Redis, which the refresh
+# tasks also use as their broker, so that a refresh reaches every worker.
+backend_name = os.getenv('FEC_RESPONSE_CACHE', '')
+redis_client = get_redis_client()
+generation = Generation(redis_client, poll=float(os.getenv('FEC_GENERATION_POLL', 1)))
+response_cache = make_backend(backend_name, client=redis_client)
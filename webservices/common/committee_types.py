@@ -0,0 +1,123 @@
+"""Resolve committee types from memory instead of querying committee history.
+
+The totals endpoints choose a model by committee type, which otherwise takes
+a query on `CommitteeHistory` before every request. `CommitteeTypeMap` holds
+the type of every committee in every cycle in a few flat arrays, sorted by
+committee id, which takes about ten megabytes for all committees. The map is
+loaded in the background when each worker starts serving, and reloaded in
+the background when the data generation changes, after the nightly refresh;
+until it is loaded, or if loading fails, types are queried as before.
+"""
+import os
+import sys
+import array
+import bisect
+
+from webservices.common import cache
+from webservices.common import models
+from webservices.common.models import db
+
+
+class CommitteeTypeMap(object):
+    """Committee types by committee id and cycle.
+
+    :param rows: Tuples of `(committee_id, cycle, committee_type)`, sorted by
+        committee id and then by descending cycle
+    """
+
+    def __init__(self, rows):
+        self.ids = []
+        # Rows of the i-th committee are at `offsets[i]:offsets[i + 1]`
+        self.offsets = array.array('L', [0])
+        self.cycles = array.array('H')
+        # Single-character types, stored as code points, or 0 for null
+        self.types = array.array('B')
+        for committee_id, cycle, committee_type in rows:
+            if not self.ids or committee_id != self.ids[-1]:
+                if self.ids:
+                    self.offsets.append(len(self.cycles))
+                self.ids.append(sys.intern(committee_id))
+            self.cycles.append(cycle)
+            self.types.append(ord(committee_type) if committee_type else 0)
+        self.offsets.append(len(self.cycles))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get(self, committee_id, cycles=None):
+        """Get the type of a committee in its latest cycle, or its latest of
+        `cycles`. Raise `KeyError` if the committee has no such cycle.
+        """
+        index = bisect.bisect_left(self.ids, committee_id)
+        if index == len(self.ids) or self.ids[index] != committee_id:
+            raise KeyError(committee_id)
+        for position in range(self.offsets[index], self.offsets[index + 1]):
+            if not cycles or self.cycles[position] in cycles:
+                code = self.types[position]
+                return chr(code) if code else None
+        raise KeyError(committee_id)
+
+
+def load_map():
+    history = models.CommitteeHistory
+    query = db.session.query(
+        history.committee_id,
+        history.cycle,
+        history.committee_type,
+    )
+    # Sorted here rather than in the query, so that ids are ordered as
+    # `bisect` compares them, whatever the collation of the database
+    rows = sorted(query.yield_per(10000), key=lambda row: (row[0], -row[1]))
+    return CommitteeTypeMap(rows)
+
+
+class CommitteeTypes(cache.Reloadable):
+    """Hold the current `CommitteeTypeMap`, reloading it when the data
+    generation changes.
+    """
+
+    def __init__(self, loader=load_map):
+        super().__init__(loader, description='committee types')
+
+    def get_map(self):
+        """Get the current map, or `None` if it can't be loaded.
+        """
+        return self.get()
+
+
+# Set `FEC_COMMITTEE_TYPE_CACHE` to "0" to query committee types on every
+# request
+enabled = os.getenv('FEC_COMMITTEE_TYPE_CACHE', '1') != '0'
+committee_types = CommitteeTypes()
+
+
+def get_map():
+    return committee_types.get_map() if enabled else None
+
+
+def preload():
+    """Start loading the map, if enabled.
+    """
+    if enabled:
+        committee_types.reload()
+
+
+def get_types(committee_ids, cycles=None):
+    """Get the types of those of `committee_ids` found in memory, and the ids
+    that must be looked up in the database.
+    """
+    type_map = get_map()
+    if type_map is None:
+        return {}, list(committee_ids)
+    cycles = set(cycles or [])
+    found, missing = {}, []
+    for committee_id in committee_ids:
+        try:
+            found[committee_id] = type_map.get(committee_id, cycles)
+        except KeyError:
+            missing.append(committee_id)
+    return found, missing
+
+
+def clear():
+    committee_types.clear()
@@ -0,0 +1,113 @@
+"""Compress responses with gzip or, where available, brotli.
+
+The encoding is negotiated from the `Accept-Encoding` header of the request.
+Responses smaller than `min_size`, or of types that don't compress well, are
+sent as they are. Streamed responses are compressed incrementally with gzip.
+"""
+import os
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+min_size = int(os.getenv('FEC_COMPRESSION_MIN_SIZE', 1024))
+gzip_level = int(os.getenv('FEC_GZIP_LEVEL', 6))
+brotli_quality = int(os.getenv('FEC_BROTLI_QUALITY', 5))
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'text/csv',
+    'text/calendar',
+    'text/html',
+    'text/plain',
+}
+
+
+def get_encodings(streamed=False):
+    """Get the supported encodings, in order of preference.
+    """
+    if brotli is not None and not streamed:
+        return ('br', 'gzip')
+    return ('gzip', )
+
+
+def negotiate(request, streamed=False):
+    """Choose an encoding accepted by the client, or `None` if the response
+    should not be compressed.
+    """
+    for encoding in get_encodings(streamed=streamed):
+        if request.accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding):
+    """Compress `data`, a byte string, with the given encoding.
+    """
+    if encoding == 'br':
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level)
+
+
+def compress_body(data, encoding):
+    """Compress `data` with `encoding` if given and `data` is large enough to
+    benefit, returning the encoding applied, or `None`, with the data.
+    """
+    if encoding is None or len(data) < min_size:
+        return None, data
+    return encoding, compress(data, encoding)
+
+
+def compress_stream(chunks, encoding='gzip'):
+    """Compress an iterable of chunks, yielding compressed data as it becomes
+    available.
+    """
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        # Release the wrapped stream, and its request context, if the client
+        # disconnects early
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def is_compressible(response):
+    return (
+        response.status_code == 200 and
+        response.mimetype in COMPRESSIBLE_TYPES and
+        'Content-Encoding' not in response.headers and
+        not response.direct_passthrough
+    )
+
+
+def compress_response(response, request):
+    """Compress `response` in place, if the client accepts a supported
+    encoding and the response is large enough to benefit.
+    """
+    if not is_compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request, streamed=response.is_streamed)
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        encoding, data = compress_body(response.get_data(), encoding)
+        if encoding is None:
+            return response
+        response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
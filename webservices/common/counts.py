@@ -4,21 +4,221 @@ Count logic borrowed from https://wiki.postgresql.org/wiki/Count_estimate
 ANALYZE borrowed from https://bitbucket.org/zzzeek/sqlalchemy/wiki/UsageRecipes/Explain
 """
 
+import os
 import re
+import logging
+import functools
+import threading
+from concurrent import futures
 
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql.expression import Executable, ClauseElement, _literal_as_text
 
+from webservices.common import cache
+from webservices.common.models import db
+
+
+logger = logging.getLogger(__name__)
 
 count_pattern = re.compile(r'rows=(\d+)')
+whitespace_pattern = re.compile(r'\s+')
+
+# Counts are cached per worker, keyed on a fingerprint of the compiled query,
+# so that paging through a result set only plans and counts it once. Keys
+# include the data generation, which is shared through Redis, so that a
+# refresh invalidates the counts of every worker.
+count_cache = cache.LRUCache(
+    maxsize=int(os.getenv('FEC_COUNT_CACHE_SIZE', 4096)),
+    ttl=float(os.getenv('FEC_COUNT_CACHE_TTL', 60 * 60)),
+)
+
+
+# Set `FEC_DEFERRED_COUNTS` to "1" to answer with the planner estimate while
+# exact counts below the threshold run in the background
+deferred = os.getenv('FEC_DEFERRED_COUNTS', '0') == '1'
+deferred_workers = int(os.getenv('FEC_DEFERRED_COUNT_WORKERS', 2))
+# Timeout for deferred counts, in milliseconds
+deferred_timeout = int(os.getenv('FEC_DEFERRED_COUNT_TIMEOUT', 60 * 1000))
+
+_executor = None
+_lock = threading.Lock()
+
+
+class Estimate(int):
+    """Count taken from the query planner rather than counted exactly.
+    """
+
+
+def is_estimate(count):
+    return isinstance(count, Estimate)
 
 
-def count_estimate(query, session, threshold=None):
+def count_estimate(query, session, threshold=None, defer=None, tally=None, cached=True):
+    """Count the rows of `query`, exactly if the planner estimates fewer than
+    `threshold` rows and by estimate otherwise. Estimates are returned as
+    `Estimate` instances.
+
+    :param bool defer: Return the estimate at once and count exactly in the
+        background, caching the exact count for later requests; defaults to
+        the `deferred` setting
+    :param Tally tally: Optional counts table lookup matching the filters of
+        `query`, which answers exactly without counting
+    :param bool cached: Whether to cache the count for the current data
+        generation; counts of data that changes between refreshes aren't
+        cached, nor deferred
+    """
+    if tally is not None:
+        count = tally.count(session)
+        if count is not None:
+            return count
+    if not cached:
+        return _count_estimate(query, session, threshold=threshold)
+    defer = deferred if defer is None else defer
+    key = fingerprint(query, threshold, cache.generation.get())
+    count = count_cache.get(key)
+    if count is None:
+        count = _count_estimate(query, session, threshold=threshold, defer=defer)
+        count_cache.set(key, count)
+        if defer and threshold is not None and count < threshold:
+            defer_count(query, key)
+    return count
+
+
+def _count_estimate(query, session, threshold=None, defer=False):
     rows = session.execute(explain(query)).fetchall()
     count = extract_analyze_count(rows)
-    if threshold is not None and count < threshold:
+    if threshold is not None and count < threshold and not defer:
         return query.count()
-    return count
+    return Estimate(count)
+
+
+# Set `FEC_COUNT_TABLES` to "0" to ignore the itemized counts tables
+use_tallies = os.getenv('FEC_COUNT_TABLES', '1') != '0'
+
+# Arguments that don't change which rows are counted
+UNCOUNTED_KEYS = {
+    'api_key',
+    'page',
+    'per_page',
+    'seek',
+    'cursor',
+    'fields',
+    'last_index',
+    'sort',
+    'sort_hide_null',
+    'sort_null_only',
+    'sort_reverse_nulls',
+}
+# Arguments that a tally must filter on, and the only ones it may filter on.
+# Counts tables leave out records without a committee, so requests that don't
+# filter on committees can't be tallied.
+TALLY_KEYS = {'committee_id', 'two_year_transaction_period'}
+
+
+def is_filter(key, value):
+    if key in UNCOUNTED_KEYS or key.startswith('last_'):
+        return False
+    return value is not None and value != [] and value != ''
+
+
+class Tally(object):
+    """Exact count of itemized records by committee and two-year period, read
+    from a counts table kept current by the partition refresh.
+
+    :param model: Counts model, such as `models.ScheduleACount`
+    :param list committee_ids: Committees to count
+    :param int period: Two-year transaction period
+    """
+
+    def __init__(self, model, committee_ids, period):
+        self.model = model
+        self.committee_ids = committee_ids
+        self.period = period
+
+    @classmethod
+    def match(cls, model, kwargs):
+        """Get a tally for an itemized request, or `None` unless its arguments
+        filter on exactly committees and the two-year period.
+        """
+        if model is None or not use_tallies:
+            return None
+        keys = {key for key, value in kwargs.items() if is_filter(key, value)}
+        if keys != TALLY_KEYS:
+            return None
+        return cls(model, kwargs['committee_id'], kwargs['two_year_transaction_period'])
+
+    def count(self, session):
+        """Get the count, or `None` if the counts table hasn't been built.
+        """
+        if not has_table(self.model.__table__.name, cache.generation.get()):
+            return None
+        query = session.query(
+            sa.func.coalesce(sa.func.sum(self.model.count), 0)
+        ).filter(
+            self.model.two_year_transaction_period == self.period,
+            self.model.committee_id.in_(self.committee_ids),
+        )
+        return int(query.scalar())
+
+
+@functools.lru_cache(maxsize=64)
+def has_table(name, generation):
+    """Check whether a table exists, once per data generation, so that a
+    counts table built by a refresh is used from the next generation on.
+    """
+    return db.engine.has_table(name)
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = futures.ThreadPoolExecutor(max_workers=deferred_workers)
+    return _executor
+
+
+def defer_count(query, key):
+    """Count `query` exactly in the background, in a session of its own, and
+    replace the estimate cached under `key` with the result.
+    """
+    app = current_app._get_current_object()
+
+    def count():
+        with app.app_context():
+            session = db.session()
+            try:
+                session.set_statement_timeout(deferred_timeout)
+                count_cache.set(key, query.with_session(session).count())
+            except Exception:
+                # Errors would otherwise be held by the discarded future
+                logger.exception('Failed to count query in background')
+
+    get_executor().submit(count)
+
+
+def fingerprint(query, *extra):
+    """Build a cache key from the compiled SQL and bind parameters of `query`.
+    Whitespace is normalized so that formatting differences between otherwise
+    identical statements don't produce distinct keys.
+
+    :param query: SQLAlchemy query or selectable
+    :param extra: Additional values to include in the key
+    """
+    statement = getattr(query, 'statement', query)
+    compiled = statement.compile(dialect=postgresql.dialect())
+    sql = whitespace_pattern.sub(' ', str(compiled)).strip()
+    params = sorted(compiled.params.items())
+    return cache.make_key(sql, params, extra)
+
+
+def clear_cache():
+    """Drop all cached counts of this worker. Counts of earlier data
+    generations are never read again, so this only frees memory.
+    """
+    count_cache.clear()
 
 
 def extract_analyze_count(rows):
@@ -0,0 +1,125 @@
+"""Opaque cursors for seek pagination.
+
+A cursor packs everything needed to fetch the next page of a seek paginated
+query--the sort column and direction, the last index and sort values, and
+whether the previous page ended among null sort values--into a single signed,
+URL-safe token. Clients pass the token back as `cursor` instead of copying
+several `last_*` arguments, which they frequently get wrong.
+"""
+import os
+import json
+import hashlib
+import logging
+
+import itsdangerous
+import sqlalchemy as sa
+from webargs import fields, ValidationError
+
+from webservices.env import env
+from webservices.exceptions import ApiError
+
+
+logger = logging.getLogger(__name__)
+
+SALT = 'openfec.cursor'
+
+value_fields = {
+    'DATE': fields.Date(),
+    'DATETIME': fields.DateTime(),
+    'TIMESTAMP': fields.DateTime(),
+    'NUMERIC': fields.Decimal(),
+}
+
+
+class JSONSerializer(object):
+    """Serialize cursors as compact JSON, stringifying values such as
+    decimals that JSON can't represent.
+    """
+
+    @staticmethod
+    def dumps(value):
+        return json.dumps(value, separators=(',', ':'), default=str)
+
+    @staticmethod
+    def loads(value):
+        return json.loads(value)
+
+
+def get_secret():
+    """Get the key that cursors are signed with. All workers must share it so
+    that a cursor issued by one is accepted by the others, so it is required
+    in production; elsewhere, the key is derived from the database connection
+    string, which every worker of a deployment shares.
+    """
+    secret = env.get_credential('FEC_CURSOR_SECRET')
+    if secret:
+        return secret
+    if os.getenv('PRODUCTION'):
+        raise RuntimeError('FEC_CURSOR_SECRET must be set in production')
+    logger.warn('FEC_CURSOR_SECRET is not set; signing cursors with a key derived from SQLA_CONN')
+    conn = env.get_credential('SQLA_CONN') or ''
+    return hashlib.sha256((SALT + conn).encode('utf-8')).hexdigest()
+
+
+# Read at import, so that a missing secret fails at startup
+secret = get_secret()
+
+
+def get_serializer():
+    return itsdangerous.URLSafeSerializer(secret, salt=SALT, serializer=JSONSerializer)
+
+
+def encode(index_values, sort_column=None):
+    """Build a cursor from the index values of the last result on a page.
+
+    :param dict index_values: Values from `SeekCoalescePaginator._get_index_values`
+    :param tuple sort_column: Sort column and direction, if sorted
+    """
+    payload = {'i': index_values.get('last_index')}
+    if sort_column is not None:
+        column, direction = sort_column
+        payload.update({
+            's': column.key,
+            'd': 'asc' if direction == sa.asc else 'desc',
+            'v': index_values.get('last_{0}'.format(column.key)),
+            'n': bool(index_values.get('sort_null_only')),
+        })
+    return get_serializer().dumps(payload)
+
+
+def decode(cursor, index_column, sort_column=None):
+    """Unpack a cursor into the `last_index`, `last_<sort>` and
+    `sort_null_only` arguments of `fetch_seek_page`. Cursors that have been
+    tampered with, or that were issued for a different sort, are rejected.
+    """
+    try:
+        payload = get_serializer().loads(cursor)
+    except itsdangerous.BadData:
+        raise ApiError('Invalid cursor', status_code=422)
+    sort_key, direction = None, None
+    if sort_column is not None:
+        sort_key = sort_column[0].key
+        direction = 'asc' if sort_column[1] == sa.asc else 'desc'
+    if payload.get('s') != sort_key or payload.get('d') != direction:
+        raise ApiError('Cursor does not match the requested sort', status_code=422)
+    ret = {'last_index': load_value(index_column, payload.get('i'))}
+    if sort_column is not None:
+        ret['last_{0}'.format(sort_key)] = load_value(sort_column[0], payload.get('v'))
+        ret['sort_null_only'] = payload.get('n', False)
+    return ret
+
+
+def load_value(column, value):
+    """Restore the type of a value that was serialized as a string, so that
+    the seek compares against the column using its own type.
+    """
+    if value is None:
+        return None
+    column_type = str(column.property.columns[0].type).upper()
+    field = value_fields.get(column_type.split('(')[0])
+    if field is None:
+        return value
+    try:
+        return field.deserialize(value)
+    except ValidationError:
+        raise ApiError('Invalid cursor', status_code=422)
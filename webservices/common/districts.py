@@ -0,0 +1,51 @@
+"""Look up the congressional districts of zip codes in memory.
+
+The mapping from zip code tabulation areas (ZCTAs) to districts is small and
+only changes with redistricting, so it is read once from the Census files in
+`data/` rather than joined against `ofec_zips_districts` and
+`ofec_fips_states` on every request. See `data/notes.md` for sources.
+"""
+import os
+import csv
+import functools
+import collections
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, 'data')
+ZIPS_PATH = os.path.join(DATA_DIR, 'natl_zccd_delim.csv')
+STATES_PATH = os.path.join(DATA_DIR, 'fips_states.csv')
+
+
+def load_zip_index(zips_path=ZIPS_PATH, states_path=STATES_PATH):
+    """Map each ZCTA, as an integer, to a tuple of `(state, district)` pairs,
+    where `state` is a USPS code and `district` is the district number.
+    Districts in states without a FIPS code are skipped.
+    """
+    with open(states_path) as fp:
+        states = {
+            int(row['FIPS State Numeric Code']): row['Official USPS Code']
+            for row in csv.DictReader(fp)
+        }
+    index = collections.defaultdict(list)
+    with open(zips_path) as fp:
+        for row in csv.DictReader(fp):
+            state = states.get(int(row['State']))
+            if state is not None:
+                index[int(row['ZCTA'])].append((state, int(row['Congressional District'])))
+    return {zcta: tuple(districts) for zcta, districts in index.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def get_zip_index():
+    return load_zip_index()
+
+
+def get_districts(zips):
+    """Get the set of `(state, district)` pairs covering any of `zips`.
+    """
+    index = get_zip_index()
+    return {
+        district
+        for zcta in zips
+        for district in index.get(int(zcta), ())
+    }
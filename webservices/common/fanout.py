@@ -0,0 +1,63 @@
+"""Run independent database work concurrently.
+
+Work is submitted to a thread pool shared by all requests in the process, so
+that the number of concurrent queries, and of pooled connections, stays
+bounded however many requests fan out at once. Each call runs in its own
+application context and so uses its own database session, which may be
+routed to a different follower than the caller's. Work that fans out again
+from a pool thread, such as a batched request for several committees, runs
+serially on that thread, since waiting on the pool from within it deadlocks
+once every thread is waiting.
+"""
+import os
+import threading
+from concurrent import futures
+
+from flask import current_app
+
+
+# Set `FEC_FANOUT_WORKERS` to 1 or less to run fanned-out work serially, in
+# the caller's session
+max_workers = int(os.getenv('FEC_FANOUT_WORKERS', 5))
+
+_executor = None
+_lock = threading.Lock()
+# Marks pool threads while they run fanned-out work
+_local = threading.local()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+    return _executor
+
+
+def map(func, items):
+    """Call `func` on each of `items`, concurrently if workers are configured,
+    and return the results in order. Errors raised by `func` are re-raised in
+    the caller.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1 or getattr(_local, 'pooled', False):
+        return [func(item) for item in items]
+    app = current_app._get_current_object()
+
+    def call(item):
+        _local.pooled = True
+        try:
+            with app.app_context():
+                return func(item)
+        finally:
+            _local.pooled = False
+
+    return list(get_executor().map(call, items))
+
+
+def split(items, parts):
+    """Split `items` into at most `parts` batches of nearly equal size.
+    """
+    items = list(items)
+    size = -(-len(items) // parts) if items else 1
+    return [items[start:start + size] for start in range(0, len(items), size)]
@@ -0,0 +1,144 @@
+"""Coalesce identical concurrent requests, so that only one of them runs.
+
+When many clients ask for the same page at once, such as the latest filings
+around a deadline, each request would otherwise run the same query and count.
+`SingleFlight.do` lets the first caller for a key compute the value, while
+concurrent callers for the same key wait and reuse its result: callers in the
+same process wait on an event, and callers in other workers wait on a lock in
+Redis, reading the result that its holder briefly publishes there.
+
+Results are only shared between callers that overlap; caching them for later
+requests is left to the response cache.
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+
+import redis
+
+from webservices.common import cache
+
+
+logger = logging.getLogger(__name__)
+
+
+class Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Run at most one call per key at a time.
+
+    :param client: Optional Redis client, to coalesce calls across workers
+    :param float timeout: Seconds that a call may hold the Redis lock, after
+        which waiters give up and compute the value themselves
+    :param float result_ttl: Seconds to keep a result in Redis for waiters
+    :param float poll: Seconds between checks for a result in Redis
+    """
+
+    prefix = 'openfec:flight:'
+
+    def __init__(self, client=None, timeout=30, result_ttl=5, poll=0.05, timer=time.monotonic):
+        self.client = client
+        self.timeout = timeout
+        self.result_ttl = result_ttl
+        self.poll = poll
+        self.timer = timer
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Return `func()`, or the result of a concurrent call with the same
+        key. Values must be byte strings if calls are shared through Redis.
+        """
+        with self._lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = self._do_shared(key, func)
+            return call.value
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self.calls[key]
+            call.done.set()
+
+    def _do_shared(self, key, func):
+        if self.client is None:
+            return func()
+        lock_key = self.prefix + 'lock:' + key
+        result_key = self.prefix + 'result:' + key
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.client.set(lock_key, token, nx=True, px=int(self.timeout * 1000))
+        except redis.RedisError as error:
+            logger.warn('Failed to acquire request lock: {0}'.format(error))
+            return func()
+        if not acquired:
+            value = self._wait(lock_key, result_key)
+            return value if value is not None else func()
+        try:
+            value = func()
+            self.client.set(result_key, value, px=int(self.result_ttl * 1000))
+            return value
+        except redis.RedisError as error:
+            logger.warn('Failed to share request result: {0}'.format(error))
+            return value
+        finally:
+            self._release(lock_key, token)
+
+    def _wait(self, lock_key, result_key):
+        """Wait for the holder of `lock_key` to publish its result. Return
+        `None` if it finishes without a result or doesn't finish in time.
+        """
+        deadline = self.timer() + self.timeout
+        try:
+            while self.timer() < deadline:
+                value = self.client.get(result_key)
+                if value is not None:
+                    return value
+                if not self.client.exists(lock_key):
+                    return self.client.get(result_key)
+                time.sleep(self.poll)
+        except redis.RedisError as error:
+            logger.warn('Failed to wait for request result: {0}'.format(error))
+        return None
+
+    def _release(self, lock_key, token):
+        try:
+            if self.client.get(lock_key) == token.encode('utf-8'):
+                self.client.delete(lock_key)
+        except redis.RedisError as error:
+            logger.warn('Failed to release request lock: {0}'.format(error))
+
+
+# Set `FEC_SINGLE_FLIGHT` to "0" to run identical concurrent requests
+# separately. Calls are coalesced across workers when Redis is configured for
+# the response cache.
+enabled = os.getenv('FEC_SINGLE_FLIGHT', '1') != '0'
+flights = SingleFlight(
+    cache.redis_client if cache.backend_name == 'redis' else None,
+    timeout=float(os.getenv('FEC_SINGLE_FLIGHT_TIMEOUT', 30)),
+    result_ttl=float(os.getenv('FEC_SINGLE_FLIGHT_RESULT_TTL', 5)),
+)
+
+
+def coalesce(key, func):
+    if not enabled:
+        return func()
+    return flights.do(key, func)
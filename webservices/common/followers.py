@@ -0,0 +1,163 @@
+"""Health- and lag-aware selection of database followers.
+
+Followers are probed in the background for replication lag and latency.
+Followers that fail a probe or fall too far behind the leader are ejected
+until a later probe finds them healthy again. Reads go to the healthy
+follower with the fewest connections in use, or to the leader if no follower
+is healthy.
+"""
+import os
+import time
+import random
+import logging
+import threading
+
+import sqlalchemy as sa
+
+
+logger = logging.getLogger(__name__)
+
+# A follower that has replayed everything it has received is current, however
+# long ago the last transaction was replayed
+LAG_QUERY = sa.text(
+    """
+    select case
+        when pg_last_xlog_receive_location() = pg_last_xlog_replay_location() then 0
+        else extract(epoch from now() - pg_last_xact_replay_timestamp())
+    end
+    """
+)
+
+
+class Follower(object):
+    """State of a single follower.
+
+    :param engine: SQLAlchemy engine connected to the follower
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.healthy = True
+        self.lag = None
+        self.latency = None
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        sa.event.listen(engine, 'checkout', self._checkout)
+        sa.event.listen(engine, 'checkin', self._checkin)
+
+    def _checkout(self, *args):
+        with self._lock:
+            self.in_flight += 1
+
+    def _checkin(self, *args):
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+
+    def __repr__(self):
+        return '<Follower {0!r} healthy={1} lag={2} latency={3}>'.format(
+            self.engine.url, self.healthy, self.lag, self.latency,
+        )
+
+
+class FollowerPool(object):
+    """Choose followers for reads, ejecting and re-admitting them based on
+    periodic probes.
+
+    :param list engines: Engines connected to followers
+    :param float max_lag: Maximum replication lag, in seconds
+    :param float max_latency: Maximum probe latency, in seconds
+    :param float interval: Seconds between probes
+    """
+
+    def __init__(self, engines, max_lag=300, max_latency=5, interval=10, timer=time.monotonic):
+        self.followers = [Follower(engine) for engine in engines]
+        self.max_lag = max_lag
+        self.max_latency = max_latency
+        self.interval = interval
+        self.timer = timer
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.followers)
+
+    def choose(self):
+        """Choose the healthy follower with the fewest connections in use,
+        breaking ties at random, or `None` if no follower is healthy.
+        """
+        self.start()
+        healthy = [each for each in self.followers if each.healthy]
+        if not healthy:
+            return None
+        return min(healthy, key=lambda each: (each.in_flight, random.random()))
+
+    def probe(self, follower):
+        """Measure the lag and latency of a follower, and update its health.
+        """
+        start = self.timer()
+        try:
+            with follower.engine.connect() as connection:
+                lag = connection.execute(LAG_QUERY).scalar()
+        except sa.exc.SQLAlchemyError as error:
+            if follower.healthy:
+                logger.warn('Ejecting follower {0!r}: {1}'.format(follower.engine.url, error))
+            follower.healthy = False
+            return
+        follower.latency = self.timer() - start
+        # Replay timestamp is null if the follower hasn't replayed anything
+        # since it started, so its lag is unknown
+        follower.lag = float(lag) if lag is not None else None
+        healthy = (
+            (follower.lag is None or follower.lag <= self.max_lag) and
+            follower.latency <= self.max_latency
+        )
+        if healthy != follower.healthy:
+            logger.warn('{0} follower {1!r}'.format(
+                'Re-admitting' if healthy else 'Ejecting',
+                follower,
+            ))
+        follower.healthy = healthy
+
+    def probe_all(self):
+        for follower in self.followers:
+            self.probe(follower)
+
+    def start(self):
+        """Start probing in the background, if not already started. Probing
+        starts on first use rather than on creation, so that each forked
+        worker runs its own probe thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='follower-probe')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.probe_all()
+            except Exception:
+                logger.exception('Failed to probe followers')
+            time.sleep(self.interval)
+
+
+def make_engine(url):
+    """Create an engine connected to a follower. Connections time out, so that
+    an unreachable follower fails its probe rather than hanging it.
+    """
+    return sa.create_engine(
+        url,
+        connect_args={'connect_timeout': int(os.getenv('FEC_FOLLOWER_CONNECT_TIMEOUT', 5))},
+    )
+
+
+def make_pool(engines):
+    return FollowerPool(
+        engines,
+        max_lag=float(os.getenv('FEC_FOLLOWER_MAX_LAG', 300)),
+        max_latency=float(os.getenv('FEC_FOLLOWER_MAX_LATENCY', 5)),
+        interval=float(os.getenv('FEC_FOLLOWER_PROBE_INTERVAL', 10)),
+    )
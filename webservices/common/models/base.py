@@ -1,6 +1,5 @@
-import random
-
 import celery
+import sqlalchemy as sa
 from flask_sqlalchemy import SQLAlchemy
 from flask_sqlalchemy import SignallingSession
 
@@ -11,10 +10,19 @@ class RoutingSession(SignallingSession):
     Based on http://techspot.zzzeek.org/2012/01/11/django-style-database-routers-in-sqlalchemy/
     """
 
+    # Limit on the run time of each statement, in milliseconds
+    statement_timeout = None
+    # Follower chosen for this session; `False` if no follower was available
+    pinned = None
+
     @property
     def followers(self):
         return self.app.config['SQLALCHEMY_FOLLOWERS']
 
+    @property
+    def follower_pool(self):
+        return self.app.config['SQLALCHEMY_FOLLOWER_POOL']
+
     @property
     def follower_tasks(self):
         return self.app.config['SQLALCHEMY_FOLLOWER_TASKS']
@@ -39,10 +47,64 @@ class RoutingSession(SignallingSession):
 
     def get_bind(self, mapper=None, clause=None):
         if self.use_follower:
-            return random.choice(self.followers)
+            # Pin the session to one follower, so that all reads in a request,
+            # such as a count and the page it describes, see the same data
+            if self.pinned is None:
+                follower = self.follower_pool.choose()
+                self.pinned = follower.engine if follower is not None else False
+            if self.pinned is not False:
+                return self.pinned
 
         return super().get_bind(mapper=mapper, clause=clause)
 
+    def close(self):
+        super().close()
+        self.pinned = None
+
+    def set_statement_timeout(self, timeout):
+        """Limit the run time of statements in the current and later
+        transactions of this session, on the leader and followers alike.
+
+        :param int timeout: Timeout in milliseconds
+        """
+        self.statement_timeout = timeout
+        if timeout is None:
+            return
+        for connection in self.get_connections():
+            apply_statement_timeout(connection, timeout)
+
+    def reset_statement_timeout(self):
+        """Drop the timeout set by `set_statement_timeout`, restoring the
+        database default in the current and later transactions.
+        """
+        if self.statement_timeout is None:
+            return
+        self.statement_timeout = None
+        for connection in self.get_connections():
+            connection.execute('set local statement_timeout to default')
+
+    def get_connections(self):
+        """Get the connections used by the current transaction, if any.
+        """
+        if self.transaction is None:
+            return set()
+        return {each[0] for each in self.transaction._connections.values()}
+
+
+def apply_statement_timeout(connection, timeout):
+    # Like `SET LOCAL`, but accepts a bound parameter; the setting is dropped
+    # when the transaction ends
+    connection.execute(
+        sa.text("select set_config('statement_timeout', :timeout, true)"),
+        timeout=str(int(timeout)),
+    )
+
+
+@sa.event.listens_for(RoutingSession, 'after_begin')
+def begin_statement_timeout(session, transaction, connection):
+    if session.statement_timeout is not None:
+        apply_statement_timeout(connection, session.statement_timeout)
+
 
 class RoutingSQLAlchemy(SQLAlchemy):
 
@@ -184,6 +184,25 @@ class ScheduleB(BaseItemized):
     pdf_url = db.Column(db.String)
 
 
+class BaseItemizedCount(db.Model):
+    """Number of itemized records by committee and two-year period, maintained
+    by the partition refresh; see `webservices.partition.base`.
+    """
+    __abstract__ = True
+
+    committee_id = db.Column('cmte_id', db.String, primary_key=True)
+    two_year_transaction_period = db.Column(db.SmallInteger, primary_key=True)
+    count = db.Column(db.BigInteger)
+
+
+class ScheduleACount(BaseItemizedCount):
+    __tablename__ = 'ofec_sched_a_counts'
+
+
+class ScheduleBCount(BaseItemizedCount):
+    __tablename__ = 'ofec_sched_b_counts'
+
+
 class ScheduleC(PdfMixin,BaseItemized):
     __tablename__ = 'fec_vsum_sched_c_vw'
     sub_id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,149 @@
+"""Serve list endpoints from plain rows instead of ORM objects.
+
+Loading a page of ORM objects, with their eagerly loaded relationships, and
+dumping them through a `ModelSchema` costs far more CPU than the query
+itself. A `RowPlan` selects exactly the columns that a schema needs, joining
+nested relationships, so that rows come back as lightweight tuples; it then
+dumps each row with a serializer compiled once per schema.
+
+Plans are only built for schemas whose fields all map to columns, boolean
+hybrid properties, or nested schemas of related columns. Other schemas, such
+as those with method fields or post-dump hooks, are served by the ORM.
+"""
+import functools
+
+import sqlalchemy as sa
+import marshmallow as ma
+from sqlalchemy.ext import hybrid
+from flask_apispec.utils import resolve_instance
+
+from webservices.common import serializers
+
+
+class Unsupported(Exception):
+    pass
+
+
+class RowPlan(object):
+    """Columns to select for a schema, and a dumper for the resulting rows.
+
+    :param list columns: Labeled column expressions
+    :param list joins: Relationships to outer join, as aliased `of_type`
+        attributes
+    :param dump: Function that dumps a row to a dict
+    """
+
+    def __init__(self, columns, joins, dump):
+        self.columns = columns
+        self.joins = joins
+        self.dump = dump
+
+    def select(self, query, *extra):
+        """Replace the entities of `query`, a query on the plan's model, with
+        the plan's columns. Extra columns, such as the seek index and sort
+        columns, are selected under their own keys if not already present.
+        """
+        labels = {column.key for column in self.columns}
+        columns = self.columns + [
+            column.label(column.key)
+            for column in extra
+            if column is not None and column.key not in labels
+        ]
+        query = query.with_entities(*columns)
+        for join in self.joins:
+            query = query.outerjoin(join)
+        return query
+
+
+def can_select(query, model):
+    """Check that `query` loads only `model`, without loader options that
+    would be lost by selecting columns.
+    """
+    entities = query._entities
+    return (
+        len(entities) == 1 and
+        getattr(entities[0], 'mapper', None) is not None and
+        entities[0].mapper.class_ is model and
+        not query._with_options
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def get_plan(model, schema, only=None):
+    """Get the plan for dumping `model` with `schema`, or `None` if the schema
+    can't be served from rows. Plans are built once and cached.
+
+    :param schema: Schema class or instance
+    :param tuple only: Optional names of the only fields to dump
+    """
+    schema = resolve_instance(schema) if only is None else schema(only=only)
+    try:
+        return make_plan(model, schema)
+    except Unsupported:
+        return None
+
+
+def make_plan(model, schema):
+    columns, joins = [], []
+    entries = get_entries(model, model, schema, columns, joins, prefix='')
+    return RowPlan(columns, joins, serializers.compile_rows(entries))
+
+
+def get_entries(model, entity, schema, columns, joins, prefix):
+    """Add the columns that `schema` needs to `columns`, and return entries
+    for `serializers.compile_rows` referring to their positions in the row.
+
+    :param model: Mapped class
+    :param entity: `model` or an alias of it
+    """
+    if not serializers.is_compilable(schema):
+        raise Unsupported()
+    mapper = sa.inspect(model)
+    descriptors = mapper.all_orm_descriptors
+    entries = []
+    for name, field in schema.fields.items():
+        if getattr(field, 'load_only', False):
+            continue
+        attr = field.attribute or name
+        if '.' in attr or not field._CHECK_ATTRIBUTE:
+            raise Unsupported()
+        if isinstance(field, ma.fields.Nested):
+            entries.append(get_nested_entry(mapper, entity, attr, name, field, columns, joins, prefix))
+            continue
+        if attr in mapper.column_attrs:
+            expression = getattr(entity, attr)
+        elif is_boolean_hybrid(descriptors.get(attr), entity, attr):
+            # Match the instance-level comparison, which is false rather than
+            # null when a compared value is null
+            expression = sa.func.coalesce(getattr(entity, attr), False)
+        else:
+            raise Unsupported()
+        columns.append(expression.label(prefix + attr))
+        entries.append((name, field, len(columns) - 1))
+    return entries
+
+
+def get_nested_entry(mapper, entity, attr, name, field, columns, joins, prefix):
+    relationship = mapper.relationships.get(attr)
+    if relationship is None or relationship.uselist or field.many or prefix or isinstance(field.only, str):
+        raise Unsupported()
+    related = relationship.mapper.class_
+    alias = sa.orm.aliased(related)
+    joins.append(getattr(entity, attr).of_type(alias))
+    nested_prefix = '{0}__'.format(attr)
+    # Select the primary key to tell a missing related row from one with null
+    # values
+    start = len(columns)
+    for column in relationship.mapper.primary_key:
+        prop = relationship.mapper.get_property_by_column(column)
+        columns.append(getattr(alias, prop.key).label(nested_prefix + '_pk_' + prop.key))
+    positions = tuple(range(start, len(columns)))
+    entries = get_entries(related, alias, field.schema, columns, joins, nested_prefix)
+    return (name, field, positions, entries)
+
+
+def is_boolean_hybrid(descriptor, entity, attr):
+    if getattr(descriptor, 'extension_type', None) is not hybrid.HYBRID_PROPERTY:
+        return False
+    expression = getattr(entity, attr)
+    return isinstance(getattr(expression, 'type', None), sa.Boolean)
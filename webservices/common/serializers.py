@@ -0,0 +1,279 @@
+"""Compile schemas into plain Python serializers.
+
+Dumping through marshmallow walks every field of every result generically:
+each value is looked up through the schema, checked for missing values and
+errors, and collected into a list of items before the output dict is built.
+`get_serializer` instead generates the source of a function that dumps a
+single object to a dict, with one statement per field, and calls a field's
+`_serialize` only when its value needs formatting. Nested schemas are
+compiled into functions of their own.
+
+Fields that the compiler doesn't specialize, such as method fields, are still
+serialized by marshmallow, as are whole schemas with dump hooks or inferred
+fields. Schemas remain the source of the API spec.
+"""
+import functools
+
+import marshmallow as ma
+from marshmallow import missing
+from marshmallow.decorators import PRE_DUMP, POST_DUMP
+
+from webservices.common import util
+
+
+# Fields whose `_serialize` returns `None` for `None` and has no side effects
+SIMPLE_FIELDS = (
+    ma.fields.Field,
+    ma.fields.Raw,
+    ma.fields.String,
+    ma.fields.Number,
+    ma.fields.Integer,
+    ma.fields.Float,
+    ma.fields.Decimal,
+    ma.fields.Boolean,
+    ma.fields.Date,
+    ma.fields.DateTime,
+    ma.fields.LocalDateTime,
+)
+
+DUMP_HOOKS = (PRE_DUMP, POST_DUMP)
+
+
+def get_identity_type(field):
+    """Get the type of values that `field` serializes unchanged, if any.
+    """
+    field_type = type(field)
+    if field_type in (ma.fields.Field, ma.fields.Raw):
+        return object
+    if field_type is ma.fields.String:
+        return str
+    if field_type is ma.fields.Boolean:
+        return bool
+    if field_type is ma.fields.Integer and not getattr(field, 'as_string', False):
+        return int
+    if field_type is ma.fields.Float and not getattr(field, 'as_string', False):
+        return float
+    return None
+
+
+def getattr_accessor(func):
+    """Mark a schema's `get_attribute` as equivalent to `getattr` for
+    attributes without dots, so that compiled serializers can inline it.
+    """
+    func.is_getattr = True
+    return func
+
+
+def is_compilable(schema):
+    """Check that dumping `schema` depends only on its declared fields.
+    """
+    processors = getattr(schema, '__processors__', {})
+    if any(processors.get((tag, many)) for tag in DUMP_HOOKS for many in (True, False)):
+        return False
+    if getattr(schema, 'prefix', None):
+        return False
+    # Fields listed in options but not declared are inferred from the data
+    listed = set(schema.opts.fields) | set(schema.opts.additional)
+    return listed <= set(schema.declared_fields)
+
+
+class Compiler(object):
+    """Generate serializer functions, sharing a namespace for the fields,
+    schemas and nested serializers that they refer to.
+    """
+
+    def __init__(self):
+        self.namespace = {'missing': missing}
+        self.compiled = {}
+        self.count = 0
+
+    def bind(self, value, prefix):
+        """Add `value` to the namespace and return its name.
+        """
+        name = '{0}_{1}'.format(prefix, self.count)
+        self.count += 1
+        self.namespace[name] = value
+        return name
+
+    def define(self, name, lines):
+        source = '\n'.join(lines) + '\n'
+        exec(compile(source, '<serializer {0}>'.format(name), 'exec'), self.namespace)
+        return self.namespace[name]
+
+    def compile_schema(self, schema):
+        """Compile a serializer for objects dumped by `schema`, and return
+        its name.
+        """
+        if id(schema) in self.compiled:
+            return self.compiled[id(schema)]
+        if not is_compilable(schema):
+            name = self.bind(schema, 'schema')
+            self.compiled[id(schema)] = '{0}_dump'.format(name)
+            self.define(self.compiled[id(schema)], [
+                'def {0}_dump(obj):'.format(name),
+                '    return {0}.dump(obj).data'.format(name),
+            ])
+            return self.compiled[id(schema)]
+        name = self.bind(None, 'dump')
+        # Register the name before compiling fields, in case of recursion
+        self.compiled[id(schema)] = name
+        get_attribute = self.bind(schema.get_attribute, 'get_attribute')
+        lines = ['def {0}(obj):'.format(name), '    ret = {}']
+        for field_name, field in schema.fields.items():
+            if getattr(field, 'load_only', False):
+                continue
+            lines.extend(self.field_lines(field_name, field, get_attribute))
+        lines.append('    return ret')
+        self.define(name, lines)
+        return name
+
+    def field_lines(self, name, field, get_attribute):
+        key = getattr(field, 'dump_to', None) or name
+        field_ref = self.bind(field, 'field')
+        generic = [
+            'value = {0}.serialize({1!r}, obj, {2})'.format(field_ref, name, get_attribute),
+            'if value is not missing:',
+            '    ret[{0!r}] = value'.format(key),
+        ]
+        expression = self.expression(name, field, field_ref, 'obj')
+        if expression is None or not field._CHECK_ATTRIBUTE:
+            return indent(generic, 1)
+        attr = field.attribute or name
+        if '.' not in attr and getattr(self.namespace[get_attribute], 'is_getattr', False):
+            lookup = 'getattr(obj, {0!r}, missing)'.format(attr)
+        else:
+            lookup = '{0}({1!r}, obj, missing)'.format(get_attribute, attr)
+        lines = [
+            'value = {0}'.format(lookup),
+            # Let the field handle defaults for missing values
+            'if value is missing:',
+        ]
+        lines.extend(indent(generic, 1))
+        lines.extend([
+            'else:',
+            '    ret[{0!r}] = {1}'.format(key, expression),
+        ])
+        return indent(lines, 1)
+
+    def expression(self, name, field, field_ref, obj):
+        """Build an expression that serializes `value`, which is not missing,
+        or `None` if `field` isn't specialized.
+        """
+        if isinstance(field, ma.fields.Nested):
+            if isinstance(field.only, str):
+                return None
+            nested = self.compile_schema(field.schema)
+            if field.many:
+                return 'None if value is None else [{0}(each) for each in value]'.format(nested)
+            return 'None if value is None else {0}(value)'.format(nested)
+        if type(field) not in SIMPLE_FIELDS:
+            return None
+        identity = get_identity_type(field)
+        if identity is object:
+            return 'value'
+        serialize = '{0}._serialize(value, {1!r}, {2})'.format(field_ref, name, obj)
+        if identity is not None:
+            return 'value if value is None or value.__class__ is {0} else {1}'.format(
+                self.bind(identity, 'type'),
+                serialize,
+            )
+        return 'None if value is None else {0}'.format(serialize)
+
+    def compile_rows(self, entries):
+        """Compile a serializer for rows, given entries of the form `(name,
+        field, position)` for values and `(name, field, positions, entries)`
+        for nested objects, which are dumped as `None` if the values at all of
+        `positions` are null. Return its name.
+        """
+        name = self.bind(None, 'dump_row')
+        lines = ['def {0}(row):'.format(name), '    ret = {}']
+        for entry in entries:
+            field_name, field = entry[:2]
+            key = getattr(field, 'dump_to', None) or field_name
+            if len(entry) == 4:
+                _, _, positions, nested_entries = entry
+                nested = self.compile_rows(nested_entries)
+                present = ' or '.join('row[{0}] is not None'.format(each) for each in positions)
+                lines.append('    ret[{0!r}] = {1}(row) if {2} else None'.format(key, nested, present))
+                continue
+            field_ref = self.bind(field, 'field')
+            expression = (
+                self.expression(field_name, field, field_ref, 'row') or
+                '{0}._serialize(value, {1!r}, row)'.format(field_ref, field_name)
+            )
+            lines.append('    value = row[{0}]'.format(entry[2]))
+            lines.append('    ret[{0!r}] = {1}'.format(key, expression))
+        lines.append('    return ret')
+        self.define(name, lines)
+        return name
+
+
+def indent(lines, depth):
+    return ['    ' * depth + line for line in lines]
+
+
+def compile_schema(schema):
+    """Compile a serializer for a schema instance. Values that fail
+    validation are left to marshmallow, which reports them as errors rather
+    than raising.
+    """
+    compiler = Compiler()
+    dump = compiler.namespace[compiler.compile_schema(schema)]
+
+    def serialize(obj):
+        try:
+            return dump(obj)
+        except ma.ValidationError:
+            return schema.dump(obj).data
+
+    return serialize
+
+
+def compile_rows(entries):
+    compiler = Compiler()
+    return compiler.namespace[compiler.compile_rows(entries)]
+
+
+@functools.lru_cache(maxsize=256)
+def get_serializer(schema_class, only=None):
+    """Get the compiled serializer for a schema class, compiling it on first
+    use.
+
+    :param tuple only: Optional names of the only fields to dump
+    """
+    return compile_schema(schema_class(only=only))
+
+
+@functools.lru_cache(maxsize=None)
+def get_field_names(schema_class):
+    return frozenset(schema_class().fields)
+
+
+def dump_page(page_schema, page, serialize=None, only=None):
+    """Dump a page, serializing its results with `serialize` or with the
+    compiled serializer of the page's results schema. The rest of the page
+    is dumped by `page_schema`.
+
+    :param page_schema: Page schema class or instance
+    :param tuple only: Optional names of the only result fields to dump
+    """
+    data, serialize = dump_envelope(page_schema, page, serialize, only)
+    data['results'] = [serialize(each) for each in page.results]
+    return data
+
+
+def stream_page(page_schema, page, serialize=None):
+    """Like `dump_page`, but encode the page as a stream of JSON chunks,
+    serializing results as they are read. Used with pages from
+    `utils.fetch_page(..., stream=True)`.
+    """
+    data, serialize = dump_envelope(page_schema, page, serialize)
+    return util.stream_json(data, 'results', (serialize(each) for each in page.results))
+
+
+def dump_envelope(page_schema, page, serialize=None, only=None):
+    if not isinstance(page_schema, type):
+        page_schema = type(page_schema)
+    if serialize is None:
+        serialize = get_serializer(page_schema.Meta.results_schema_class, only)
+    return page_schema(exclude=('results', )).dump(page).data, serialize
@@ -0,0 +1,208 @@
+"""Reuse the compiled filters of list endpoints between requests.
+
+`ApiResource.build_query` applies match, multi, range and full text filters
+on every request, and SQLAlchemy compiles the resulting clauses again with
+the rest of the query. Which clauses are built only depends on which filters
+are present and how many values each has, so `FilterCache` builds them once
+for each such shape, with named bind parameters, and compiles them to a SQL
+fragment that later requests with the same shape bind their own values to.
+
+Fragments don't add tables to the query, so filters on columns of other
+tables, which rely on joins added later, are built as before. Only building
+the filter clauses is skipped: SQLAlchemy still compiles the full statement,
+fragment included, on every request. `FilterCache.stats` counts the time
+spent building fragments on misses, and the build time of the fragments
+reused on hits, which is what reuse skips, not a measure of compilation.
+"""
+import os
+import time
+import logging
+import threading
+
+import sqlalchemy as sa
+from sqlalchemy.sql import util as sql_util
+from sqlalchemy.dialects import postgresql
+
+from webservices import filters
+from webservices import utils
+from webservices.common import cache
+
+
+logger = logging.getLogger(__name__)
+
+# Fragments are compiled with named parameters, as parsed by `sa.text`
+dialect = postgresql.dialect(paramstyle='named')
+
+
+class Template(object):
+    """Filters compiled for one shape of request.
+
+    :param str sql: Compiled SQL of the filters
+    :param list binds: Tuples of `(name, key, position, type)`, where
+        `position` is the index of the value in a list argument, or `None`
+    :param set fulltext_keys: Keys whose values are parsed as search terms
+    :param float build_time: Seconds taken to build and compile the filters
+    """
+
+    def __init__(self, sql, binds, fulltext_keys, build_time):
+        self.clause = sa.text(sql)
+        self.binds = binds
+        self.fulltext_keys = fulltext_keys
+        self.build_time = build_time
+
+    def apply(self, query, kwargs):
+        params = [
+            sa.bindparam(name, self.get_value(kwargs, key, position), type_=type_)
+            for name, key, position, type_ in self.binds
+        ]
+        return query.filter(self.clause.bindparams(*params))
+
+    def get_value(self, kwargs, key, position):
+        value = kwargs[key] if position is None else kwargs[key][position]
+        return utils.parse_fulltext(value) if key in self.fulltext_keys else value
+
+
+class Stats(object):
+    """Counts of templates built and reused. `build_time` is the time spent
+    building fragments, and `reused_build_time` the build time of fragments
+    reused instead, in seconds.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.build_time = 0.0
+        self.reused_build_time = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, template, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.reused_build_time += template.build_time
+            else:
+                self.misses += 1
+                self.build_time += template.build_time
+
+    def as_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'build_time': self.build_time,
+            'reused_build_time': self.reused_build_time,
+        }
+
+
+class FilterCache(object):
+    """Compiled filters by resource, model and shape of request.
+
+    :param int maxsize: Maximum number of shapes to keep
+    :param timer: Clock used to time building fragments; overridable for
+        testing
+    """
+
+    def __init__(self, maxsize=1024, timer=time.perf_counter):
+        self.templates = cache.LRUCache(maxsize=maxsize)
+        self.timer = timer
+        self.stats = Stats()
+
+    def apply(self, query, resource, kwargs):
+        """Apply the filters of `resource` to `query`, from a cached template
+        if possible.
+        """
+        slots = get_slots(resource, kwargs)
+        key = (type(resource), resource.model, get_shape(slots))
+        template = self.templates.get(key)
+        hit = template is not None
+        if not hit:
+            template = self.build(resource, slots)
+            self.templates.set(key, template)
+        if not template:
+            return apply_filters(query, resource, kwargs)
+        self.stats.record(template, hit)
+        return template.apply(query, kwargs)
+
+    def build(self, resource, slots):
+        """Build and compile the filters for a shape of request, or return
+        `False` if they reference tables other than that of the model.
+        """
+        start = self.timer()
+        placeholders = {}
+        for key, position, name in slots:
+            placeholder = sa.bindparam(name)
+            if position is None:
+                placeholders[key] = placeholder
+            else:
+                placeholders.setdefault(key, []).append(placeholder)
+        criterion = apply_filters(resource.model.query, resource, placeholders).whereclause
+        if criterion is None:
+            return False
+        tables = sql_util.find_tables(criterion, check_columns=True, include_aliases=True)
+        if any(table is not resource.model.__table__ for table in tables):
+            return False
+        compiled = criterion.compile(dialect=dialect)
+        binds = [
+            (name, key, position, compiled.binds[name].type)
+            for key, position, name in slots
+        ]
+        fulltext_keys = {key for key, _ in resource.filter_fulltext_fields}
+        template = Template(str(compiled), binds, fulltext_keys, self.timer() - start)
+        logger.debug('Built filters for {0} in {1:.2f} ms'.format(
+            type(resource).__name__,
+            template.build_time * 1000,
+        ))
+        return template
+
+
+def apply_filters(query, resource, kwargs):
+    query = filters.filter_match(query, kwargs, resource.filter_match_fields)
+    query = filters.filter_multi(query, kwargs, resource.filter_multi_fields)
+    query = filters.filter_range(query, kwargs, resource.filter_range_fields)
+    query = filters.filter_fulltext(query, kwargs, resource.filter_fulltext_fields)
+    return query
+
+
+def get_slots(resource, kwargs):
+    """Get a `(key, position, name)` tuple for each value of `kwargs` that
+    the filters of `resource` bind, in a fixed order. `position` is the index
+    of the value in a list argument, or `None`.
+    """
+    keys = []
+    for key, _ in resource.filter_match_fields:
+        if kwargs.get(key) is not None:
+            keys.append((key, False))
+    for key, _ in resource.filter_multi_fields:
+        if kwargs.get(key):
+            keys.append((key, True))
+    for (min_key, max_key), _ in resource.filter_range_fields:
+        for key in (min_key, max_key):
+            if kwargs.get(key) is not None:
+                keys.append((key, False))
+    for key, _ in resource.filter_fulltext_fields:
+        if kwargs.get(key):
+            keys.append((key, True))
+    slots = []
+    for key, is_list in keys:
+        positions = range(len(kwargs[key])) if is_list else [None]
+        for position in positions:
+            slots.append((key, position, '{0}__{1}'.format(key, len(slots))))
+    return slots
+
+
+def get_shape(slots):
+    return tuple((key, position) for key, position, _ in slots)
+
+
+# Set `FEC_FILTER_CACHE` to "0" to build and compile filters on every request
+enabled = os.getenv('FEC_FILTER_CACHE', '1') != '0'
+filter_cache = FilterCache(maxsize=int(os.getenv('FEC_FILTER_CACHE_SIZE', 1024)))
+
+
+def apply(query, resource, kwargs):
+    if not enabled:
+        return apply_filters(query, resource, kwargs)
+    return filter_cache.apply(query, resource, kwargs)
+
+
+def clear():
+    filter_cache.templates.clear()
@@ -0,0 +1,199 @@
+"""Serve candidate and committee name typeahead from memory.
+
+The `/names/` endpoints match prefixes of the words typed so far against the
+full text vectors of `CandidateSearch` and `CommitteeSearch`, which include
+nicknames and pacronyms, and return the top matches by receipts. Since the
+same short prefixes are searched on every keystroke, `NameIndex` holds all
+names in memory instead: the rows ranked by receipts, a sorted array of the
+words of their names and vectors with the ranks of the rows containing each
+word, and the top ranks for each short prefix, which would otherwise match
+too many words to merge per request.
+
+Indexes are loaded in the background when each worker starts serving, and
+reloaded in the background when the data generation changes, after the
+nightly refresh; until an index is loaded, or if loading fails, names are
+searched in Postgres as before.
+"""
+import os
+import re
+import array
+import bisect
+import heapq
+import functools
+import collections
+
+import sqlalchemy as sa
+
+from webservices.common import cache
+from webservices.common import models
+from webservices.common.models import db
+
+
+# Quoted lexemes of a tsvector cast to text, such as `'bartlet':1A`
+lexeme_pattern = re.compile(r"'((?:[^']|'')+)'")
+
+
+def tokenize(text):
+    """Split text into lowercase words, as `utils.parse_fulltext` splits
+    search terms.
+    """
+    return re.sub(r'\W', ' ', text).lower().split()
+
+
+def get_words(name, fulltxt):
+    words = set(tokenize(name or ''))
+    words.update(
+        lexeme.replace("''", "'")
+        for lexeme in lexeme_pattern.findall(fulltxt or '')
+    )
+    return words
+
+
+class NameIndex(object):
+    """Prefix index over names and their full text vectors.
+
+    :param rows: Tuples of `(result, name, fulltxt)`, ordered by descending
+        receipts, where `result` is the dict to return for the row and
+        `fulltxt` is its tsvector cast to text
+    :param int limit: Number of top ranks to keep for each short prefix
+    :param int prefix_length: Length of the longest prefix to keep top
+        ranks for
+    """
+
+    def __init__(self, rows, limit=20, prefix_length=3):
+        self.limit = limit
+        self.prefix_length = prefix_length
+        self.results = []
+        self.row_words = []
+        self.top = collections.defaultdict(list)
+        postings = collections.defaultdict(lambda: array.array('L'))
+        for rank, (result, name, fulltxt) in enumerate(rows):
+            words = get_words(name, fulltxt)
+            self.results.append(result)
+            self.row_words.append(tuple(words))
+            for word in words:
+                postings[word].append(rank)
+            prefixes = {
+                word[:length]
+                for word in words
+                for length in range(1, min(len(word), prefix_length) + 1)
+            }
+            for prefix in prefixes:
+                if len(self.top[prefix]) < limit:
+                    self.top[prefix].append(rank)
+        self.top = dict(self.top)
+        self.words = sorted(postings)
+        self.postings = [postings[word] for word in self.words]
+        # Number of postings before the i-th word, to size prefix ranges
+        self.offsets = array.array('L', [0])
+        for ranks in self.postings:
+            self.offsets.append(self.offsets[-1] + len(ranks))
+
+    def __len__(self):
+        return len(self.results)
+
+    def search(self, texts, limit=20):
+        """Get the top results matching any of `texts`, where a text matches
+        a row if each of its words is a prefix of a word of the row.
+        """
+        matches = [self._search(text, limit) for text in texts]
+        ranks = []
+        for rank in heapq.merge(*matches):
+            if not ranks or rank != ranks[-1]:
+                ranks.append(rank)
+                if len(ranks) == limit:
+                    break
+        return [self.results[rank] for rank in ranks]
+
+    def _search(self, text, limit):
+        terms = tokenize(text)
+        if not terms:
+            return []
+        if len(terms) == 1 and len(terms[0]) <= self.prefix_length and limit <= self.limit:
+            return self.top.get(terms[0], [])
+        ranges = [self._range(term) for term in terms]
+        if any(lo == hi for lo, hi in ranges):
+            return []
+        # Walk the rows matching the most selective term, in rank order, and
+        # check the rest against the words of each row
+        driver = min(
+            range(len(terms)),
+            key=lambda index: self.offsets[ranges[index][1]] - self.offsets[ranges[index][0]],
+        )
+        others = terms[:driver] + terms[driver + 1:]
+        ranks = []
+        for rank in self._merge(*ranges[driver]):
+            words = self.row_words[rank]
+            if all(any(word.startswith(term) for word in words) for term in others):
+                ranks.append(rank)
+                if len(ranks) == limit:
+                    break
+        return ranks
+
+    def _range(self, prefix):
+        lo = bisect.bisect_left(self.words, prefix)
+        hi = bisect.bisect_left(self.words, prefix + '\U0010ffff', lo)
+        return lo, hi
+
+    def _merge(self, lo, hi):
+        last = None
+        for rank in heapq.merge(*self.postings[lo:hi]):
+            if rank != last:
+                yield rank
+                last = rank
+
+
+def load_index(model, fields):
+    """Load the index of `model`, returning `fields` of each match.
+    """
+    columns = [getattr(model, field) for field in fields]
+    query = db.session.query(
+        model.name,
+        sa.cast(model.fulltxt, sa.Text),
+        *columns
+    ).filter(
+        model.fulltxt != None,  # noqa
+    ).order_by(
+        sa.desc(model.receipts),
+        model.id,
+    )
+    return NameIndex(
+        (dict(zip(fields, row[2:])), row[0], row[1])
+        for row in query.yield_per(10000)
+    )
+
+
+# Set `FEC_TYPEAHEAD_CACHE` to "0" to search names in Postgres on every
+# request
+enabled = os.getenv('FEC_TYPEAHEAD_CACHE', '1') != '0'
+candidates = cache.Reloadable(
+    functools.partial(load_index, models.CandidateSearch, ['id', 'name', 'office_sought']),
+    description='candidate names',
+)
+committees = cache.Reloadable(
+    functools.partial(load_index, models.CommitteeSearch, ['id', 'name']),
+    description='committee names',
+)
+
+
+def search(names, texts, limit=20):
+    """Search `names`, one of the indexes above, or return `None` if it isn't
+    available.
+    """
+    index = names.get() if enabled else None
+    if index is None:
+        return None
+    return index.search(texts, limit=limit)
+
+
+def preload():
+    """Start loading the indexes, if enabled.
+    """
+    if enabled:
+        candidates.reload()
+        committees.reload()
+
+
+def clear():
+    candidates.clear()
+    committees.clear()
@@ -21,17 +21,56 @@ def filter_query(model, query, fields, kwargs):
     return query
 
 
-def output_json(data, code, headers=None):
-    """Makes a Flask response with a JSON encoded body"""
-
+def dump_json(data):
     settings = flask.current_app.config.get('RESTFUL_JSON', {})
 
     # always end the json dumps with a new line
     # see https://github.com/mitsuhiko/flask/pull/1262
-    dumped = ujson.dumps(data, **settings) + '\n'
+    return ujson.dumps(data, **settings) + '\n'
+
+
+def output_json(data, code, headers=None):
+    """Makes a Flask response with a JSON encoded body"""
+    resp = flask.make_response(dump_json(data), code)
+    resp.headers.extend(headers or {})
+    return resp
 
+
+def output_dumped_json(dumped, code, headers=None):
+    """Makes a Flask response from an already encoded JSON body"""
     resp = flask.make_response(dumped, code)
     resp.headers.extend(headers or {})
+    resp.headers['Content-Type'] = 'application/json'
+    return resp
+
+
+def stream_json(data, key, items, chunk_size=500):
+    """Encode `data` as JSON, streaming the values of `items` as a list under
+    `key`. Items are encoded in chunks, so that only one chunk is held in
+    memory at a time.
+    """
+    settings = flask.current_app.config.get('RESTFUL_JSON', {})
+    head = ujson.dumps(data, **settings)
+    yield '{0}{1}{2}:['.format(head[:-1], ',' if data else '', ujson.dumps(key))
+    separator = ''
+    chunk = []
+    for item in items:
+        chunk.append(ujson.dumps(item, **settings))
+        if len(chunk) >= chunk_size:
+            yield separator + ','.join(chunk)
+            separator = ','
+            chunk = []
+    if chunk:
+        yield separator + ','.join(chunk)
+    yield ']}\n'
+
+
+def output_streamed_json(chunks, code, headers=None):
+    """Makes a Flask response that streams an iterable of encoded JSON chunks,
+    keeping the request context, and so the database session, until the last
+    chunk is sent"""
+    resp = flask.Response(flask.stream_with_context(chunks), code, mimetype='application/json')
+    resp.headers.extend(headers or {})
     return resp
 
 
@@ -1,11 +1,25 @@
+import functools
+import contextlib
+import collections
+
 import sqlalchemy as sa
+from flask import request, current_app
 from flask_apispec import Ref, marshal_with
 
+from webservices import args
 from webservices import utils
-from webservices import filters
+from webservices import schemas
 from webservices import sorting
 from webservices import exceptions
+from webservices.common import util
+from webservices.common import rows
+from webservices.common import serializers
+from webservices.common import cache
+from webservices.common import compression
+from webservices.common import flight
+from webservices.common import fanout
 from webservices.common import counts
+from webservices.common import statements
 from webservices.common import models
 from webservices.utils import use_kwargs
 
@@ -26,24 +40,154 @@ class ApiResource(utils.Resource):
     join_columns = {}
     aliases = {}
     cap = 100
+    # Allow clients to opt in to seek pagination, which stays fast for deep
+    # pages; offset pagination remains the default
+    seek_pagination = False
+    # Limit on the run time of each query, in milliseconds; `None` uses the
+    # database default
+    statement_timeout = None
+    # Serve pages as plain rows rather than ORM objects, where the page schema
+    # and query allow; see `webservices.common.rows`
+    use_rows = False
+    row_plan = None
+    # Let clients choose the fields of each result with `fields`; pages served
+    # as rows select and join only what the chosen fields need
+    sparse_fields = False
+    only = None
+    # Set by `get_count` when the count of the current page is a planner
+    # estimate, and reported as `count_is_estimate`
+    count_is_estimate = False
+
+    @property
+    def seek_index_column(self):
+        if self.index_column is not None:
+            return self.index_column
+        return utils.get_index_column(self.model)
+
+    @property
+    def seek_args(self):
+        if not self.seek_pagination:
+            return {}
+        return args.make_seek_pagination_args(self.seek_index_column)
+
+    @property
+    def fields_args(self):
+        return args.sparse_fields if self.sparse_fields else {}
+
+    @property
+    def results_schema(self):
+        return self.page_schema.Meta.results_schema_class
 
     @use_kwargs(Ref('args'))
+    @use_kwargs(Ref('seek_args'))
+    @use_kwargs(Ref('fields_args'))
     @marshal_with(Ref('page_schema'))
     def get(self, *args, **kwargs):
-        query = self.build_query(*args, **kwargs)
-        count = counts.count_estimate(query, models.db.session, threshold=5000)
+        """Serve the requested page, from the response cache if enabled. Cached
+        responses are stored serialized and compressed for each encoding that
+        clients accept, so that hits skip the database, the schema and the
+        compressor. Identical concurrent requests are coalesced, so that only
+        one of them fetches and serializes the page.
+        """
+        if self.seek_pagination and use_seek(kwargs):
+            # `last_<sort>` is parsed here so that keys of different pages differ
+            kwargs = parse_seek_values(kwargs, self.model)
+        if cache.response_cache is None or self.realtime:
+            key = cache.response_key(request.endpoint, args, kwargs)
+            _, dumped = split_body(flight.coalesce(key, lambda: self.dump_body(None, *args, **kwargs)))
+            return util.output_dumped_json(dumped, 200)
+        encoding = compression.negotiate(request)
+        key = cache.response_key(request.endpoint, args, kwargs, encoding=encoding)
+        dumped = cache.response_cache.get(key)
+        if dumped is None:
+            dumped = flight.coalesce(key, lambda: self.dump_cached_body(key, encoding, *args, **kwargs))
+        encoding, dumped = split_body(dumped)
+        headers = {'Vary': 'Accept-Encoding'}
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        return util.output_dumped_json(dumped, 200, headers=headers)
+
+    def dump_body(self, encoding, *args, **kwargs):
+        """Fetch the requested page and encode it as JSON, compressed with
+        `encoding` if given and the body is large enough. The encoding applied
+        is prepended to the body, so that it is cached and coalesced along
+        with it; see `split_body`.
+        """
+        dumped = util.dump_json(self.dump_page(*args, **kwargs)).encode('utf-8')
+        encoding, dumped = compression.compress_body(dumped, encoding)
+        return (encoding or '').encode('ascii') + b'\n' + dumped
+
+    def dump_cached_body(self, key, encoding, *args, **kwargs):
+        """Like `dump_body`, but store the body in the response cache under
+        `key`, unless its count is an estimate, which a deferred count is
+        about to replace.
+        """
+        dumped = self.dump_body(encoding, *args, **kwargs)
+        if not self.count_is_estimate:
+            cache.response_cache.set(key, dumped)
+        return dumped
+
+    def dump_page(self, *args, **kwargs):
+        """Fetch and serialize the requested page. Results are serialized by
+        the compiled serializer of the results schema, or by the row plan if
+        fetched as rows. Sparse fields are only resolved for resources that
+        enable them, since others, such as `EFilingSummaryView`, may only
+        choose their schema in `get_page`.
+        """
+        self.only = get_sparse_fields(self.results_schema, kwargs) if self.sparse_fields else None
+        with statement_timeout(self.statement_timeout):
+            page = self.get_page(*args, **kwargs)
+            serialize = self.row_plan.dump if self.row_plan is not None else None
+            data = serializers.dump_page(self.page_schema, page, serialize=serialize, only=self.only)
+        if 'pagination' in data:
+            data['pagination']['count_is_estimate'] = self.count_is_estimate
+        return data
+
+    def build_page_query(self, *args, **kwargs):
+        """Build the query for the requested page. If rows are enabled and the
+        query selects only `model`, set `row_plan` so that the page is fetched
+        as rows, and skip loader options, which only apply to ORM objects.
+        """
+        if self.use_rows:
+            plan = rows.get_plan(self.model, self.results_schema, self.only)
+            if plan is not None:
+                query = self.build_query(*args, _apply_options=False, **kwargs)
+                if rows.can_select(query, self.model):
+                    self.row_plan = plan
+                    return query
+        return self.build_query(*args, **kwargs)
+
+    @property
+    def row_transform(self):
+        return self.row_plan.select if self.row_plan is not None else None
+
+    def get_count(self, query, tally=None):
+        """Count the results of `query`, noting whether the count is an
+        estimate. Counts of realtime resources aren't cached.
+        """
+        count = counts.count_estimate(
+            query, models.db.session, threshold=5000, tally=tally, cached=not self.realtime,
+        )
+        self.count_is_estimate = counts.is_estimate(count)
+        return count
+
+    def get_page(self, *args, **kwargs):
+        query = self.build_page_query(*args, **kwargs)
+        count = self.get_count(query)
+        if self.seek_pagination and use_seek(kwargs):
+            self.page_schema = schemas.get_seek_page_schema(self.page_schema)
+            return utils.fetch_seek_page(
+                query, kwargs, self.seek_index_column,
+                count=count, cap=self.cap, transform=self.row_transform,
+            )
         return utils.fetch_page(
             query, kwargs,
             count=count, model=self.model, join_columns=self.join_columns, aliases=self.aliases,
-            index_column=self.index_column, cap=self.cap,
+            index_column=self.index_column, cap=self.cap, transform=self.row_transform,
         )
 
     def build_query(self, *args, _apply_options=True, **kwargs):
-        query = self.model.query
-        query = filters.filter_match(query, kwargs, self.filter_match_fields)
-        query = filters.filter_multi(query, kwargs, self.filter_multi_fields)
-        query = filters.filter_range(query, kwargs, self.filter_range_fields)
-        query = filters.filter_fulltext(query, kwargs, self.filter_fulltext_fields)
+        query = statements.apply(self.model.query, self, kwargs)
         if _apply_options:
             query = query.options(*self.query_options)
         return query
@@ -55,53 +199,195 @@ class ApiResource(utils.Resource):
         return query
 
 
+# Postgres error code for statements cancelled by `statement_timeout`
+QUERY_CANCELED = '57014'
+
+
+@contextlib.contextmanager
+def statement_timeout(timeout):
+    """Apply a statement timeout to the current session, and report statements
+    that run over it as API errors.
+
+    :param int timeout: Timeout in milliseconds, or `None` to skip
+    """
+    if timeout is not None:
+        models.db.session().set_statement_timeout(timeout)
+    try:
+        yield
+    except sa.exc.OperationalError as error:
+        if getattr(error.orig, 'pgcode', None) != QUERY_CANCELED:
+            raise
+        raise exceptions.ApiError(
+            'The query took too long to run. Please narrow your filters, such as '
+            'the date range or search terms, and try again.',
+            status_code=503,
+        )
+
+
+def split_body(dumped):
+    """Split a body built by `ApiResource.dump_body` into its encoding, or
+    `None`, and its data.
+    """
+    encoding, dumped = dumped.split(b'\n', 1)
+    return encoding.decode('ascii') or None, dumped
+
+
+def get_sparse_fields(schema, kwargs, extra=()):
+    """Get the names of the fields requested with `fields`, or `None` to dump
+    all fields of `schema`. Names may be repeated or separated by commas.
+
+    :param schema: Results schema class
+    :param extra: Additional valid names
+    """
+    requested = {
+        name.strip()
+        for value in kwargs.get('fields') or []
+        for name in value.split(',')
+        if name.strip()
+    }
+    if not requested:
+        return None
+    invalid = requested - serializers.get_field_names(schema) - set(extra)
+    if invalid:
+        raise exceptions.ApiError(
+            'Cannot select fields: {0}'.format(', '.join(sorted(invalid))),
+            status_code=422,
+        )
+    return tuple(sorted(requested))
+
+
+def get_ids(value, key=None):
+    """Get the ids to look up from a path segment or a list of query string
+    values, without duplicates and in the order given.
+
+    :param str key: Name of the argument; if given, at least one id is
+        required on routes without path arguments, such as `/committee/`,
+        which would otherwise list every record, and ids in the query string
+        must not conflict with the id in the path
+    """
+    if value is None:
+        ids = []
+    elif isinstance(value, str):
+        ids = [value]
+    else:
+        ids = list(collections.OrderedDict.fromkeys(value))
+    path_id = request.view_args.get(key) if key is not None else None
+    if path_id is not None and [each.upper() for each in ids] != [path_id.upper()]:
+        raise exceptions.ApiError(
+            'Cannot specify "{0}" in both the path and the query string.'.format(key),
+            status_code=422,
+        )
+    if key is not None and not ids and not request.view_args:
+        raise exceptions.ApiError(
+            'Must specify at least one value for "{0}".'.format(key),
+            status_code=422,
+        )
+    return ids
+
+
+def use_seek(kwargs):
+    return kwargs.get('seek') or kwargs.get('last_index') is not None or kwargs.get('cursor')
+
+
+def parse_seek_values(kwargs, model):
+    """Parse the `last_<sort>` argument of a seek request. Since any column of
+    `model` may be sorted on, its type is only known once `sort` is parsed.
+    """
+    if not kwargs.get('sort'):
+        return kwargs
+    key = kwargs['sort'].lstrip('-')
+    column = getattr(model, key, None)
+    if column is None or not hasattr(column, 'property'):
+        raise exceptions.ApiError(
+            'Cannot use seek pagination when sorting on "{0}"'.format(key),
+            status_code=422,
+        )
+    parser = current_app.config['APISPEC_WEBARGS_PARSER']
+    return utils.extend(kwargs, parser.parse(args.make_seek_value_args(column), request))
+
+
 class ItemizedResource(ApiResource):
 
     year_column = None
     index_column = None
+    # Full text searches and wide date ranges over itemized records can hold
+    # a worker for minutes
+    statement_timeout = 30000
+    # Maximum number of values for `committee_id`
+    committee_cap = 200
+    # Maximum number of queries to fan out to when filtering on multiple
+    # committees; larger lists are split into this many batches
+    committee_branches = 10
+    use_rows = True
+    sparse_fields = True
+    # Model of the table of counts by committee and two-year period, if any;
+    # see `counts.Tally`
+    counts_model = None
 
-    def get(self, **kwargs):
+    def get_page(self, **kwargs):
         """Get itemized resources. If multiple values are passed for `committee_id`,
-        create a subquery for each and combine with `UNION ALL`. This is necessary
-        to avoid slow queries when one or more relevant committees has many
-        records.
+        fetch a page for each batch of committees concurrently and merge them.
+        This is necessary to avoid slow queries when one or more relevant
+        committees has many records.
         """
         committee_ids = kwargs.get('committee_id', [])
-        if len(committee_ids) > 5:
+        if len(committee_ids) > self.committee_cap:
             raise exceptions.ApiError(
-                'Can only specify up to five values for "committee_id".',
+                'Can only specify up to {0} values for "committee_id".'.format(self.committee_cap),
                 status_code=422,
             )
         if len(committee_ids) > 1:
-            query, count = self.join_committee_queries(kwargs)
-            return utils.fetch_seek_page(query, kwargs, self.index_column, count=count)
-        query = self.build_query(**kwargs)
-        count = counts.count_estimate(query, models.db.session, threshold=5000)
-        return utils.fetch_seek_page(query, kwargs, self.index_column, count=count, cap=self.cap)
-
-    def join_committee_queries(self, kwargs):
-        """Build and compose per-committee subqueries using `UNION ALL`.
+            return self.fetch_committee_pages(kwargs)
+        query = self.build_page_query(**kwargs)
+        count = self.get_count(query, tally=counts.Tally.match(self.counts_model, kwargs))
+        return utils.fetch_seek_page(
+            query, kwargs, self.index_column,
+            count=count, cap=self.cap, transform=self.row_transform,
+        )
+
+    def fetch_committee_pages(self, kwargs):
+        """Fetch the requested page and count for each batch of committees, then
+        merge the pages, which are sorted the same way, into a single page.
+        Since each batch is queried independently and is limited to a single
+        page, latency tracks the slowest batch rather than the sum of all
+        committees, and the number of queries is bounded however many
+        committees are requested.
         """
-        queries = []
-        total = 0
-        for committee_id in kwargs.get('committee_id', []):
-            query, count = self.build_committee_query(kwargs, committee_id)
-            queries.append(query.subquery().select())
-            total += count
-        query = models.db.session.query(
-            self.model
-        ).select_entity_from(
-            sa.union_all(*queries)
+        committee_ids = sorted(set(kwargs['committee_id']))
+        pages = fanout.map(
+            functools.partial(self.fetch_committee_page, kwargs),
+            fanout.split(committee_ids, self.committee_branches),
+        )
+        sort_column = None
+        if kwargs.get('sort'):
+            column, order, _ = sorting.parse_option(kwargs['sort'], model=self.model)
+            sort_column = (column, order)
+        paginator = utils.MergeSeekPaginator(
+            [results for results, _ in pages],
+            kwargs['per_page'],
+            self.index_column,
+            sort_column=sort_column,
+            count=sum(count for _, count in pages),
         )
-        query = query.options(*self.query_options)
-        return query, total
+        self.count_is_estimate = any(counts.is_estimate(count) for _, count in pages)
+        return paginator.get_page()
 
-    def build_committee_query(self, kwargs, committee_id):
-        """Build a subquery by committee.
+    def fetch_committee_page(self, kwargs, committee_ids):
+        """Fetch the requested page and count for a batch of committees.
         """
-        query = self.build_query(_apply_options=False, **utils.extend(kwargs, {'committee_id': [committee_id]}))
-        sort, hide_null = kwargs['sort'], kwargs['sort_hide_null']
-        query, _ = sorting.sort(query, sort, model=self.model, hide_null=hide_null)
-        page_query = utils.fetch_seek_page(query, kwargs, self.index_column, count=-1, eager=False).results
-        count = counts.count_estimate(query, models.db.session, threshold=5000)
-        return page_query, count
+        # Fanned out work runs in its own session
+        models.db.session().set_statement_timeout(self.statement_timeout)
+        # Every batch builds the same shape of query, and so sets the same row
+        # plan, if any
+        batch_kwargs = utils.extend(kwargs, {'committee_id': committee_ids})
+        query = self.build_page_query(**batch_kwargs)
+        count = counts.count_estimate(
+            query, models.db.session, threshold=5000,
+            tally=counts.Tally.match(self.counts_model, batch_kwargs),
+            cached=not self.realtime,
+        )
+        page = utils.fetch_seek_page(
+            query, kwargs, self.index_column,
+            count=count, cap=self.cap, transform=self.row_transform,
+        )
+        return page.results, count
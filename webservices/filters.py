@@ -1,6 +1,7 @@
 import sqlalchemy as sa
 
 from webservices import utils
+from webservices import config
 from webservices import exceptions
 from webservices.common import models
 
@@ -29,12 +30,28 @@ def filter_fulltext(query, kwargs, fields):
     for key, column in fields:
         if kwargs.get(key):
             filters = [
-                column.match(utils.parse_fulltext(value))
+                column.match(parse_fulltext(value))
                 for value in kwargs[key]
             ]
             query = query.filter(sa.or_(*filters))
     return query
 
+def parse_fulltext(value):
+    # Bind parameters stand in for search terms in cached filters; see
+    # `webservices.common.statements`
+    if isinstance(value, sa.sql.expression.BindParameter):
+        return value
+    return utils.parse_fulltext(value)
+
+def filter_cycle_dates(query, kwargs, cycle_column, min_key='min_date', max_key='max_date'):
+    # The two-year periods of itemized records follow from their transaction
+    # dates; stating them lets Postgres skip the partitions of other periods
+    if kwargs.get(min_key) is not None:
+        query = query.filter(cycle_column >= config.get_cycle_end(kwargs[min_key].year))
+    if kwargs.get(max_key) is not None:
+        query = query.filter(cycle_column <= config.get_cycle_end(kwargs[max_key].year))
+    return query
+
 def filter_contributor_type(query, column, kwargs):
     if kwargs.get('contributor_type') == ['individual']:
         return query.filter(column == 'IND')
@@ -25,6 +25,7 @@ class TableGroup:
     queue_old = None
     primary = None
     transaction_date_column = None
+    committee_column = 'cmte_id'
 
     columns = []
 
@@ -54,6 +55,7 @@ class TableGroup:
         for cycle in cycles:
             cls.create_child(parent, cycle)
         cls.rename()
+        cls.create_counts()
 
     @classmethod
     def add_cycles(cls, cycle, amount):
@@ -206,17 +208,96 @@ class TableGroup:
             )
             db.engine.execute(cmd)
 
+    @classmethod
+    def get_counts_name(cls):
+        return '{0}_counts'.format(cls.base_name)
+
+    @classmethod
+    def create_counts(cls):
+        """Create the table of row counts by committee and two-year period,
+        replacing any existing table. The API reads exact counts for the most
+        common filters from this table, and `refresh_child` keeps it current.
+        """
+        name = cls.get_counts_name()
+        master = utils.load_table('{0}_master'.format(cls.base_name))
+        committee = master.c[cls.committee_column]
+        select = sa.select([
+            committee.label('cmte_id'),
+            master.c.two_year_transaction_period,
+            sa.func.count().label('count'),
+        ]).where(
+            committee != None  # noqa
+        ).group_by(
+            committee,
+            master.c.two_year_transaction_period,
+        )
+        cmds = [
+            'alter table {0}_tmp add primary key (cmte_id, two_year_transaction_period)',
+            'drop table if exists {0}',
+            'alter table {0}_tmp rename to {0}',
+            'alter index {0}_tmp_pkey rename to {0}_pkey',
+        ]
+        with db.engine.begin() as connection:
+            connection.execute('drop table if exists {0}_tmp'.format(name))
+            connection.execute(utils.TableAs('{0}_tmp'.format(name), select))
+            for cmd in cmds:
+                connection.execute(cmd.format(name))
+        logger.info('Successfully created {name}.'.format(name=name))
+
+    @classmethod
+    def update_counts(cls, counts, child, record_ids, sign, connection):
+        """Add the rows of `child` among `record_ids` to `counts` if `sign` is
+        1, or subtract them if it is -1.
+        """
+        committee = child.c[cls.committee_column]
+        deltas = sa.select([
+            committee.label('cmte_id'),
+            child.c.two_year_transaction_period,
+            sa.func.count().label('count'),
+        ]).where(
+            child.c.get(cls.primary).in_(record_ids)
+        ).where(
+            committee != None  # noqa
+        ).group_by(
+            committee,
+            child.c.two_year_transaction_period,
+        ).alias('deltas')
+        matches = sa.and_(
+            counts.c.cmte_id == deltas.c.cmte_id,
+            counts.c.two_year_transaction_period == deltas.c.two_year_transaction_period,
+        )
+        update = counts.update().values(
+            count=counts.c['count'] + sign * deltas.c['count'],
+        ).where(matches)
+        connection.execute(update)
+        if sign > 0:
+            insert_select = sa.select([
+                deltas.c.cmte_id,
+                deltas.c.two_year_transaction_period,
+                deltas.c['count'],
+            ]).where(
+                ~sa.exists().where(matches)
+            )
+            insert = sa.insert(counts).from_select(
+                ['cmte_id', 'two_year_transaction_period', 'count'],
+                insert_select,
+            )
+            connection.execute(insert)
+
     @classmethod
     def refresh_children(cls):
         queue_old = utils.load_table(cls.queue_old)
         queue_new = utils.load_table(cls.queue_new)
+        counts = utils.load_table(cls.get_counts_name())
+        if counts is None:
+            logger.warn('Counts table for {name} not found; skipping counts.'.format(name=cls.base_name))
         cycles = get_cycles()
 
         for cycle in cycles:
-            cls.refresh_child(cycle, queue_old, queue_new)
+            cls.refresh_child(cycle, queue_old, queue_new, counts=counts)
 
     @classmethod
-    def refresh_child(cls, cycle, queue_old, queue_new):
+    def refresh_child(cls, cycle, queue_old, queue_new, counts=None):
         start, stop = cycle - 1, cycle
         name = '{base}_{start}_{stop}'.format(
             base=cls.base_name, start=start, stop=stop
@@ -232,6 +313,8 @@ class TableGroup:
             delete = sa.delete(child).where(
                 child.c.get(cls.primary).in_(delete_select)
             )
+            if counts is not None:
+                cls.update_counts(counts, child, delete_select, -1, connection)
             connection.execute(delete)
 
             # The queue tables already have the two_year_transaction_period
@@ -269,12 +352,13 @@ class TableGroup:
                 insert_select
             )
             connection.execute(insert)
+            insert_ids = insert_select.with_only_columns([queue_new.c.get(cls.primary)])
+            if counts is not None:
+                cls.update_counts(counts, child, insert_ids, 1, connection)
 
             # Clear the processed records out of the queues.
             cls.clear_queue(queue_old, delete_select, connection)
-            cls.clear_queue(queue_new, insert_select.with_only_columns(
-                [queue_new.c.get(cls.primary)]
-            ), connection)
+            cls.clear_queue(queue_new, insert_ids, connection)
 
             transaction.commit()
             logger.info('Successfully refreshed {name}.'.format(name=name))
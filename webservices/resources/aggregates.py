@@ -8,7 +8,6 @@ from webservices import utils
 from webservices import filters
 from webservices import schemas
 from webservices import exceptions
-from webservices.common import counts
 from webservices.common import models
 from webservices.common.views import ApiResource
 
@@ -17,6 +16,7 @@ from webservices.common.views import ApiResource
 class AggregateResource(ApiResource):
 
     query_args = {}
+    seek_pagination = True
 
     @property
     def args(self):
@@ -116,11 +116,6 @@ class ScheduleAByEmployerView(AggregateResource):
         ('employer', models.ScheduleAByEmployer.employer),
     ]
 
-    def get(self, committee_id=None, **kwargs):
-        query = self.build_query(committee_id=committee_id, **kwargs)
-        count = counts.count_estimate(query, models.db.session, threshold=5000)
-        return utils.fetch_page(query, kwargs, model=self.model, count=count, index_column=self.index_column)
-
 
 @doc(
     tags=['receipts'],
@@ -140,11 +135,6 @@ class ScheduleAByOccupationView(AggregateResource):
         ('occupation', models.ScheduleAByOccupation.occupation),
     ]
 
-    def get(self, committee_id=None, **kwargs):
-        query = self.build_query(committee_id=committee_id, **kwargs)
-        count = counts.count_estimate(query, models.db.session, threshold=5000)
-        return utils.fetch_page(query, kwargs, model=self.model, count=count, index_column=self.index_column)
-
 
 @doc(
     tags=['disbursements'],
@@ -210,8 +200,10 @@ class CandidateAggregateResource(AggregateResource):
 
     # Since candidate aggregates are aggregated on the fly, they don't have a
     # consistent unique index. We nullify `index_column` to avoiding sorting
-    # on the unique index of the base model.
+    # on the unique index of the base model, and disable seek pagination,
+    # which depends on it.
     index_column = None
+    seek_pagination = False
 
     @property
     def sort_args(self):
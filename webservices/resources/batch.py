@@ -0,0 +1,108 @@
+import os
+import http
+import logging
+
+from flask import request, current_app
+
+from webservices import args
+from webservices import utils
+from webservices import exceptions
+from webservices.common import util
+from webservices.common import fanout
+from webservices.common import models
+from webservices.utils import use_kwargs
+
+
+logger = logging.getLogger(__name__)
+
+MAX_REQUESTS = int(os.getenv('FEC_BATCH_MAX_REQUESTS', 50))
+PREFIX = '/v1/'
+
+# Headers of the batch request passed on to each sub-request
+FORWARD_HEADERS = ('X-Forwarded-For', 'User-Agent')
+
+
+class BatchView(utils.Resource):
+    """Run many `GET` requests to the API in one round trip. Sub-requests are
+    dispatched in-process through the usual resources and response hooks, in
+    concurrent batches that each share one database session; see `dispatch`.
+    """
+
+    @use_kwargs(args.batch, locations=('json', ))
+    def post(self, requests, **kwargs):
+        paths = [check_path(path) for path in requests]
+        if len(paths) > MAX_REQUESTS:
+            raise exceptions.ApiError(
+                'Cannot batch more than {0} requests'.format(MAX_REQUESTS),
+                status_code=http.client.UNPROCESSABLE_ENTITY,
+            )
+        environ = {'REMOTE_ADDR': request.remote_addr}
+        headers = [
+            (key, request.headers[key])
+            for key in FORWARD_HEADERS
+            if key in request.headers
+        ]
+        batches = fanout.split(paths, max(fanout.max_workers, 1))
+        results = fanout.map(
+            lambda batch: [dispatch(path, environ, headers) for path in batch],
+            batches,
+        )
+        return util.output_dumped_json(
+            encode_results(result for batch in results for result in batch),
+            http.client.OK,
+        )
+
+
+def check_path(path):
+    if not path.startswith(PREFIX) or path.startswith(PREFIX + 'batch/'):
+        raise exceptions.ApiError(
+            'Cannot batch request "{0}"; paths must start with "{1}"'.format(path, PREFIX),
+            status_code=http.client.UNPROCESSABLE_ENTITY,
+        )
+    return path
+
+
+def dispatch(path, environ, headers):
+    """Dispatch a `GET` request for `path`, including its query string, and
+    return the path, status code, mimetype and body of the response.
+
+    Sub-requests of a batch share a session, so the session is reset after
+    each one: the statement timeout set by its resource is dropped, and if it
+    failed, its transaction, which may have been aborted, is rolled back.
+    """
+    app = current_app._get_current_object()
+    status = http.client.INTERNAL_SERVER_ERROR
+    with app.test_request_context(path, method='GET', environ_base=environ, headers=headers):
+        try:
+            response = app.full_dispatch_request()
+            status = response.status_code
+            return path, status, response.mimetype, response.get_data()
+        except Exception:
+            logger.exception('Failed to dispatch batched request "{0}"'.format(path))
+            return path, status, None, b''
+        finally:
+            reset_session(failed=status >= http.client.INTERNAL_SERVER_ERROR)
+
+
+def reset_session(failed=False):
+    session = models.db.session()
+    if failed:
+        session.rollback()
+    session.reset_statement_timeout()
+
+
+def encode_results(results):
+    """Encode sub-responses as a JSON list. JSON bodies are spliced in as they
+    are, without being decoded, and other bodies are included as strings.
+    """
+    encoded = []
+    for path, status, mimetype, data in results:
+        body = data.decode('utf-8')
+        if mimetype != 'application/json' or not body.strip():
+            body = util.dump_json(body or None)
+        encoded.append('{{"path":{0},"status":{1},"body":{2}}}'.format(
+            util.dump_json(path).rstrip(),
+            status,
+            body.rstrip(),
+        ))
+    return '{"results":[' + ','.join(encoded) + ']}\n'
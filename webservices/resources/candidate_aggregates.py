@@ -8,7 +8,9 @@ from webservices import filters
 from webservices import schemas
 from webservices.utils import use_kwargs
 from webservices.common.views import ApiResource
+from webservices.common import util
 from webservices.common import models
+from webservices.common import serializers
 from webservices.common.models import (
     CandidateElection, CandidateCommitteeLink,
     ScheduleABySize, ScheduleAByState,
@@ -115,7 +117,12 @@ class ScheduleAByStateCandidateView(utils.Resource):
             [ScheduleAByState.state],
             kwargs,
         )
-        return utils.fetch_page(query, kwargs, cap=0)
+        # Pages are uncapped, so stream results rather than loading them
+        page = utils.fetch_page(query, kwargs, cap=0, stream=True)
+        return util.output_streamed_json(
+            serializers.stream_page(schemas.ScheduleAByStateCandidatePageSchema, page),
+            200,
+        )
 
 @doc(
     tags=['candidate'],
@@ -7,6 +7,7 @@ from webservices import utils
 from webservices import schemas
 from webservices import exceptions
 from webservices.common import models
+from webservices.common import views
 from webservices.common.views import ApiResource
 
 
@@ -31,6 +32,7 @@ class CandidateList(ApiResource):
     model = models.Candidate
     schema = schemas.CandidateSchema
     page_schema = schemas.CandidatePageSchema
+    seek_pagination = True
     filter_multi_fields = filter_multi_fields(models.Candidate)
     filter_fulltext_fields = [('q', models.CandidateSearch.fulltxt)]
     aliases = {'receipts': models.CandidateSearch.receipts}
@@ -127,6 +129,7 @@ class CandidateView(ApiResource):
         return utils.extend(
             args.paging,
             args.candidate_detail,
+            args.candidate_ids,
             args.make_sort_args(
                 default='name',
                 validator=args.IndexValidator(self.model),
@@ -136,8 +139,9 @@ class CandidateView(ApiResource):
     def build_query(self, candidate_id=None, committee_id=None, **kwargs):
         query = super().build_query(**kwargs)
 
-        if candidate_id is not None:
-            query = query.filter_by(candidate_id=candidate_id)
+        candidate_ids = views.get_ids(candidate_id, 'candidate_id')
+        if candidate_ids:
+            query = query.filter(models.CandidateDetail.candidate_id.in_(candidate_ids))
 
         if committee_id is not None:
             query = query.join(
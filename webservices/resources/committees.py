@@ -9,6 +9,7 @@ from webservices import schemas
 from webservices import exceptions
 from webservices.common import models
 from webservices.common.models import db
+from webservices.common import views
 from webservices.common.views import ApiResource
 
 
@@ -36,6 +37,7 @@ class CommitteeList(ApiResource):
     model = models.Committee
     schema = schemas.CommitteeSchema
     page_schema = schemas.CommitteePageSchema
+    seek_pagination = True
     aliases = {'receipts': models.CommitteeSearch.receipts}
 
     filter_multi_fields = [
@@ -123,6 +125,7 @@ class CommitteeView(ApiResource):
         return utils.extend(
             args.paging,
             args.committee,
+            args.committee_ids,
             args.make_sort_args(
                 default='name',
                 validator=args.IndexValidator(self.model),
@@ -132,8 +135,9 @@ class CommitteeView(ApiResource):
     def build_query(self, committee_id=None, candidate_id=None, **kwargs):
         query = super().build_query(**kwargs)
 
-        if committee_id is not None:
-            query = query.filter_by(committee_id=committee_id)
+        committee_ids = views.get_ids(committee_id, 'committee_id')
+        if committee_ids:
+            query = query.filter(models.CommitteeDetail.committee_id.in_(committee_ids))
 
         if candidate_id is not None:
             query = query.join(
@@ -2,7 +2,7 @@ import datetime
 
 import sqlalchemy as sa
 
-from flask import Response
+from flask import Response, stream_with_context
 from flask_apispec import doc
 from webargs import fields, validate
 from dateutil.relativedelta import relativedelta
@@ -12,6 +12,7 @@ from webservices import docs
 from webservices import utils
 from webservices import schemas
 from webservices.common import models
+from webservices.common import serializers
 from webservices.utils import use_kwargs
 from webservices.common.views import ApiResource
 from webservices import calendar
@@ -152,8 +153,12 @@ class CalendarDatesExport(CalendarDatesView):
             self.model.start_date < today + relativedelta(years=1),
         )
         schema_type, renderer, mimetype = self.renderers[kwargs['renderer']]
-        schema = schema_type(many=True)
+        serialize = serializers.get_serializer(schema_type)
+        rows = (
+            serialize(each)
+            for each in query.yield_per(utils.StreamingOffsetPaginator.batch_size)
+        )
         return Response(
-            renderer(schema.dump(query).data, schema),
+            stream_with_context(renderer(rows, schema_type())),
             mimetype=mimetype,
         )
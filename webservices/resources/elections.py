@@ -7,6 +7,9 @@ from webservices import utils
 from webservices import filters
 from webservices import schemas
 from webservices.utils import use_kwargs
+from webservices.common import util
+from webservices.common import serializers
+from webservices.common.districts import get_districts
 from webservices.common.models import (
     db, CandidateHistory, CandidateCommitteeLink,
     CommitteeTotalsPresidential, CommitteeTotalsHouseSenate,
@@ -119,26 +122,18 @@ class ElectionList(utils.Resource):
         return filters.filter_multi(query, kwargs, self.filter_multi_fields)
 
     def _filter_zip(self, query, kwargs):
-        """Filter query by zip codes."""
-        fips_states = sa.Table('ofec_fips_states', db.metadata, autoload_with=db.engine)
-        zips_districts = sa.Table('ofec_zips_districts', db.metadata, autoload_with=db.engine)
-        districts = db.session.query(
-            zips_districts,
-            fips_states,
-        ).join(
-            fips_states,
-            zips_districts.c['State'] == fips_states.c['FIPS State Numeric Code'],
-        ).filter(
-            zips_districts.c['ZCTA'].in_(kwargs['zip'])
-        ).subquery()
-        return query.join(
-            districts,
+        """Filter query by zip codes, resolved to districts in memory."""
+        districts = get_districts(kwargs['zip'])
+        if not districts:
+            return query.filter(sa.false())
+        states = {state for state, _ in districts}
+        return query.filter(
             sa.or_(
                 # House races from matching states and districts
-                sa.and_(
-                    CandidateHistory.district_number == districts.c['Congressional District'],
-                    CandidateHistory.state == districts.c['Official USPS Code'],
-                ),
+                sa.tuple_(
+                    CandidateHistory.state,
+                    CandidateHistory.district_number,
+                ).in_(sorted(districts)),
                 # Senate and presidential races from matching states
                 sa.and_(
                     # Note: Missing districts may be represented as "00" or `None`.
@@ -148,7 +143,7 @@ class ElectionList(utils.Resource):
                         CandidateHistory.district_number == 0,
                         CandidateHistory.district_number == None,  # noqa
                     ),
-                    CandidateHistory.state.in_([districts.c['Official USPS Code'], 'US'])
+                    CandidateHistory.state.in_(sorted(states) + ['US'])
                 ),
             )
         )
@@ -166,7 +161,9 @@ class ElectionView(utils.Resource):
     @marshal_with(schemas.ElectionPageSchema())
     def get(self, **kwargs):
         query = self._get_records(kwargs)
-        return utils.fetch_page(query, kwargs, cap=0)
+        # Pages are uncapped, so stream results rather than loading them
+        page = utils.fetch_page(query, kwargs, cap=0, stream=True)
+        return util.output_streamed_json(serializers.stream_page(schemas.ElectionPageSchema, page), 200)
 
     def _get_records(self, kwargs):
         utils.check_election_arguments(kwargs)
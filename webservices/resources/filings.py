@@ -5,7 +5,6 @@ from webservices import docs
 from webservices import utils
 from webservices import schemas
 from webservices.common import views
-from webservices.common import counts
 from webservices.common import models
 
 
@@ -22,6 +21,7 @@ class BaseFilings(views.ApiResource):
     model = models.Filings
     schema = schemas.FilingsSchema
     page_schema = schemas.FilingsPageSchema
+    seek_pagination = True
 
     filter_multi_fields = [
         ('beginning_image_number', models.Filings.beginning_image_number),
@@ -56,11 +56,6 @@ class BaseFilings(views.ApiResource):
             ),
         )
 
-    def get(self, **kwargs):
-        query = self.build_query(**kwargs)
-        count = counts.count_estimate(query, models.db.session, threshold=5000)
-        return utils.fetch_page(query, kwargs, model=models.Filings, count=count)
-
 
 class FilingsView(BaseFilings):
 
@@ -91,6 +86,7 @@ class FilingsList(BaseFilings):
 )
 class EFilingsView(views.ApiResource):
 
+    realtime = True
     model = models.EFilings
     schema = schemas.EFilingsSchema
     page_schema = schemas.EFilingsPageSchema
@@ -114,9 +110,9 @@ class EFilingsView(views.ApiResource):
             ),
         )
 
-    def get(self, **kwargs):
+    def get_page(self, **kwargs):
         query = self.build_query(**kwargs)
-        count = counts.count_estimate(query, models.db.session, threshold=5000)
+        count = self.get_count(query)
         return utils.fetch_page(query, kwargs, model=models.EFilings, count=count)
 
     @property
@@ -10,6 +10,9 @@ from webservices.legal_docs import DOCS_SEARCH
 es = utils.get_elasticsearch_connection()
 
 class GetLegalDocument(utils.Resource):
+
+    realtime = True
+
     @property
     def args(self):
         return {"no": fields.Str(required=True, description='Document number to fetch.'),
@@ -66,6 +69,9 @@ def parse_query_string(query):
 
 
 class UniversalSearch(utils.Resource):
+
+    realtime = True
+
     @use_kwargs(args.query)
     def get(self, q='', from_hit=0, hits_returned=20, type='all', **kwargs):
         if type == 'all':
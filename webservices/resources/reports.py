@@ -6,8 +6,8 @@ from webservices import docs
 from webservices import utils
 from webservices import schemas
 from webservices import filters
-from webservices.common import counts
 from webservices.common import models
+from webservices.common import serializers
 from webservices.common import views
 from webservices.utils import use_kwargs
 
@@ -97,6 +97,7 @@ class ReportsView(utils.Resource):
     @use_kwargs(args.paging)
     @use_kwargs(args.reports)
     @use_kwargs(args.make_sort_args(default='-coverage_end_date'))
+    @use_kwargs(args.make_seek_pagination_args(models.CommitteeReportsPacParty.idx))
     @marshal_with(schemas.CommitteeReportsPageSchema(), apply=False)
     def get(self, committee_type=None, **kwargs):
         committee_id = kwargs.get('committee_id')
@@ -107,8 +108,13 @@ class ReportsView(utils.Resource):
         if kwargs['sort']:
             validator = args.IndexValidator(reports_class)
             validator(kwargs['sort'])
-        page = utils.fetch_page(query, kwargs, model=reports_class)
-        return reports_schema().dump(page).data
+        if views.use_seek(kwargs):
+            kwargs = views.parse_seek_values(kwargs, reports_class)
+            page = utils.fetch_seek_page(query, kwargs, reports_class.idx)
+            reports_schema = schemas.get_seek_page_schema(reports_schema)
+        else:
+            page = utils.fetch_page(query, kwargs, model=reports_class)
+        return serializers.dump_page(reports_schema, page)
 
     def build_query(self, committee_type=None, **kwargs):
         #For this endpoint we now enforce the enpoint specified to map the right model.
@@ -159,6 +165,7 @@ class CommitteeReportsView(utils.Resource):
     @use_kwargs(args.paging)
     @use_kwargs(args.committee_reports)
     @use_kwargs(args.make_sort_args(default='-coverage_end_date'))
+    @use_kwargs(args.make_seek_pagination_args(models.CommitteeReportsPacParty.idx))
     @marshal_with(schemas.CommitteeReportsPageSchema(), apply=False)
     def get(self, committee_id=None, committee_type=None, **kwargs):
         query, reports_class, reports_schema = self.build_query(
@@ -169,8 +176,13 @@ class CommitteeReportsView(utils.Resource):
         if kwargs['sort']:
             validator = args.IndexValidator(reports_class)
             validator(kwargs['sort'])
-        page = utils.fetch_page(query, kwargs, model=reports_class)
-        return reports_schema().dump(page).data
+        if views.use_seek(kwargs):
+            kwargs = views.parse_seek_values(kwargs, reports_class)
+            page = utils.fetch_seek_page(query, kwargs, reports_class.idx)
+            reports_schema = schemas.get_seek_page_schema(reports_schema)
+        else:
+            page = utils.fetch_page(query, kwargs, model=reports_class)
+        return serializers.dump_page(reports_schema, page)
 
     def build_query(self, committee_id=None, committee_type=None, **kwargs):
         reports_class, reports_schema = reports_schema_map.get(
@@ -235,6 +247,7 @@ class CommitteeReportsView(utils.Resource):
 )
 class EFilingSummaryView(views.ApiResource):
 
+    realtime = True
     model = models.BaseF3PFiling
     schema = schemas.BaseF3FilingSchema
     page_schema = schemas.BaseF3FilingSchema
@@ -260,13 +273,13 @@ class EFilingSummaryView(views.ApiResource):
         )
 
 
-    def get(self, committee_type=None, **kwargs):
+    def get_page(self, committee_type=None, **kwargs):
         if committee_type:
             self.model, self.schema, self.page_schema = \
                 efile_reports_schema_map.get(form_type_map.get(committee_type))
         query = self.build_query(**kwargs)
 
-        count = counts.count_estimate(query, models.db.session, threshold=5000)
+        count = self.get_count(query)
         return utils.fetch_page(query, kwargs, model=self.model, count=count)
 
 
@@ -19,6 +19,7 @@ class ScheduleAView(ItemizedResource):
     model = models.ScheduleA
     schema = schemas.ScheduleASchema
     page_schema = schemas.ScheduleAPageSchema
+    counts_model = models.ScheduleACount
 
     @property
     def year_column(self):
@@ -75,6 +76,7 @@ class ScheduleAView(ItemizedResource):
     def build_query(self, **kwargs):
         query = super().build_query(**kwargs)
         query = filters.filter_contributor_type(query, self.model.entity_type, kwargs)
+        query = filters.filter_cycle_dates(query, kwargs, self.year_column)
         if kwargs.get('sub_id'):
             query = query.filter_by(sub_id= int(kwargs.get('sub_id')))
         return query
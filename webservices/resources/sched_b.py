@@ -4,6 +4,7 @@ from flask_apispec import doc
 from webservices import args
 from webservices import docs
 from webservices import utils
+from webservices import filters
 from webservices import schemas
 from webservices.common import models
 from webservices.common.views import ItemizedResource
@@ -18,6 +19,7 @@ class ScheduleBView(ItemizedResource):
     model = models.ScheduleB
     schema = schemas.ScheduleBSchema
     page_schema = schemas.ScheduleBPageSchema
+    counts_model = models.ScheduleBCount
 
     @property
     def year_column(self):
@@ -47,6 +49,15 @@ class ScheduleBView(ItemizedResource):
         (('min_image_number', 'max_image_number'), models.ScheduleB.image_number),
     ]
 
+    @property
+    def query_options(self):
+        # Only join the committees that the requested fields include
+        return [
+            sa.orm.joinedload(relationship)
+            for relationship in (models.ScheduleB.committee, models.ScheduleB.recipient_committee)
+            if self.only is None or relationship.key in self.only
+        ]
+
     @property
     def args(self):
         return utils.extend(
@@ -61,8 +72,7 @@ class ScheduleBView(ItemizedResource):
 
     def build_query(self, **kwargs):
         query = super(ScheduleBView, self).build_query(**kwargs)
-        query = query.options(sa.orm.joinedload(models.ScheduleB.committee))
-        query = query.options(sa.orm.joinedload(models.ScheduleB.recipient_committee))
+        query = filters.filter_cycle_dates(query, kwargs, self.year_column)
         if kwargs.get('sub_id'):
             query = query.filter_by(sub_id= int(kwargs.get('sub_id')))
         return query
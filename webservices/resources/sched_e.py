@@ -100,6 +100,7 @@ class ScheduleEView(ItemizedResource):
     description=docs.EFILING_TAG,
 )
 class ScheduleEEfileView(views.ApiResource):
+    realtime = True
     model = models.ScheduleEEfile
     schema = schemas.ItemizedScheduleEfilingsSchema
     page_schema = schemas.ScheduleEEfilePageSchema
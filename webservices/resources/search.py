@@ -8,6 +8,7 @@ from webservices import utils
 from webservices import filters
 from webservices import schemas
 from webservices.common import models
+from webservices.common import typeahead
 from webservices.utils import use_kwargs
 
 
@@ -24,6 +25,9 @@ class CandidateNameSearch(utils.Resource):
     @use_kwargs(args.names)
     @marshal_with(schemas.CandidateSearchListSchema())
     def get(self, **kwargs):
+        results = typeahead.search(typeahead.candidates, kwargs['q'])
+        if results is not None:
+            return {'results': results}
         query = filters.filter_fulltext(models.CandidateSearch.query, kwargs, self.filter_fulltext_fields)
         query = query.order_by(
             sa.desc(models.CandidateSearch.receipts)
@@ -44,6 +48,9 @@ class CommitteeNameSearch(utils.Resource):
     @use_kwargs(args.names)
     @marshal_with(schemas.CommitteeSearchListSchema())
     def get(self, **kwargs):
+        results = typeahead.search(typeahead.committees, kwargs['q'])
+        if results is not None:
+            return {'results': results}
         query = filters.filter_fulltext(models.CommitteeSearch.query, kwargs, self.filter_fulltext_fields)
         query = query.order_by(
             sa.desc(models.CommitteeSearch.receipts)
@@ -1,3 +1,5 @@
+import collections
+
 import sqlalchemy as sa
 from flask_apispec import doc, marshal_with
 
@@ -5,7 +7,12 @@ from webservices import args
 from webservices import docs
 from webservices import utils
 from webservices import schemas
+from webservices import sorting
 from webservices.common import models
+from webservices.common import views
+from webservices.common import committee_types
+from webservices.common import serializers
+from webservices.common.models import db
 from webservices.common.views import ApiResource
 from webservices.utils import use_kwargs
 from webservices.resources.reports import reports_type_map
@@ -37,11 +44,15 @@ class TotalsView(utils.Resource):
 
     @use_kwargs(args.paging)
     @use_kwargs(args.totals)
+    @use_kwargs(args.committee_ids)
     @use_kwargs(args.make_sort_args(default='-cycle'))
     @marshal_with(schemas.CommitteeTotalsPageSchema(), apply=False)
     def get(self, committee_id=None, committee_type=None, **kwargs):
+        committee_ids = views.get_ids(committee_id, 'committee_id')
+        if len(committee_ids) > 1:
+            return self.get_many(committee_ids, committee_type=committee_type, **kwargs)
         query, totals_class, totals_schema = self.build_query(
-            committee_id=committee_id,
+            committee_id=committee_ids[0] if committee_ids else None,
             committee_type=committee_type,
             **kwargs
         )
@@ -49,7 +60,49 @@ class TotalsView(utils.Resource):
             validator = args.IndexValidator(totals_class)
             validator(kwargs['sort'])
         page = utils.fetch_page(query, kwargs, model=totals_class)
-        return totals_schema().dump(page).data
+        return serializers.dump_page(totals_schema, page)
+
+    def get_many(self, committee_ids, committee_type=None, **kwargs):
+        """Get totals for several committees, with one query per totals model
+        and results grouped by committee in the order requested. If
+        `committee_type` is given, only committees whose totals are of that
+        type are included.
+        """
+        committee_types = resolve_committee_types(committee_ids, cycle=kwargs.get('cycle'))
+        type_group = (
+            totals_schema_map.get(reports_type_map.get(committee_type), default_schemas)
+            if committee_type is not None
+            else None
+        )
+        groups = collections.OrderedDict()
+        for committee_id in committee_ids:
+            if committee_id in committee_types:
+                group = totals_schema_map.get(committee_types[committee_id], default_schemas)
+                if type_group is None or group == type_group:
+                    groups.setdefault(group, []).append(committee_id)
+        results = collections.defaultdict(list)
+        serializers_by_class = {}
+        for (totals_class, totals_schema), group_ids in groups.items():
+            if kwargs['sort']:
+                validator = args.IndexValidator(totals_class)
+                validator(kwargs['sort'])
+            query = self.filter_query(totals_class, totals_class.committee_id.in_(group_ids), **kwargs)
+            if kwargs['sort']:
+                query, _ = sorting.sort(query, kwargs['sort'], model=totals_class)
+            for totals in query:
+                results[totals.committee_id].append(totals)
+            serializers_by_class[totals_class] = serializers.get_serializer(
+                totals_schema.Meta.results_schema_class,
+            )
+        page = utils.fetch_list_page(
+            [each for committee_id in committee_ids for each in results[committee_id]],
+            kwargs,
+        )
+        return serializers.dump_page(
+            schemas.CommitteeTotalsPageSchema,
+            page,
+            serialize=lambda totals: serializers_by_class[type(totals)](totals),
+        )
 
     def build_query(self, committee_id=None, committee_type=None, **kwargs):
         totals_class, totals_schema = totals_schema_map.get(
@@ -60,15 +113,21 @@ class TotalsView(utils.Resource):
             ),
             default_schemas,
         )
-        query = totals_class.query
-        if committee_id is not None:
-            query = totals_class.query.filter_by(committee_id=committee_id)
+        criteria = [totals_class.committee_id == committee_id] if committee_id is not None else []
+        query = self.filter_query(totals_class, *criteria, **kwargs)
+        return query, totals_class, totals_schema
+
+    def filter_query(self, totals_class, *criteria, **kwargs):
+        query = totals_class.query.filter(*criteria)
         if kwargs.get('cycle'):
             query = query.filter(totals_class.cycle.in_(kwargs['cycle']))
-        return query, totals_class, totals_schema
+        return query
 
     def _resolve_committee_type(self, committee_id=None, committee_type=None, **kwargs):
         if committee_id is not None:
+            found, _ = committee_types.get_types([committee_id], kwargs.get('cycle'))
+            if committee_id in found:
+                return found[committee_id]
             query = models.CommitteeHistory.query.filter_by(committee_id=committee_id)
             if kwargs.get('cycle'):
                 query = query.filter(models.CommitteeHistory.cycle.in_(kwargs['cycle']))
@@ -79,6 +138,32 @@ class TotalsView(utils.Resource):
             return reports_type_map.get(committee_type)
 
 
+def resolve_committee_types(committee_ids, cycle=None):
+    """Get the type of each of `committee_ids` in its latest matching cycle,
+    from memory or else in one query. Committees without history are omitted.
+    """
+    found, missing = committee_types.get_types(committee_ids, cycle)
+    if not missing:
+        return found
+    history = models.CommitteeHistory
+    query = db.session.query(
+        history.committee_id,
+        history.committee_type,
+    ).filter(
+        history.committee_id.in_(missing)
+    )
+    if cycle:
+        query = query.filter(history.cycle.in_(cycle))
+    query = query.distinct(
+        history.committee_id
+    ).order_by(
+        history.committee_id,
+        sa.desc(history.cycle),
+    )
+    found.update(query)
+    return found
+
+
 @doc(
     tags=['receipts'],
     description=(docs.STATE_AGGREGATE_RECIPIENT_TOTALS)
@@ -4,6 +4,7 @@ full documentation visit: https://api.open.fec.gov/developers.
 """
 import os
 import http
+import datetime
 
 from flask import abort
 from flask import request
@@ -12,6 +13,7 @@ from flask import url_for
 from flask import redirect
 from flask import render_template
 from flask import Flask
+from flask import Response
 from flask import Blueprint
 
 import flask_cors as cors
@@ -27,7 +29,14 @@ from flask_apispec import FlaskApiSpec
 from webservices import spec
 from webservices import exceptions
 from webservices.common import util
+from webservices.common import cache
+from webservices.common import compression
+from webservices.common import districts
+from webservices.common import followers
+from webservices.common import committee_types
+from webservices.common import typeahead
 from webservices.common.models import db
+from webservices.resources import batch
 from webservices.resources import totals
 from webservices.resources import reports
 from webservices.resources import sched_a
@@ -74,10 +83,11 @@ app.config['SQLALCHEMY_FOLLOWER_TASKS'] = [
     'webservices.tasks.download.export_query',
 ]
 app.config['SQLALCHEMY_FOLLOWERS'] = [
-    sa.create_engine(follower.strip())
+    followers.make_engine(follower.strip())
     for follower in env.get_credential('SQLA_FOLLOWERS', '').split(',')
     if follower.strip()
 ]
+app.config['SQLALCHEMY_FOLLOWER_POOL'] = followers.make_pool(app.config['SQLALCHEMY_FOLLOWERS'])
 # app.config['SQLALCHEMY_ECHO'] = True
 db.init_app(app)
 cors.CORS(app)
@@ -92,6 +102,18 @@ class FlaskRestParser(FlaskParser):
 parser = FlaskRestParser()
 app.config['APISPEC_WEBARGS_PARSER'] = parser
 
+
+@app.before_first_request
+def preload_indexes():
+    """Start loading the in-memory indexes in the background as soon as the
+    worker starts serving, rather than on their first use. Scripts and tasks
+    that import the app don't load them.
+    """
+    committee_types.preload()
+    typeahead.preload()
+    # The zip code index is read from a file, so is loaded here directly
+    districts.get_zip_index()
+
 v1 = Blueprint('v1', __name__, url_prefix='/v1')
 api = restful.Api(v1)
 
@@ -137,11 +159,81 @@ def add_caching_headers(response):
     return response
 
 
+def get_conditional_resource():
+    """Get the resource class handling the current request, if the request is
+    eligible for conditional responses.
+    """
+    if request.method not in ('GET', 'HEAD') or request.blueprint != 'v1':
+        return None
+    view = app.view_functions.get(request.endpoint)
+    return getattr(view, 'view_class', None)
+
+
+def use_generation_tags(resource):
+    """Whether responses of `resource` can be tagged by data generation. Data
+    that changes outside of the nightly refresh can't, and neither can any
+    data while the generation isn't shared with the refresh, since a refresh
+    would then leave the tags unchanged.
+    """
+    return not resource.realtime and cache.generation.is_shared()
+
+
+def set_generation_headers(response):
+    """Tag `response` with the data generation of the current request and the
+    time of the latest refresh. The tag is weak, since it is shared by the
+    compressed and uncompressed bodies of the response.
+    """
+    response.set_etag(cache.make_etag(request.path, request.args), weak=True)
+    timestamp = cache.generation.timestamp()
+    if timestamp is not None:
+        response.last_modified = datetime.datetime.utcfromtimestamp(timestamp)
+    return response
+
+
+@app.before_request
+def check_not_modified():
+    """Answer `304 Not Modified` before running any queries if the client
+    already has the response for the current data generation.
+    """
+    resource = get_conditional_resource()
+    if resource is None or not use_generation_tags(resource):
+        return None
+    response = set_generation_headers(Response())
+    response.make_conditional(request)
+    if response.status_code == http.client.NOT_MODIFIED:
+        return response
+
+
+@app.after_request
+def add_entity_headers(response):
+    """Add `ETag` and `Last-Modified` headers to successful responses.
+    Responses that can't be tagged by data generation are tagged by content
+    instead.
+    """
+    resource = get_conditional_resource()
+    if resource is None or response.status_code != http.client.OK or response.is_streamed:
+        return response
+    if not use_generation_tags(resource):
+        response.add_etag()
+        response.make_conditional(request)
+        return response
+    return set_generation_headers(response)
+
+
+@app.after_request
+def compress_response(response):
+    """Compress responses for clients that accept gzip or brotli. Registered
+    last, so that it runs before the other response hooks.
+    """
+    return compression.compress_response(response, request)
+
+
 api.add_resource(candidates.CandidateList, '/candidates/')
 api.add_resource(candidates.CandidateSearch, '/candidates/search/')
 api.add_resource(
     candidates.CandidateView,
     '/candidate/<string:candidate_id>/',
+    '/candidate/',
     '/committee/<string:committee_id>/candidates/',
 )
 api.add_resource(
@@ -155,6 +247,7 @@ api.add_resource(committees.CommitteeList, '/committees/')
 api.add_resource(
     committees.CommitteeView,
     '/committee/<string:committee_id>/',
+    '/committee/',
     '/candidate/<string:candidate_id>/committees/',
 )
 api.add_resource(
@@ -164,7 +257,12 @@ api.add_resource(
     '/candidate/<candidate_id>/committees/history/',
     '/candidate/<candidate_id>/committees/history/<int:cycle>/',
 )
-api.add_resource(totals.TotalsView, '/committee/<string:committee_id>/totals/', '/totals/<string:committee_type>/')
+api.add_resource(
+    totals.TotalsView,
+    '/committee/<string:committee_id>/totals/',
+    '/totals/<string:committee_type>/',
+    '/totals/',
+)
 api.add_resource(reports.ReportsView, '/reports/<string:committee_type>/')
 api.add_resource(reports.CommitteeReportsView, '/committee/<string:committee_id>/reports/')
 api.add_resource(search.CandidateNameSearch, '/names/candidates/')
@@ -249,6 +347,7 @@ api.add_resource(download.DownloadView, '/download/<path:path>/')
 api.add_resource(legal.UniversalSearch, '/legal/search/')
 api.add_resource(legal.GetLegalDocument, '/legal/docs/<doc_type>/<no>')
 api.add_resource(load.Legal, '/load/legal/')
+api.add_resource(batch.BatchView, '/batch/')
 
 app.config.update({
     'APISPEC_SWAGGER_URL': None,
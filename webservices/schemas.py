@@ -11,6 +11,7 @@ from marshmallow_pagination import schemas as paging_schemas
 from webservices import utils, decoders
 from webservices.spec import spec
 from webservices.common import models
+from webservices.common import serializers
 from webservices.common.models import db
 from webservices import __API_VERSION__
 from webservices.calendar import format_start_date, format_end_date
@@ -19,8 +20,17 @@ from sqlalchemy import func
 import sqlalchemy as sa
 
 
-spec.definition('OffsetInfo', schema=paging_schemas.OffsetInfoSchema)
-spec.definition('SeekInfo', schema=paging_schemas.SeekInfoSchema)
+class OffsetInfoSchema(paging_schemas.OffsetInfoSchema):
+    # Set by `ApiResource.dump_page` when `count` is a planner estimate
+    count_is_estimate = ma.fields.Bool()
+
+
+class SeekInfoSchema(paging_schemas.SeekInfoSchema):
+    count_is_estimate = ma.fields.Bool()
+
+
+spec.definition('OffsetInfo', schema=OffsetInfoSchema)
+spec.definition('SeekInfo', schema=SeekInfoSchema)
 
 # A namedtuple used to help capture any additional columns that should be
 # included with exported data:
@@ -53,6 +63,7 @@ class Relationship(namedtuple('Relationship', 'field column label position')):
 
 class BaseSchema(ModelSchema):
 
+    @serializers.getattr_accessor
     def get_attribute(self, attr, obj, default):
         if '.' in attr:
             return super().get_attribute(attr, obj, default)
@@ -225,6 +236,22 @@ def make_page_schema(schema, page_type=paging_schemas.OffsetPageSchema, class_na
     )
 
 
+seek_page_schemas = {}
+
+def get_seek_page_schema(page_schema):
+    """Get the seek counterpart of an offset page schema, for resources that
+    optionally paginate by seeking.
+    """
+    if page_schema not in seek_page_schemas:
+        schema = page_schema.Meta.results_schema_class
+        seek_page_schemas[page_schema] = make_page_schema(
+            schema,
+            page_type=paging_schemas.SeekPageSchema,
+            class_name='{0}SeekPageSchema'.format(re.sub(r'Schema$', '', schema.__name__)),
+        )
+    return seek_page_schemas[page_schema]
+
+
 schemas = {}
 
 def augment_schemas(*schemas, namespace=schemas):
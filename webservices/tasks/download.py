@@ -11,6 +11,7 @@ from postgres_copy import query_entities, copy_to
 from celery_once import QueueOnce
 
 from webservices import utils
+from webservices.common import views
 from webservices.common import counts
 from webservices.common.models import db
 from webservices.resources import (
@@ -68,13 +69,17 @@ def call_resource(path, qs):
     for field in IGNORE_FIELDS:
         kwargs.pop(field, None)
     query, model, schema = unpack(resource.build_query(**kwargs), 3)
-    count = counts.count_estimate(query, db.session, threshold=5000)
+    schema = schema or resource.schema
+    relationships = getattr(schema.Meta, 'relationships', [])
+    only = views.get_sparse_fields(schema, kwargs, extra=[each.label for each in relationships])
+    count = counts.count_estimate(query, db.session, threshold=5000, defer=False)
     return {
         'path': path,
         'qs': qs,
         'name': get_s3_name(path, qs),
         'query': query,
-        'schema': schema or resource.schema,
+        'schema': schema,
+        'only': only,
         'resource': resource,
         'count': count,
         'timestamp': datetime.datetime.utcnow(),
@@ -89,7 +94,7 @@ def parse_kwargs(resource, qs):
         kwargs = flaskparser.parser.parse(fields)
     return fields, kwargs
 
-def query_with_labels(query, schema, sort_columns=False):
+def query_with_labels(query, schema, sort_columns=False, only=None):
     """Create a new query that labels columns according to the SQLAlchemy
     model.  Properties that are excluded by `schema` will be ignored.
 
@@ -102,14 +107,18 @@ def query_with_labels(query, schema, sort_columns=False):
     :param query: Original SQLAlchemy query
     :param schema: Optional schema specifying properties to exclude
     :param sort_columns: Optional flag to sort the column labels by name
+    :param only: Optional names of the only columns and relationship labels to
+        include
     :returns: Query with labeled entities
     """
     exclude = getattr(schema.Meta, 'exclude', ())
     relationships = getattr(schema.Meta, 'relationships', [])
+    if only is not None:
+        relationships = [each for each in relationships if each.label in only]
     joins = []
     entities = [
         entity for entity in query_entities(query)
-        if entity.key not in exclude
+        if entity.key not in exclude and (only is None or entity.key in only)
     ]
 
     for relationship in relationships:
@@ -189,7 +198,8 @@ def make_bundle(resource):
         with open(csv_path, 'w') as fp:
             query = query_with_labels(
                 resource['query'],
-                resource['schema']
+                resource['schema'],
+                only=resource['only'],
             )
             copy_to(
                 query,
@@ -1,15 +1,15 @@
 import os
 import re
+import heapq
+import operator
 import functools
+import itertools
 
 import six
 import sqlalchemy as sa
 
 from collections import defaultdict
 
-from datetime import date
-
-
 from sqlalchemy.orm import foreign
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.dialects import postgresql
@@ -29,13 +29,18 @@ from webservices import docs
 from webservices import sorting
 from webservices import decoders
 from webservices import exceptions
+from webservices.common import cursors
 
 
 use_kwargs = functools.partial(use_kwargs_original, locations=('query', ))
 
 
 class Resource(six.with_metaclass(MethodResourceMeta, restful.Resource)):
-    pass
+
+    # Set on resources whose data changes outside of the nightly refresh, such
+    # as raw electronic filings; their responses are never cached by data
+    # generation.
+    realtime = False
 
 API_KEY_ARG = fields.Str(
     required=True,
@@ -59,7 +64,7 @@ def check_cap(kwargs, cap):
 
 
 def fetch_page(query, kwargs, model=None, aliases=None, join_columns=None, clear=False,
-               count=None, cap=100, index_column=None):
+               count=None, cap=100, index_column=None, transform=None, stream=False):
     check_cap(kwargs, cap)
     sort, hide_null, reverse_nulls = kwargs.get('sort'), kwargs.get('sort_hide_null'), kwargs.get('sort_reverse_nulls')
     if sort:
@@ -67,45 +72,126 @@ def fetch_page(query, kwargs, model=None, aliases=None, join_columns=None, clear
             query, sort, model=model, aliases=aliases, join_columns=join_columns,
             clear=clear, hide_null=hide_null, index_column=index_column
         )
-    paginator = paginators.OffsetPaginator(query, kwargs['per_page'], count=count)
+    if transform is not None:
+        query = transform(query)
+    paginator_class = StreamingOffsetPaginator if stream else paginators.OffsetPaginator
+    paginator = paginator_class(query, kwargs['per_page'], count=count)
     return paginator.get_page(kwargs['page'])
 
-class SeekCoalescePaginator(paginators.SeekPaginator):
 
-    def __init__(self, cursor, per_page, index_column, sort_column=None, count=None):
-        self.max_column_map = {
-            "date": date.max,
-            "float": float("inf"),
-            "int": float("inf")
-        }
-        self.min_column_map = {
-            "date": date.min,
-            "float": float("inf"),
-            "int": float("inf")
-        }
-        super(SeekCoalescePaginator, self).__init__(cursor, per_page, index_column, sort_column, count)
+class StreamingOffsetPaginator(paginators.OffsetPaginator):
+    """Offset paginator whose pages hold the query for their results rather
+    than the results themselves. Iterating over the results reads them in
+    batches from a server-side cursor, so that large pages can be streamed
+    without loading every row at once.
+    """
+
+    batch_size = 500
+
+    def _fetch(self, offset, limit, *args, **kwargs):
+        return self.cursor.offset(offset).limit(limit).yield_per(self.batch_size)
+
+
+class ListPaginator(paginators.OffsetPaginator):
+    """Offset paginator over results already loaded into a list, such as
+    results merged from several queries.
+    """
 
+    def __init__(self, results, per_page):
+        super().__init__(results, per_page, count=len(results))
+
+    def _count(self):
+        return len(self.cursor)
+
+    def _fetch(self, offset, limit, *args, **kwargs):
+        return self.cursor[offset:offset + limit]
+
+
+def fetch_list_page(results, kwargs, cap=100):
+    check_cap(kwargs, cap)
+    return ListPaginator(results, kwargs['per_page']).get_page(kwargs['page'])
+
+
+class SeekCoalescePaginator(paginators.SeekPaginator):
+    """Seek paginator that handles null values on the sort column.
+
+    Postgres sorts nulls last in ascending order and first in descending
+    order, so a seek may need to cross from non-null to null values or back.
+    Rather than coalescing nulls to a sentinel value, which keeps Postgres
+    from using the `(sort_column, index_column)` indexes, each page is read
+    in up to two phases: a row comparison on the sort and index columns over
+    the non-null values, and a comparison on the index column alone over the
+    null values. The second phase only runs if the first doesn't fill the
+    page.
+
+    :param bool null_phase: The previous page ended on a null sort value
+    :param transform: Optional function of a filtered query and the index and
+        sort columns, applied before ordering on the index column; used to
+        select rows rather than entities
+    """
+
+    def __init__(self, cursor, per_page, index_column, sort_column=None, count=None,
+                 null_phase=False, transform=None):
+        self.null_phase = null_phase
+        self.transform = transform
+        super(SeekCoalescePaginator, self).__init__(cursor, per_page, index_column, sort_column, count)
 
     def _fetch(self, last_index, sort_index=None, limit=None, eager=True):
-        cursor = self.cursor
         direction = self.sort_column[1] if self.sort_column else sa.asc
-        lhs, rhs = (), ()
+        queries = [
+            self._transform(query).order_by(direction(self.index_column)).limit(limit)
+            for query in self._get_phases(last_index, sort_index)
+        ]
+        results = []
+        for query in queries:
+            if limit is not None:
+                if len(results) >= limit:
+                    break
+                query = query.limit(limit - len(results))
+            results.extend(query.all())
+        return results
+
+    def _get_phases(self, last_index, sort_index=None):
+        """Build the filtered queries to read, in order, for the requested
+        page.
+        """
+        cursor = self.cursor
+        if self.sort_column is None:
+            if last_index is not None:
+                cursor = cursor.filter(self.index_column > last_index)
+            return [cursor]
+        column, direction = self.sort_column
+        ascending = direction == sa.asc
+        after = operator.gt if ascending else operator.lt
         if sort_index is not None:
-            left_index = self.sort_column[0]
-            comparator = self.max_column_map.get(str(left_index.property.columns[0].type).lower())
-            left_index = sa.func.coalesce(left_index, comparator)
-            lhs += (left_index,)
-            rhs += (sort_index,)
+            if last_index is not None:
+                seek = after(sa.tuple_(column, self.index_column), sa.tuple_(sort_index, last_index))
+            else:
+                seek = after(column, sort_index)
+            # Nulls follow the non-null values in ascending order
+            phases = [cursor.filter(seek)]
+            if ascending:
+                phases.append(cursor.filter(column == None))  # noqa
+            return phases
+        if self.null_phase:
+            seek = column == None  # noqa
+            if last_index is not None:
+                seek = sa.and_(seek, after(self.index_column, last_index))
+            # Non-null values follow the nulls in descending order
+            phases = [cursor.filter(seek)]
+            if not ascending:
+                phases.append(cursor.filter(column != None))  # noqa
+            return phases
+        # Seeking on the index alone is supported for backwards compatibility
         if last_index is not None:
-            lhs += (self.index_column,)
-            rhs += (last_index,)
-        lhs = sa.tuple_(*lhs)
-        rhs = sa.tuple_(*rhs)
-        if rhs.clauses:
-            filter = lhs > rhs if direction == sa.asc else lhs < rhs
-            cursor = cursor.filter(filter)
-        query = cursor.order_by(direction(self.index_column)).limit(limit)
-        return query.all() if eager else query
+            cursor = cursor.filter(after(self.index_column, last_index))
+        return [cursor]
+
+    def _transform(self, query):
+        if self.transform is None:
+            return query
+        sort_column = self.sort_column[0] if self.sort_column else None
+        return self.transform(query, self.index_column, sort_column)
 
     def _get_index_values(self, result):
         """Get index values from last result, to be used in seeking to the next
@@ -118,23 +204,82 @@ class SeekCoalescePaginator(paginators.SeekPaginator):
             if ret[key] is None:
                 ret.pop(key)
                 ret['sort_null_only'] = True
+        ret['cursor'] = cursors.encode(ret, self.sort_column)
         return ret
 
 
-def fetch_seek_page(query, kwargs, index_column, clear=False, count=None, cap=100, eager=True):
-    paginator = fetch_seek_paginator(query, kwargs, index_column, clear=clear, count=count, cap=cap)
+class MergeSeekPaginator(SeekCoalescePaginator):
+    """Seek paginator over several result streams, each already seeked and
+    sorted the same way, such as the per-committee pages fetched by
+    `ItemizedResource`. Streams are merged lazily in Python, so only the rows
+    that make up the page are compared.
+
+    :param list streams: Sorted lists of results
+    """
+
+    def __init__(self, streams, per_page, index_column, sort_column=None, count=None):
+        self.streams = streams
+        super(MergeSeekPaginator, self).__init__(None, per_page, index_column, sort_column, count)
+
+    def _count(self):
+        return sum(len(stream) for stream in self.streams)
+
+    def _fetch(self, last_index, sort_index=None, limit=None, eager=True):
+        # Seeks have already been applied to each stream
+        merged = heapq.merge(*[
+            self._decorate(stream, position)
+            for position, stream in enumerate(self.streams)
+        ])
+        return [result for _, _, result in itertools.islice(merged, limit)]
+
+    def _decorate(self, stream, position):
+        # `heapq.merge` only takes `key` and `reverse` as of Python 3.5
+        for result in stream:
+            yield self._get_key(result), position, result
+
+    def _get_key(self, result):
+        """Get the sort key of a result, ordering nulls as Postgres does: last
+        in ascending order and first in descending order.
+        """
+        index = getattr(result, self.index_column.key)
+        if self.sort_column is None:
+            return (index, )
+        value = getattr(result, self.sort_column[0].key)
+        key = (value is None, value, index)
+        return DescendingKey(key) if self.sort_column[1] == sa.desc else key
+
+
+class DescendingKey(object):
+    """Sort key that inverts the order of the wrapped key.
+    """
+    __slots__ = ['key']
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+def fetch_seek_page(query, kwargs, index_column, clear=False, count=None, cap=100, transform=None):
+    paginator = fetch_seek_paginator(
+        query, kwargs, index_column, clear=clear, count=count, cap=cap, transform=transform,
+    )
+    if kwargs.get('cursor'):
+        kwargs = extend(kwargs, cursors.decode(kwargs['cursor'], index_column, paginator.sort_column))
     if paginator.sort_column is not None:
         sort_index = kwargs['last_{0}'.format(paginator.sort_column[0].key)]
-        if not sort_index and kwargs['sort_null_only'] and paginator.sort_column[1] == sa.asc:
-            sort_index = None
-            query = query.filter(paginator.sort_column[0] == None)
-            paginator.cursor = query
+        paginator.null_phase = sort_index is None and bool(kwargs.get('sort_null_only'))
     else:
         sort_index = None
-    return paginator.get_page(last_index=kwargs['last_index'], sort_index=sort_index, eager=eager)
+    return paginator.get_page(last_index=kwargs['last_index'], sort_index=sort_index)
 
 
-def fetch_seek_paginator(query, kwargs, index_column, clear=False, count=None, cap=100):
+def fetch_seek_paginator(query, kwargs, index_column, clear=False, count=None, cap=100,
+                         transform=None):
     check_cap(kwargs, cap)
     model = index_column.parent.class_
     sort, hide_null = kwargs.get('sort'), kwargs.get('sort_hide_null')
@@ -151,6 +296,7 @@ def fetch_seek_paginator(query, kwargs, index_column, clear=False, count=None, c
         index_column,
         sort_column=sort_column,
         count=count,
+        transform=transform,
     )
 
 